@@ -2,7 +2,10 @@
 
 This script listens for Art-Net packets and updates an attached LED strip.
 It supports both NeoPixel and DotStar devices and handles multiple
-universes so that more than 170 pixels can be controlled.
+universes so that more than 170 pixels can be controlled.  With
+``--protocol ddp`` it instead listens for DDP packets, which carry up to
+480 pixels each and mark the end of a frame with a push flag, and with
+``--protocol sacn`` it joins the E1.31 multicast groups of its universes.
 
 The service is intended to run on a Raspberry Pi and requires either the
 ``neopixel`` or ``adafruit_dotstar`` libraries depending on the selected LED
@@ -14,16 +17,38 @@ happy on systems without those packages available.
 from __future__ import annotations
 
 import argparse
+import contextlib
+import json
 import logging
+import os
+import signal
 import socket
 import struct
+import sys
 import time
-from typing import Iterable, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
 # Art-Net constants
 ARTNET_PORT = 6454
 ARTNET_HEADER = b"Art-Net\0"
 OPCODE_ARTDMX = 0x5000
+OPCODE_ARTPOLL = 0x2000
+OPCODE_ARTPOLLREPLY = 0x2100
+
+# DDP constants
+DDP_PORT = 4048
+DDP_HEADER_LEN = 10
+DDP_FLAG_VERSION1 = 0x40
+DDP_FLAG_TIMECODE = 0x10
+DDP_FLAG_QUERY = 0x02
+DDP_FLAG_PUSH = 0x01
+
+# sACN (E1.31) constants
+SACN_PORT = 5568
+SACN_ACN_ID = b"ASC-E1.17\0\0\0"
+SACN_VECTOR_ROOT_DATA = 0x00000004
+SACN_VECTOR_FRAMING_DATA = 0x00000002
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -62,6 +87,103 @@ def _parse_artdmx(packet: bytes) -> Optional[Tuple[int, bytes]]:
     return universe, data
 
 
+def _is_artpoll(packet: bytes) -> bool:
+    """Return ``True`` if ``packet`` is an ArtPoll discovery request."""
+
+    return (
+        len(packet) >= 12
+        and packet.startswith(ARTNET_HEADER)
+        and struct.unpack("<H", packet[8:10])[0] == OPCODE_ARTPOLL
+    )
+
+
+def _local_ip(peer: str) -> str:
+    """Return the local address used to reach ``peer``."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.connect((peer, ARTNET_PORT))
+            return probe.getsockname()[0]
+        except OSError:
+            return "0.0.0.0"
+
+
+def _build_artpollreplies(ip: str, universes: int, name: str) -> List[bytes]:
+    """Build the ArtPollReply packets announcing ``universes`` outputs.
+
+    A reply describes at most four ports sharing a net and sub-net, so
+    larger strips are announced with several replies distinguished by their
+    bind index.
+    """
+
+    replies = []
+    blocks = [list(range(u, min(u + 4, universes))) for u in range(0, universes, 4)]
+    for bind_index, block in enumerate(blocks, start=1):
+        packet = bytearray(239)
+        packet[0:8] = ARTNET_HEADER
+        packet[8:10] = struct.pack("<H", OPCODE_ARTPOLLREPLY)
+        packet[10:14] = socket.inet_aton(ip)
+        packet[14:16] = struct.pack("<H", ARTNET_PORT)
+        packet[18] = (block[0] >> 8) & 0x7F
+        packet[19] = (block[0] >> 4) & 0x0F
+        packet[26:44] = name.encode()[:17].ljust(18, b"\0")
+        packet[44:108] = f"piccolo Pi service {name}".encode()[:63].ljust(64, b"\0")
+        packet[172:174] = struct.pack(">H", len(block))
+        for port, universe in enumerate(block):
+            packet[174 + port] = 0x80  # DMX output port
+            packet[182 + port] = 0x80  # data is being transmitted
+            packet[190 + port] = universe & 0x0F
+        packet[211] = bind_index
+        replies.append(bytes(packet))
+    return replies
+
+
+class _Tracer:
+    """Minimal span recorder writing Chrome trace / Perfetto JSON.
+
+    Only every frame selected by ``sample_rate`` is recorded; the newest
+    ``max_events`` spans are kept in memory until :meth:`export` is called on
+    shutdown.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_events: int = 200_000) -> None:
+        self.sample_rate = sample_rate
+        self.events: Deque[dict] = deque(maxlen=max_events)
+        self._frames = 0
+        self.sampled = True
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        if not self.sampled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": "rpi",
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": (end - start) / 1000,
+                    "pid": os.getpid(),
+                    "tid": 0,
+                }
+            )
+
+    def next_frame(self) -> None:
+        n = self._frames
+        self._frames += 1
+        self.sampled = int((n + 1) * self.sample_rate) > int(n * self.sample_rate)
+
+    def export(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, fh)
+
+
 def _init_strip(args: argparse.Namespace) -> LEDStrip:
     """Initialise the LED strip based on command line arguments."""
 
@@ -95,64 +217,194 @@ def _init_strip(args: argparse.Namespace) -> LEDStrip:
     return LEDStrip(pixels)
 
 
+def _parse_ddp(packet: bytes) -> Optional[Tuple[int, bool, bytes]]:
+    """Validate and extract fields from a DDP data packet.
+
+    Returns a tuple of ``(byte_offset, push, data)`` or ``None`` if the
+    packet is not a DDP version 1 data packet or is shorter than its
+    declared length.
+    """
+
+    if len(packet) < DDP_HEADER_LEN:
+        return None
+    flags = packet[0]
+    if flags & 0xC0 != DDP_FLAG_VERSION1 or flags & DDP_FLAG_QUERY:
+        return None
+    header_len = DDP_HEADER_LEN + (4 if flags & DDP_FLAG_TIMECODE else 0)
+    offset, length = struct.unpack(">IH", packet[4:10])
+    data = packet[header_len : header_len + length]
+    if len(data) < length:
+        return None
+    return offset, bool(flags & DDP_FLAG_PUSH), data
+
+
+def _parse_e131(packet: bytes) -> Optional[Tuple[int, int, bytes]]:
+    """Validate and extract fields from an E1.31 data packet.
+
+    Returns a tuple of ``(universe, sequence, data)`` for packets carrying
+    DMX (start code zero) or ``None`` otherwise.
+    """
+
+    if len(packet) < 126 or packet[4:16] != SACN_ACN_ID:
+        return None
+    if struct.unpack(">I", packet[18:22])[0] != SACN_VECTOR_ROOT_DATA:
+        return None
+    if struct.unpack(">I", packet[40:44])[0] != SACN_VECTOR_FRAMING_DATA:
+        return None
+    if packet[125] != 0:  # only plain DMX start code
+        return None
+    sequence = packet[111]
+    universe = struct.unpack(">H", packet[113:115])[0]
+    count = struct.unpack(">H", packet[123:125])[0] - 1
+    return universe, sequence, packet[126 : 126 + count]
+
+
+def _e131_in_order(last: Optional[int], sequence: int) -> bool:
+    """Apply the E1.31 sequence rule, rejecting late or duplicate packets."""
+
+    if last is None:
+        return True
+    diff = (sequence - last + 128) % 256 - 128
+    return diff > 0 or diff <= -20
+
+
+def _join_multicast(sock: socket.socket, universes: Iterable[int]) -> None:
+    """Join the sACN multicast group of every universe."""
+
+    for universe in universes:
+        group = f"239.255.{(universe >> 8) & 0xFF}.{universe & 0xFF}"
+        mreq = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton("0.0.0.0"))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+
+
+def _write_pixels(strip: LEDStrip, start: int, data: bytes, num_pixels: int) -> None:
+    """Copy RGB triplets from ``data`` into the strip starting at ``start``."""
+
+    count = min(len(data) // 3, num_pixels - start)
+    for i in range(max(0, count)):
+        base = i * 3
+        strip[start + i] = (data[base], data[base + 1], data[base + 2])
+
+
 def run_service(args: argparse.Namespace) -> None:
-    """Run the Art-Net service."""
+    """Run the Art-Net (or DDP / sACN) service."""
 
     strip = _init_strip(args)
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(("", ARTNET_PORT))
-    _LOGGER.info("Listening for Art-Net on UDP %d", ARTNET_PORT)
-
     bytes_per_pixel = 3  # RGB only for now
     pixels_per_universe = 512 // bytes_per_pixel
     total_universes = (args.num_pixels + pixels_per_universe - 1) // pixels_per_universe
     last_universe = total_universes - 1
-    buffer = [(0, 0, 0)] * args.num_pixels
 
     # Benchmarking state
-    if args.benchmark:
-        bench_interval = 5.0
-        last_report = time.perf_counter()
-        frame_count = 0
-        show_time_total = 0.0
-
-    while True:
-        data, _addr = sock.recvfrom(1024)
+    bench_interval = 5.0
+    last_report = time.perf_counter()
+    frame_count = 0
+    show_time_total = 0.0
+
+    def show() -> None:
+        nonlocal last_report, frame_count, show_time_total
+        if not args.benchmark:
+            strip.show()
+            return
+        start_time = time.perf_counter()
+        strip.show()
+        show_time_total += time.perf_counter() - start_time
+        frame_count += 1
+        now = time.perf_counter()
+        if now - last_report >= bench_interval:
+            fps = frame_count / (now - last_report)
+            avg_show = show_time_total / frame_count if frame_count else 0.0
+            _LOGGER.info(
+                "Average FPS: %.2f, average strip.show() time: %.6f s",
+                fps,
+                avg_show,
+            )
+            last_report = now
+            frame_count = 0
+            show_time_total = 0.0
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sequences: Dict[int, int] = {}
+
+    # Each handler writes one packet into the strip and returns True when a
+    # complete frame has arrived and the strip should be refreshed.
+    def handle_ddp(data: bytes, _addr: Tuple[str, int]) -> bool:
+        ddp = _parse_ddp(data)
+        if not ddp:
+            return False
+        offset, push, pixels = ddp
+        _write_pixels(strip, offset // bytes_per_pixel, pixels, args.num_pixels)
+        # DDP senders set the push flag on the last packet of a frame
+        return push
+
+    def handle_sacn(data: bytes, _addr: Tuple[str, int]) -> bool:
+        parsed = _parse_e131(data)
+        if not parsed:
+            return False
+        universe, sequence, dmx = parsed
+        if not 1 <= universe <= total_universes:
+            return False
+        if not _e131_in_order(sequences.get(universe), sequence):
+            return False
+        sequences[universe] = sequence
+        start = (universe - 1) * pixels_per_universe
+        _write_pixels(strip, start, dmx[: pixels_per_universe * bytes_per_pixel], args.num_pixels)
+        return universe == total_universes
+
+    def handle_artnet(data: bytes, addr: Tuple[str, int]) -> bool:
+        if _is_artpoll(data):
+            # reply to the poller's socket so controllers on any port find us
+            for reply in _build_artpollreplies(_local_ip(addr[0]), total_universes, args.name):
+                sock.sendto(reply, addr)
+            return False
         parsed = _parse_artdmx(data)
         if not parsed:
-            continue
+            return False
         universe, dmx = parsed
         start = universe * pixels_per_universe
-        for i in range(min(pixels_per_universe, args.num_pixels - start)):
-            base = i * bytes_per_pixel
-            if base + 2 >= len(dmx):
-                break
-            r, g, b = dmx[base : base + 3]
-            idx = start + i
-            buffer[idx] = (r, g, b)
-            strip[idx] = (r, g, b)
+        _write_pixels(strip, start, dmx[: pixels_per_universe * bytes_per_pixel], args.num_pixels)
         # Only refresh once the final universe has been processed
-        if universe == last_universe:
-            if args.benchmark:
-                start_time = time.perf_counter()
-                strip.show()
-                show_time_total += time.perf_counter() - start_time
-                frame_count += 1
-                now = time.perf_counter()
-                if now - last_report >= bench_interval:
-                    fps = frame_count / (now - last_report)
-                    avg_show = show_time_total / frame_count if frame_count else 0.0
-                    _LOGGER.info(
-                        "Average FPS: %.2f, average strip.show() time: %.6f s",
-                        fps,
-                        avg_show,
-                    )
-                    last_report = now
-                    frame_count = 0
-                    show_time_total = 0.0
-            else:
-                strip.show()
+        return universe == last_universe
+
+    if args.protocol == "ddp":
+        sock.bind(("", DDP_PORT))
+        _LOGGER.info("Listening for DDP on UDP %d", DDP_PORT)
+        handle = handle_ddp
+    elif args.protocol == "sacn":
+        # sACN universes start at 1; universe 1 drives the first 170 pixels
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", SACN_PORT))
+        _join_multicast(sock, range(1, total_universes + 1))
+        _LOGGER.info(
+            "Listening for sACN universes 1-%d on UDP %d", total_universes, SACN_PORT
+        )
+        handle = handle_sacn
+    else:
+        sock.bind(("", ARTNET_PORT))
+        _LOGGER.info("Listening for Art-Net on UDP %d", ARTNET_PORT)
+        handle = handle_artnet
+
+    tracer = _Tracer(args.trace_sample_rate) if args.trace else None
+    try:
+        while True:
+            if tracer is None:
+                data, addr = sock.recvfrom(2048)
+                if handle(data, addr):
+                    show()
+                continue
+            with tracer.span("receive"):
+                data, addr = sock.recvfrom(2048)
+            with tracer.span("parse"):
+                ready = handle(data, addr)
+            if ready:
+                with tracer.span("show"):
+                    show()
+                tracer.next_frame()
+    finally:
+        if tracer is not None:
+            tracer.export(args.trace)
+            _LOGGER.info("Wrote %d trace events to %s", len(tracer.events), args.trace)
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -163,6 +415,27 @@ def build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument("--pin", default="D18", help="NeoPixel data pin (when using neopixel)")
     parser.add_argument("--data-pin", default="MOSI", help="DotStar data pin (when using dotstar)")
     parser.add_argument("--clock-pin", default="SCLK", help="DotStar clock pin (when using dotstar)")
+    parser.add_argument(
+        "--protocol",
+        choices=["artnet", "ddp", "sacn"],
+        default="artnet",
+        help="Network protocol to listen for",
+    )
+    parser.add_argument(
+        "--name",
+        default=socket.gethostname(),
+        help="Short name announced in ArtPoll replies",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Record receive/parse/show timings and write a Chrome trace file on exit",
+    )
+    parser.add_argument(
+        "--trace-sample-rate",
+        type=float,
+        default=1.0,
+        help="Fraction of frames to trace (default: all)",
+    )
     parser.add_argument(
         "--benchmark",
         action="store_true",
@@ -175,6 +448,8 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
     parser = build_arg_parser()
     args = parser.parse_args(argv)
     logging.basicConfig(level=logging.INFO)
+    # exit cleanly on SIGTERM (systemd stop) so the trace file is written
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     run_service(args)
 
 
@@ -1,7 +1,9 @@
 import argparse
 from pathlib import Path
 
+from src.effects import load_effect_modules
 from src.rest_api import RestAPI
+from src.tracing import tracer
 
 
 def main() -> None:
@@ -9,10 +11,60 @@ def main() -> None:
     parser.add_argument("--config", type=Path, help="Path to YAML configuration", required=False)
     parser.add_argument("--host", default="0.0.0.0", help="Bind host")
     parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="HTTP worker processes feeding one output engine",
+    )
+    parser.add_argument(
+        "--effect-module",
+        action="append",
+        default=[],
+        help="Import an effect plugin module (repeatable)",
+    )
+    parser.add_argument(
+        "--discovery-interval",
+        type=float,
+        default=0,
+        help="Re-poll for Art-Net nodes every N seconds (0 disables)",
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=40.0,
+        help="Frame rate of the render loop for running effects",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        help="Trace the output pipeline and write a Chrome trace file on exit",
+    )
+    parser.add_argument(
+        "--trace-sample-rate",
+        type=float,
+        default=1.0,
+        help="Fraction of frames to trace (default: all)",
+    )
     args = parser.parse_args()
+    if args.fps <= 0:
+        parser.error("--fps must be positive")
+    if not 0 < args.trace_sample_rate <= 1:
+        parser.error("--trace-sample-rate must be in (0, 1]")
+
+    load_effect_modules(args.effect_module)
 
     api = RestAPI(config=args.config) if args.config else RestAPI()
-    api.start(host=args.host, port=args.port)
+    api.loop.fps = args.fps
+    if args.discovery_interval > 0:
+        api.start_discovery(args.discovery_interval)
+    if args.trace:
+        tracer.start(args.trace_sample_rate)
+    try:
+        api.start(host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if args.trace:
+            tracer.export(args.trace)
 
 
 if __name__ == "__main__":
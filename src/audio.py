@@ -0,0 +1,429 @@
+"""Audio input, band analysis and audio-reactive effects.
+
+PCM audio is read in fixed-size blocks from a WAV file, a raw stream on
+stdin or a local socket, analysed with a windowed FFT into log-spaced band
+energies and published to :data:`audio_feed`.  The ``vu``, ``spectrum`` and
+``beat`` effects registered here read the latest analysis when rendered, so
+input-to-light latency is bounded by one block plus one render frame: stale
+blocks are dropped rather than queued.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import socket
+import sys
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict
+
+import numpy as np
+
+from .effects import EffectParam, register_effect
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class AudioFeatures:
+    """Analysis of one audio block."""
+
+    bands: np.ndarray  # normalised band energies in [0, 1]
+    level: float  # RMS level in [0, 1]
+    beat: bool
+    captured: float  # perf_counter() when the block finished arriving
+
+
+class PCMSource:
+    """Read fixed-size blocks of PCM audio from a binary stream.
+
+    Samples are signed 16 bit little endian unless ``sample_width`` says
+    otherwise (1 = unsigned 8 bit, 4 = signed 32 bit); channels are mixed
+    down to mono.  With ``realtime`` reads are paced to the sample rate,
+    which is needed for files that would otherwise be consumed instantly.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO | None,
+        sample_rate: int = 44100,
+        channels: int = 1,
+        sample_width: int = 2,
+        realtime: bool = False,
+    ) -> None:
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.realtime = realtime
+        self._frames_read = 0
+        self._started: float | None = None
+
+    def _read(self, size: int) -> bytes:
+        return self.stream.read(size) if self.stream is not None else b""
+
+    def read_block(self, frames: int) -> np.ndarray | None:
+        """Return the next ``frames`` samples as mono float32, ``None`` at EOF."""
+        size = frames * self.channels * self.sample_width
+        data = self._read(size)
+        if len(data) < size:
+            return None
+        if self.realtime:
+            if self._started is None:
+                self._started = time.perf_counter()
+            due = self._started + (self._frames_read + frames) / self.sample_rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self._frames_read += frames
+        if self.sample_width == 1:
+            samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif self.sample_width == 4:
+            samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2**31
+        else:
+            samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return samples
+
+    def close(self) -> None:
+        if self.stream is not None and self.stream is not sys.stdin.buffer:
+            self.stream.close()
+
+
+class _WaveSource(PCMSource):
+    def __init__(self, path: str) -> None:
+        self._wave = wave.open(path, "rb")
+        super().__init__(
+            None,
+            sample_rate=self._wave.getframerate(),
+            channels=self._wave.getnchannels(),
+            sample_width=self._wave.getsampwidth(),
+            realtime=True,
+        )
+
+    def _read(self, size: int) -> bytes:
+        return self._wave.readframes(size // (self.channels * self.sample_width))
+
+    def close(self) -> None:
+        self._wave.close()
+
+
+class _SocketSource(PCMSource):
+    """Listen on a TCP or Unix socket and read PCM from the first client."""
+
+    def __init__(self, listener: socket.socket, **kwargs: Any) -> None:
+        super().__init__(None, **kwargs)
+        self._listener = listener
+        self._conn: socket.socket | None = None
+
+    def _read(self, size: int) -> bytes:
+        if self.stream is None:
+            self._conn, _addr = self._listener.accept()
+            self.stream = self._conn.makefile("rb")
+        return self.stream.read(size)
+
+    def close(self) -> None:
+        super().close()
+        if self._conn is not None:
+            self._conn.close()
+        self._listener.close()
+
+
+def open_source(spec: str, sample_rate: int = 44100, channels: int = 1) -> PCMSource:
+    """Open an audio source.
+
+    ``spec`` is ``"-"`` for raw PCM on stdin, ``"tcp://host:port"`` or
+    ``"unix:/path"`` to listen for a client streaming raw PCM, a ``.wav``
+    file, or any other path for a raw PCM file.  Raw sources use
+    ``sample_rate`` and ``channels``; WAV files use their own header.
+    """
+    raw = {"sample_rate": sample_rate, "channels": channels}
+    if spec == "-":
+        return PCMSource(sys.stdin.buffer, **raw)
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://") :].rpartition(":")
+        listener = socket.create_server((host or "127.0.0.1", int(port)))
+        return _SocketSource(listener, **raw)
+    if spec.startswith("unix:"):
+        path = spec[len("unix:") :]
+        if os.path.exists(path):
+            os.unlink(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+        return _SocketSource(listener, **raw)
+    if spec.lower().endswith(".wav"):
+        return _WaveSource(spec)
+    return PCMSource(open(spec, "rb"), realtime=True, **raw)
+
+
+class BandAnalyzer:
+    """Windowed FFT band energy analysis with automatic gain and beats.
+
+    Band edges are spaced logarithmically between ``low`` and ``high`` Hz
+    and precomputed as FFT bin indices, so each block costs one ``rfft`` and
+    one ``np.add.reduceat``.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        block_size: int = 1024,
+        bands: int = 16,
+        low: float = 40.0,
+        high: float = 16000.0,
+        decay: float = 0.995,
+        beat_threshold: float = 1.5,
+    ) -> None:
+        bins = block_size // 2 + 1
+        if bands < 1 or bands >= bins:
+            raise ValueError("bands must be between 1 and block_size / 2")
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.decay = decay
+        self.beat_threshold = beat_threshold
+        self.window = np.hanning(block_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(block_size, 1.0 / sample_rate)
+        high = min(high, sample_rate / 2)
+        edges = np.searchsorted(freqs, np.geomspace(low, high, bands + 1))
+        # force every band to cover at least one bin
+        ramp = np.arange(bands + 1)
+        edges = np.maximum.accumulate(edges - ramp) + ramp
+        self._starts = np.clip(edges[:-1], 0, bins - 1)
+        self._counts = np.maximum(1, np.minimum(edges[1:], bins) - self._starts)
+        self._peak = 1e-9
+        self._bass_avg = 0.0
+        self._last_beat = 0.0
+
+    @property
+    def block_duration(self) -> float:
+        return self.block_size / self.sample_rate
+
+    def process(self, samples: np.ndarray) -> AudioFeatures:
+        captured = time.perf_counter()
+        spectrum = np.fft.rfft(samples * self.window)
+        power = spectrum.real**2 + spectrum.imag**2
+        energies = np.log1p(np.add.reduceat(power, self._starts) / self._counts)
+        self._peak = max(self._peak * self.decay, float(energies.max()), 1e-9)
+        bands = np.clip(energies / self._peak, 0.0, 1.0).astype(np.float32)
+        level = min(1.0, float(np.sqrt(np.mean(samples * samples))) * math.sqrt(2))
+        bass = float(energies[: max(1, len(energies) // 8)].mean())
+        beat = (
+            self._bass_avg > 0
+            and bass > self.beat_threshold * self._bass_avg
+            and captured - self._last_beat > 0.1
+        )
+        if beat:
+            self._last_beat = captured
+        self._bass_avg = 0.9 * self._bass_avg + 0.1 * bass if self._bass_avg else bass
+        return AudioFeatures(bands=bands, level=level, beat=beat, captured=captured)
+
+
+class AudioFeed:
+    """Latest audio analysis shared between the input thread and effects.
+
+    Effects call :meth:`latest`; the render loop calls :meth:`mark_output`
+    once a frame has been sent, which records the input-to-light latency of
+    the analysis that frame used.  Latency is recorded once per block, for
+    the first frame sent with it.
+    """
+
+    def __init__(self) -> None:
+        self._features: AudioFeatures | None = None
+        self._consumed: AudioFeatures | None = None
+        self._measured: AudioFeatures | None = None
+        self.last_beat = 0.0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.latency_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def publish(self, features: AudioFeatures) -> None:
+        if features.beat:
+            self.last_beat = features.captured
+        self._features = features
+
+    def clear(self) -> None:
+        self._features = None
+        self._consumed = None
+        self._measured = None
+
+    def latest(self) -> AudioFeatures | None:
+        features = self._features
+        if features is not None:
+            self._consumed = features
+        return features
+
+    def mark_output(self) -> None:
+        features, self._consumed = self._consumed, None
+        if features is None or features is self._measured:
+            return
+        self._measured = features
+        latency = time.perf_counter() - features.captured
+        self.latency_count += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.latency_last = latency
+
+    def stats(self) -> Dict[str, float]:
+        count = self.latency_count
+        return {
+            "latency_ms_mean": 1000 * self.latency_total / count if count else 0.0,
+            "latency_ms_max": 1000 * self.latency_max,
+            "latency_ms_last": 1000 * self.latency_last,
+            "blocks_output": count,
+        }
+
+
+audio_feed = AudioFeed()
+
+
+class AudioInput:
+    """Read blocks from a source on a thread and publish their analysis."""
+
+    def __init__(
+        self,
+        source: PCMSource,
+        block_size: int = 1024,
+        bands: int = 16,
+        feed: AudioFeed | None = None,
+        on_end: Callable[[], None] | None = None,
+    ) -> None:
+        self.source = source
+        self.feed = feed or audio_feed
+        self.analyzer = BandAnalyzer(source.sample_rate, block_size, bands)
+        self.on_end = on_end
+        self.blocks = 0
+        self._wall_total = 0.0
+        self._wall_max = 0.0
+        self._cpu_total = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audio-input", daemon=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self) -> None:
+        self.feed.reset_stats()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.source.close()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self.feed.clear()
+
+    def _run(self) -> None:
+        block_size = self.analyzer.block_size
+        try:
+            while not self._stop.is_set():
+                samples = self.source.read_block(block_size)
+                if samples is None:
+                    break
+                wall = time.perf_counter()
+                cpu = time.thread_time()
+                features = self.analyzer.process(samples)
+                self._cpu_total += time.thread_time() - cpu
+                elapsed = time.perf_counter() - wall
+                self._wall_total += elapsed
+                self._wall_max = max(self._wall_max, elapsed)
+                self.blocks += 1
+                self.feed.publish(features)
+        except (OSError, ValueError):
+            if not self._stop.is_set():
+                _LOGGER.exception("Audio input failed")
+        if self.on_end is not None and not self._stop.is_set():
+            self.on_end()
+
+    def stats(self) -> Dict[str, Any]:
+        blocks = self.blocks
+        return {
+            "running": self.running,
+            "sample_rate": self.source.sample_rate,
+            "block_size": self.analyzer.block_size,
+            "block_ms": 1000 * self.analyzer.block_duration,
+            "blocks": blocks,
+            "analysis_ms_mean": 1000 * self._wall_total / blocks if blocks else 0.0,
+            "analysis_ms_max": 1000 * self._wall_max,
+            "cpu_ms_per_block": 1000 * self._cpu_total / blocks if blocks else 0.0,
+            **self.feed.stats(),
+        }
+
+
+def _hue_colors(count: int) -> np.ndarray:
+    """Return ``count`` fully saturated colours spanning red to violet."""
+    h = np.linspace(0.0, 5.0 / 6.0, count) * 6
+    rgb = np.stack(
+        [np.abs(h - 3) - 1, 2 - np.abs(h - 2), 2 - np.abs(h - 4)], axis=-1
+    )
+    return np.clip(rgb, 0, 1) * 255
+
+
+@register_effect(
+    "vu",
+    params=(
+        EffectParam("low", "color", (0, 255, 0)),
+        EffectParam("high", "color", (255, 0, 0)),
+        EffectParam("gain", "float", 1.0, minimum=0.0),
+    ),
+    deterministic=False,
+)
+def _vu_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Level meter filling the strip with a low-to-high colour gradient."""
+    features = audio_feed.latest()
+    if features is None:
+        return
+    n = out.shape[0]
+    lit = int(round(min(1.0, features.level * params["gain"]) * n))
+    t = np.linspace(0.0, 1.0, n)[:lit, None]
+    low = np.asarray(params["low"], dtype=np.float32)
+    high = np.asarray(params["high"], dtype=np.float32)
+    out[:lit] = (low + (high - low) * t).astype(np.uint8)
+
+
+@register_effect(
+    "spectrum",
+    params=(EffectParam("gain", "float", 1.0, minimum=0.0),),
+    deterministic=False,
+)
+def _spectrum_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Band energies as coloured bars, bass at the start of the strip."""
+    features = audio_feed.latest()
+    if features is None:
+        return
+    bands = features.bands
+    n = out.shape[0]
+    band_of_pixel = np.arange(n) * len(bands) // max(1, n)
+    values = np.clip(bands * params["gain"], 0.0, 1.0)[band_of_pixel]
+    out[...] = (_hue_colors(len(bands))[band_of_pixel] * values[:, None]).astype(np.uint8)
+
+
+@register_effect(
+    "beat",
+    params=(
+        EffectParam("color", "color", (255, 255, 255)),
+        EffectParam("decay", "float", 0.85, minimum=0.0, maximum=1.0),
+    ),
+    deterministic=False,
+    init_state=lambda _size: {"brightness": 0.0, "seen": 0.0},
+)
+def _beat_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Flash on every detected beat and fade out between beats."""
+    audio_feed.latest()
+    # compare beat timestamps so every running beat effect sees each beat
+    if audio_feed.last_beat > state["seen"]:
+        state["seen"] = audio_feed.last_beat
+        state["brightness"] = 1.0
+    else:
+        state["brightness"] *= params["decay"]
+    out[...] = (np.asarray(params["color"]) * state["brightness"]).astype(np.uint8)
@@ -1,13 +1,15 @@
 """Configuration loading utilities."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
 
 import yaml
 
 from .devices import LEDDevice
+from .layout import MatrixLayout
+from .network import PROTOCOLS
 
 
 @dataclass
@@ -15,10 +17,15 @@ class Config:
     """Application configuration."""
 
     devices: List[LEDDevice]
+    effect_modules: List[str] = field(default_factory=list)
 
 
 def load_config(path: str | Path) -> Config:
-    """Load configuration from a YAML file."""
+    """Load configuration from a YAML file.
+
+    Raises ``ValueError`` for unknown protocols, priorities outside 0-200
+    or layouts covering more pixels than their device has.
+    """
     with open(path, "r", encoding="utf-8") as fh:
         data = yaml.safe_load(fh) or {}
 
@@ -29,8 +36,18 @@ def load_config(path: str | Path) -> Config:
             pixel_count=item["pixel_count"],
             universe=item.get("universe", 0),
             group=item.get("group"),
+            layout=MatrixLayout.from_dict(item["layout"]) if item.get("layout") else None,
+            protocol=item.get("protocol", "artnet"),
+            priority=int(item.get("priority", 100)),
         )
         for i, item in enumerate(data.get("devices", []))
     ]
-
-    return Config(devices=devices)
+    for device in devices:
+        if device.protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {device.protocol!r} for {device.name}")
+        if not 0 <= device.priority <= 200:
+            raise ValueError(f"Priority of {device.name} must be between 0 and 200")
+        if device.layout and device.layout.pixel_count > device.pixel_count:
+            raise ValueError(f"Layout of {device.name} exceeds its pixel count")
+
+    return Config(devices=devices, effect_modules=list(data.get("effect_modules", [])))
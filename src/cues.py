@@ -0,0 +1,305 @@
+"""Timecoded cue lists for show playback.
+
+A cue list is loaded from JSON::
+
+    {
+        "scenes": {"intro": [{"group": "stage", "effect": "gradient"},
+                             {"device": "spot", "color": "#ff0000"}]},
+        "cues": [{"time": 0.0, "scene": "intro"},
+                 {"time": 12.5, "group": "stage", "color": [0, 0, 255], "fade": 2.0}]
+    }
+
+Each cue fires at ``time`` seconds into the show and applies one action, or
+every action of a named scene, to devices or groups: a solid ``color`` or an
+``effect`` with ``params``.  A ``fade`` crossfades from what the target
+showed before.
+
+:class:`CuePlayer` keeps the cues sorted by time and is advanced by the
+render loop, firing every cue whose time falls on the current frame, so
+cues land on the frame nearest their time and output is sent with that
+frame.  Its clock is ``time.perf_counter`` and can optionally chase Art-Net
+timecode received by :class:`TimecodeListener`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Mapping, Sequence, Tuple
+
+#: frame rates of the ArtTimeCode types Film, EBU, DF and SMPTE
+TIMECODE_RATES = (24.0, 25.0, 30000 / 1001, 30.0)
+OP_TIMECODE = 0x9700
+
+
+@dataclass
+class CueAction:
+    """Show ``effect`` with ``params`` on one device or group."""
+
+    kind: str  # "device" or "group"
+    name: str
+    effect: str
+    params: Dict[str, Any] | None = None
+    universe: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+
+@dataclass
+class Cue:
+    """Actions fired together ``time`` seconds into the show."""
+
+    time: float
+    actions: List[CueAction]
+    fade: float = 0.0
+    label: str = ""
+
+
+FireCallback = Callable[[Sequence[CueAction], float], None]
+
+
+def _parse_action(item: Mapping[str, Any]) -> CueAction:
+    if ("device" in item) == ("group" in item):
+        raise ValueError("Cue actions need either a device or a group")
+    kind = "device" if "device" in item else "group"
+    if ("color" in item) == ("effect" in item):
+        raise ValueError("Cue actions need either a color or an effect")
+    if "color" in item:
+        effect, params = "cycle", {"colors": [item["color"]]}
+    else:
+        effect, params = str(item["effect"]), item.get("params")
+    return CueAction(kind, str(item[kind]), effect, params, int(item.get("universe", 0)))
+
+
+def parse_cue_list(data: Mapping[str, Any]) -> List[Cue]:
+    """Return the cues described by ``data`` sorted by time.
+
+    Raises ``ValueError`` for malformed cues or unknown scenes.
+    """
+    try:
+        scenes = {
+            name: [_parse_action(item) for item in actions]
+            for name, actions in data.get("scenes", {}).items()
+        }
+        cues = []
+        for item in data["cues"]:
+            if "scene" in item:
+                if item["scene"] not in scenes:
+                    raise ValueError(f"Unknown scene {item['scene']!r}")
+                actions = scenes[item["scene"]]
+            else:
+                actions = [_parse_action(item)]
+            cue = Cue(
+                float(item["time"]),
+                actions,
+                float(item.get("fade", 0.0)),
+                str(item.get("label", item.get("scene", ""))),
+            )
+            if cue.time < 0 or cue.fade < 0:
+                raise ValueError("Cue times and fades may not be negative")
+            cues.append(cue)
+    except (KeyError, TypeError, AttributeError) as exc:
+        raise ValueError(f"Invalid cue list: {exc}") from None
+    cues.sort(key=lambda cue: cue.time)  # stable, so equal times keep file order
+    return cues
+
+
+class CuePlayer:
+    """Fire cues against a monotonic show clock.
+
+    :meth:`tick` is called once per rendered frame and fires every pending
+    cue due within half a frame period, so a cue's firing error is at most
+    half a period plus the frame's own lateness.  The error of every fired
+    cue is kept for :meth:`stats`.  Seeking re-applies, without fades, the
+    latest earlier action for every target so the show looks as if it had
+    played up to that point.
+    """
+
+    #: timecode drift in seconds tolerated before the clock is re-anchored
+    sync_tolerance = 0.1
+    #: seconds without timecode after which a synced show pauses
+    sync_timeout = 1.0
+
+    def __init__(
+        self,
+        cues: List[Cue],
+        fire: FireCallback,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.cues = cues
+        self._times = [cue.time for cue in cues]
+        self._fire = fire
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._origin: float | None = None  # clock reading at show time 0 while playing
+        self._paused_at = 0.0
+        self._next = 0
+        self._synced_at: float | None = None
+        self.fired = 0
+        self.errors: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def duration(self) -> float:
+        return self._times[-1] if self._times else 0.0
+
+    @property
+    def playing(self) -> bool:
+        return self._origin is not None
+
+    def position(self, now: float | None = None) -> float:
+        """Current show time in seconds."""
+        with self._lock:
+            if self._origin is None:
+                return self._paused_at
+            return (self._clock() if now is None else now) - self._origin
+
+    def start(self) -> None:
+        with self._lock:
+            if self._origin is None:
+                self._origin = self._clock() - self._paused_at
+
+    def pause(self) -> None:
+        with self._lock:
+            self._paused_at = self.position()
+            self._origin = None
+
+    def seek(self, position: float) -> None:
+        """Jump to ``position`` seconds, restoring the state of every target."""
+        position = max(0.0, position)
+        with self._lock:
+            if self._origin is not None:
+                self._origin = self._clock() - position
+            else:
+                self._paused_at = position
+            self._next = bisect.bisect_left(self._times, position)
+            latest: Dict[str, CueAction] = {}
+            for cue in self.cues[: self._next]:
+                for action in cue.actions:
+                    latest[action.key] = action
+            if latest:
+                self._fire(list(latest.values()), 0.0)
+
+    def tick(self, period: float = 0.0) -> int:
+        """Fire the cues due on a frame lasting ``period``; return how many fired."""
+        with self._lock:
+            now = self._clock()
+            if self._synced_at is not None and now - self._synced_at > self.sync_timeout:
+                self._synced_at = None
+                self.pause()
+            if self._origin is None:
+                return 0
+            position = now - self._origin
+            due = bisect.bisect_right(self._times, position + period / 2, lo=self._next)
+            for cue in self.cues[self._next : due]:
+                self._fire(cue.actions, cue.fade)
+                self.errors.append(position - cue.time)
+            fired = due - self._next
+            self._next = due
+            self.fired += fired
+            return fired
+
+    def sync(self, seconds: float) -> None:
+        """Follow external timecode currently reading ``seconds``."""
+        with self._lock:
+            now = self._clock()
+            self._synced_at = now
+            if abs(self.position(now) - seconds) > self.sync_tolerance:
+                # jumps re-apply state; small drift is left to the local clock
+                self.seek(seconds)
+            if self._origin is None:
+                self._origin = now - seconds
+
+    def stats(self, period: float = 0.0) -> Dict[str, Any]:
+        with self._lock:
+            errors = [abs(e) * 1000 for e in self.errors]
+            return {
+                "playing": self.playing,
+                "position": self.position(),
+                "duration": self.duration,
+                "cues": len(self.cues),
+                "fired": self.fired,
+                "next_cue": self._times[self._next] if self._next < len(self._times) else None,
+                "synced": self._synced_at is not None,
+                "frame_period_ms": period * 1000,
+                "jitter_ms_mean": statistics.fmean(errors) if errors else 0.0,
+                "jitter_ms_max": max(errors, default=0.0),
+            }
+
+
+def parse_timecode(packet: bytes) -> float | None:
+    """Return the time in seconds carried by an ArtTimeCode packet."""
+    if len(packet) < 19 or not packet.startswith(b"Art-Net\x00"):
+        return None
+    if int.from_bytes(packet[8:10], "little") != OP_TIMECODE:
+        return None
+    frames, seconds, minutes, hours, kind = packet[14:19]
+    if kind >= len(TIMECODE_RATES):
+        return None
+    if kind == 2:
+        # drop-frame: labels 0 and 1 are skipped every minute except each tenth
+        total_minutes = 60 * hours + minutes
+        count = (
+            (3600 * hours + 60 * minutes + seconds) * 30
+            + frames
+            - 2 * (total_minutes - total_minutes // 10)
+        )
+        return count / TIMECODE_RATES[2]
+    return 3600 * hours + 60 * minutes + seconds + frames / TIMECODE_RATES[kind]
+
+
+def build_timecode(seconds: float, kind: int = 1) -> bytes:
+    """Return an ArtTimeCode packet for ``seconds`` (non drop-frame types)."""
+    rate = round(TIMECODE_RATES[kind])
+    total = int(round(seconds * rate))
+    frames, whole = total % rate, total // rate
+    packet = bytearray(b"Art-Net\x00")
+    packet.extend(OP_TIMECODE.to_bytes(2, "little"))
+    packet.extend((0x00, 0x0E, 0x00, 0x00))  # protocol version, filler
+    packet.extend((frames, whole % 60, whole // 60 % 60, whole // 3600 % 24, kind))
+    return bytes(packet)
+
+
+class TimecodeListener:
+    """Receive ArtTimeCode on a background thread and pass it to ``callback``."""
+
+    def __init__(
+        self, callback: Callable[[float], None], host: str = "", port: int = 6454
+    ) -> None:
+        self.callback = callback
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.2)
+        self.address: Tuple[str, int] = self._sock.getsockname()
+        self.packets = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="timecode", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._sock.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data = self._sock.recv(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            seconds = parse_timecode(data)
+            if seconds is not None:
+                self.packets += 1
+                self.callback(seconds)
@@ -4,16 +4,27 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List
 
+from .layout import MatrixLayout
+
 
 @dataclass
 class LEDDevice:
-    """Representation of an Art-Net controlled LED device."""
+    """Representation of a network controlled LED device.
+
+    ``protocol`` selects the output backend: ``"artnet"``, ``"ddp"`` or
+    ``"sacn"`` (E1.31 multicast).  ``priority`` (0-200) is the sACN source
+    priority receivers use to pick between senders of the same universe.
+    """
 
     name: str
     ip: str
     pixel_count: int
     universe: int = 0
     group: str | None = None
+    layout: MatrixLayout | None = None
+    online: bool = True
+    protocol: str = "artnet"
+    priority: int = 100
 
 
 @dataclass
@@ -27,7 +38,14 @@ class LEDSegment:
 
 @dataclass
 class LightGroup:
-    """Group of LED segments possibly across multiple devices."""
+    """Group of LED segments possibly across multiple devices.
+
+    ``protocol`` and ``priority`` override the members' output protocol
+    and sACN priority for group commands.
+    """
 
     name: str
     segments: List[LEDSegment]
+    layout: MatrixLayout | None = None
+    protocol: str | None = None
+    priority: int | None = None
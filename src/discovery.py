@@ -0,0 +1,244 @@
+"""Art-Net node discovery using ArtPoll / ArtPollReply."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Sequence
+
+ARTNET_PORT = 6454
+ARTNET_HEADER = b"Art-Net\x00"
+OPCODE_ARTPOLL = 0x2000
+OPCODE_ARTPOLLREPLY = 0x2100
+
+REPLY_SIZE = 239  # ArtPollReply length up to and including the filler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ArtNode:
+    """An Art-Net node that answered an ArtPoll."""
+
+    ip: str
+    short_name: str = ""
+    long_name: str = ""
+    universes: List[int] = field(default_factory=list)
+    mac: str = ""
+    last_seen: float = 0.0
+    missed: int = 0
+
+    def merge(self, other: "ArtNode") -> None:
+        """Fold in another reply from the same node (multi-port nodes)."""
+        self.short_name = self.short_name or other.short_name
+        self.long_name = self.long_name or other.long_name
+        self.mac = self.mac or other.mac
+        self.universes = sorted(set(self.universes) | set(other.universes))
+
+
+def build_artpoll() -> bytes:
+    """Return an ArtPoll packet asking nodes to reply when polled."""
+    packet = bytearray(ARTNET_HEADER)
+    packet.extend(OPCODE_ARTPOLL.to_bytes(2, "little"))
+    packet.extend((0x00, 0x0E))  # protocol version 14, big endian
+    packet.extend((0x00, 0x00))  # flags, diagnostics priority
+    return bytes(packet)
+
+
+def build_artpollreply(
+    ip: str,
+    universes: Sequence[int],
+    short_name: str = "",
+    long_name: str = "",
+    port: int = ARTNET_PORT,
+    bind_index: int = 1,
+) -> bytes:
+    """Return an ArtPollReply describing up to four output universes.
+
+    All universes must share the same net and sub-net (the top 11 bits).
+    """
+    if len(universes) > 4:
+        raise ValueError("An ArtPollReply describes at most four ports")
+    if len({u >> 4 for u in universes}) > 1:
+        raise ValueError("Universes in one reply must share net and sub-net")
+    base = universes[0] if universes else 0
+    sw_out = bytes(u & 0x0F for u in universes).ljust(4, b"\x00")
+    port_types = bytes(0x80 for _ in universes).ljust(4, b"\x00")  # DMX output
+    packet = bytearray(REPLY_SIZE)
+    packet[0:8] = ARTNET_HEADER
+    packet[8:10] = OPCODE_ARTPOLLREPLY.to_bytes(2, "little")
+    packet[10:14] = socket.inet_aton(ip)
+    packet[14:16] = port.to_bytes(2, "little")
+    packet[18] = (base >> 8) & 0x7F
+    packet[19] = (base >> 4) & 0x0F
+    packet[26:44] = short_name.encode()[:17].ljust(18, b"\x00")
+    packet[44:108] = long_name.encode()[:63].ljust(64, b"\x00")
+    packet[172:174] = len(universes).to_bytes(2, "big")
+    packet[174:178] = port_types
+    packet[182:186] = bytes(0x80 for _ in universes).ljust(4, b"\x00")  # data ok
+    packet[190:194] = sw_out
+    packet[211] = bind_index
+    return bytes(packet)
+
+
+def parse_artpollreply(packet: bytes) -> ArtNode | None:
+    """Return the node described by an ArtPollReply or ``None``."""
+    if len(packet) < 212 or not packet.startswith(ARTNET_HEADER):
+        return None
+    if int.from_bytes(packet[8:10], "little") != OPCODE_ARTPOLLREPLY:
+        return None
+    ip = socket.inet_ntoa(packet[10:14])
+    net, sub = packet[18] & 0x7F, packet[19] & 0x0F
+    num_ports = min(4, int.from_bytes(packet[172:174], "big"))
+    universes = [(net << 8) | (sub << 4) | (packet[190 + i] & 0x0F) for i in range(num_ports)]
+    return ArtNode(
+        ip=ip,
+        short_name=packet[26:44].split(b"\x00", 1)[0].decode(errors="replace"),
+        long_name=packet[44:108].split(b"\x00", 1)[0].decode(errors="replace"),
+        universes=universes,
+        mac=":".join(f"{b:02x}" for b in packet[201:207]),
+    )
+
+
+class _ReplyCollector(asyncio.DatagramProtocol):
+    def __init__(self, replies: Dict[str, ArtNode]) -> None:
+        self.replies = replies
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        node = parse_artpollreply(data)
+        if node is None:
+            return
+        # some nodes leave the IP field empty, fall back to the sender
+        if node.ip == "0.0.0.0":
+            node.ip = addr[0]
+        if node.ip in self.replies:
+            self.replies[node.ip].merge(node)
+        else:
+            self.replies[node.ip] = node
+
+
+class ArtNetDiscovery:
+    """Discover Art-Net nodes and track which ones are still online.
+
+    ArtPoll is sent to each address in ``targets`` (the limited broadcast
+    address by default) and replies are collected on ``listen_port`` until
+    the timeout expires.  If that port is taken, e.g. by a node running on
+    the same host, the poll is sent from an ephemeral port instead and only
+    nodes replying to the sender's address are found.  A node that misses ``miss_limit`` consecutive
+    polls is reported offline.  ``on_poll`` is called with the discovery
+    object after every poll.
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[str] = ("255.255.255.255",),
+        port: int = ARTNET_PORT,
+        listen_port: int = ARTNET_PORT,
+        timeout: float = 1.0,
+        miss_limit: int = 2,
+        on_poll: Callable[["ArtNetDiscovery"], None] | None = None,
+    ) -> None:
+        self.targets = list(targets)
+        self.port = port
+        self.listen_port = listen_port
+        self.timeout = timeout
+        self.miss_limit = miss_limit
+        self.on_poll = on_poll
+        self.nodes: Dict[str, ArtNode] = {}
+        self._lock = threading.Lock()
+        self._stop: threading.Event | None = None
+        self._thread: threading.Thread | None = None
+
+    def is_online(self, ip: str) -> bool | None:
+        """Return whether ``ip`` is online, ``None`` if it never replied."""
+        node = self.nodes.get(ip)
+        if node is None:
+            return None
+        return node.missed < self.miss_limit
+
+    def snapshot(self) -> Dict[str, ArtNode]:
+        """Return a copy of the known nodes that is safe to iterate while polling."""
+        with self._lock:
+            return dict(self.nodes)
+
+    def _socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            try:
+                sock.bind(("", self.listen_port))
+            except OSError:
+                if not self.listen_port:
+                    raise
+                _LOGGER.debug("Port %d is in use, polling from an ephemeral port", self.listen_port)
+                sock.bind(("", 0))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    async def poll(self, timeout: float | None = None) -> Dict[str, ArtNode]:
+        """Broadcast ArtPoll and return the nodes that replied in time."""
+        loop = asyncio.get_running_loop()
+        replies: Dict[str, ArtNode] = {}
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ReplyCollector(replies), sock=self._socket()
+        )
+        try:
+            packet = build_artpoll()
+            for target in self.targets:
+                transport.sendto(packet, (target, self.port))
+            await asyncio.sleep(self.timeout if timeout is None else timeout)
+        finally:
+            transport.close()
+        self._merge(replies)
+        if self.on_poll is not None:
+            self.on_poll(self)
+        return replies
+
+    def _merge(self, replies: Dict[str, ArtNode]) -> None:
+        now = time.time()
+        with self._lock:
+            for ip, node in self.nodes.items():
+                if ip not in replies:
+                    node.missed += 1
+            for ip, node in replies.items():
+                node.last_seen = now
+                if ip in self.nodes:
+                    known = self.nodes[ip]
+                    known.universes = node.universes
+                    known.short_name = node.short_name
+                    known.long_name = node.long_name
+                    known.last_seen, known.missed = now, 0
+                else:
+                    self.nodes[ip] = node
+
+    def start(self, interval: float = 10.0) -> None:
+        """Re-poll every ``interval`` seconds on a background thread."""
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+
+        def _run(stop: threading.Event) -> None:
+            while not stop.is_set():
+                try:
+                    asyncio.run(self.poll())
+                except OSError:
+                    _LOGGER.warning("ArtPoll failed", exc_info=True)
+                stop.wait(interval)
+
+        self._thread = threading.Thread(target=_run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None or self._stop is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
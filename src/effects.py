@@ -3,10 +3,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Tuple
+import functools
+import importlib
 import math
 import random
 
+import numpy as np
+
+from .layout import MatrixLayout
+from .palettes import LUT_SIZE, Stops, even_stops, get_palette, make_stops, palette_lut
+from .tracing import tracer
+
 
 @dataclass
 class Color:
@@ -26,11 +34,521 @@ class Color:
         return bytes((self.r, self.g, self.b))
 
 
+RGB = Tuple[int, int, int]
+Kernel = Callable[[np.ndarray, int, Dict[str, Any], Any], None]
+
+
+def _parse_color(value: object) -> RGB:
+    """Normalise a colour given as ``[r, g, b]``, ``{"r":..}`` or ``"#rrggbb"``."""
+    if isinstance(value, Color):
+        value = (value.r, value.g, value.b)
+    elif isinstance(value, Mapping):
+        value = (value.get("r", 0), value.get("g", 0), value.get("b", 0))
+    elif isinstance(value, str):
+        text = value.lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"Invalid colour {value!r}")
+        value = tuple(int(text[i : i + 2], 16) for i in (0, 2, 4))
+    if not isinstance(value, Sequence) or len(value) != 3:
+        raise ValueError(f"Invalid colour {value!r}")
+    return tuple(max(0, min(255, int(c))) for c in value)  # type: ignore[return-value]
+
+
+def parse_palette(value: object) -> Stops:
+    """Normalise a palette given by name, as colours or as ``[position, colour]`` stops.
+
+    Named palettes resolve to their stops, so changing a palette changes the
+    parameters of every effect using it.
+    """
+    if isinstance(value, str):
+        return get_palette(value)
+    items = list(value)  # type: ignore[call-overload]
+    if items and all(
+        isinstance(item, Sequence) and not isinstance(item, str) and len(item) == 2
+        for item in items
+    ):
+        return make_stops((float(pos), _parse_color(color)) for pos, color in items)
+    return even_stops(_parse_color(item) for item in items)
+
+
+@dataclass(frozen=True)
+class EffectParam:
+    """Declared parameter of a registered effect.
+
+    ``kind`` is one of ``"int"``, ``"float"``, ``"str"``, ``"color"``,
+    ``"colors"``, ``"range"`` (a ``(low, high)`` float pair) or ``"palette"``
+    (gradient stops, see :func:`parse_palette`).
+    """
+
+    name: str
+    kind: str
+    default: Any
+    minimum: float | None = None
+    maximum: float | None = None
+    description: str = ""
+
+    def _bound(self, value: float) -> None:
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name} must be >= {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name} must be <= {self.maximum}")
+
+    def coerce(self, value: Any) -> Any:
+        """Validate ``value`` and convert it to the canonical hashable form."""
+        try:
+            if self.kind == "int":
+                result = int(value)
+                self._bound(result)
+            elif self.kind == "float":
+                result = float(value)
+                self._bound(result)
+            elif self.kind == "str":
+                result = str(value)
+            elif self.kind == "color":
+                result = _parse_color(value)
+            elif self.kind == "colors":
+                result = tuple(_parse_color(v) for v in value)
+            elif self.kind == "palette":
+                result = parse_palette(value)
+            elif self.kind == "range":
+                low, high = (float(v) for v in value)
+                self._bound(low)
+                self._bound(high)
+                if low > high:
+                    raise ValueError(f"{self.name} low bound exceeds high bound")
+                result = (low, high)
+            else:
+                raise ValueError(f"Unknown parameter kind {self.kind!r}")
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid value for {self.name}: {exc}") from exc
+        return result
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "default": self.default,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "description": self.description,
+        }
+
+
+@dataclass(frozen=True)
+class EffectSpec:
+    """A registered effect: parameter schema, render kernel and metadata.
+
+    The kernel is called as ``kernel(out, step, params, state)`` and writes
+    the frame for ``step`` directly into ``out``, a ``(pixels, 3)`` uint8
+    array, or a ``(height, width, 3)`` canvas when ``dims`` is 2.  ``state``
+    is ``None`` unless ``init_state`` is given, in which case it is created
+    once per engine with the pixel count (or canvas ``(height, width)``).
+
+    ``period`` is the number of steps after which the output repeats, either
+    fixed or computed from the resolved parameters; ``None`` means aperiodic.
+    Together with ``deterministic`` it tells callers whether a rendered frame
+    may be cached and reused.
+    """
+
+    name: str
+    kernel: Kernel
+    params: Tuple[EffectParam, ...] = ()
+    period: int | Callable[[Dict[str, Any]], int | None] | None = None
+    deterministic: bool = True
+    init_state: Callable[[Any], Any] | None = None
+    description: str = ""
+    dims: int = 1
+
+    @property
+    def stateful(self) -> bool:
+        return self.init_state is not None
+
+    def resolve(self, values: Mapping[str, Any] | None = None) -> Dict[str, Any]:
+        """Return validated parameters with defaults filled in."""
+        values = dict(values or {})
+        known = {p.name for p in self.params}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.name}: {sorted(unknown)}")
+        return {
+            p.name: p.coerce(values[p.name] if p.name in values else p.default)
+            for p in self.params
+        }
+
+    def period_for(self, params: Dict[str, Any]) -> int | None:
+        if callable(self.period):
+            return self.period(params)
+        return self.period
+
+    def cacheable(self, params: Dict[str, Any]) -> bool:
+        return self.deterministic and not self.stateful and bool(self.period_for(params))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "params": [p.describe() for p in self.params],
+            "period": None if callable(self.period) else self.period,
+            "periodic": self.period is not None,
+            "deterministic": self.deterministic,
+            "stateful": self.stateful,
+            "dims": self.dims,
+        }
+
+
+class EffectRegistry:
+    """Name to :class:`EffectSpec` mapping used to dispatch effects."""
+
+    def __init__(self) -> None:
+        self._effects: Dict[str, EffectSpec] = {}
+        self.modules: List[str] = []
+
+    def register(self, spec: EffectSpec, replace: bool = False) -> EffectSpec:
+        if spec.name in self._effects and not replace:
+            raise ValueError(f"Effect {spec.name} already registered")
+        self._effects[spec.name] = spec
+        return spec
+
+    def effect(
+        self,
+        name: str,
+        params: Iterable[EffectParam] = (),
+        period: int | Callable[[Dict[str, Any]], int | None] | None = None,
+        deterministic: bool = True,
+        init_state: Callable[[Any], Any] | None = None,
+        description: str = "",
+        dims: int = 1,
+        replace: bool = False,
+    ) -> Callable[[Kernel], Kernel]:
+        """Decorator registering a kernel function under ``name``."""
+
+        def _decorator(kernel: Kernel) -> Kernel:
+            self.register(
+                EffectSpec(
+                    name=name,
+                    kernel=kernel,
+                    params=tuple(params),
+                    period=period,
+                    deterministic=deterministic,
+                    init_state=init_state,
+                    description=description or (kernel.__doc__ or "").strip(),
+                    dims=dims,
+                ),
+                replace=replace,
+            )
+            return kernel
+
+        return _decorator
+
+    def get(self, name: str) -> EffectSpec:
+        try:
+            return self._effects[name]
+        except KeyError:
+            raise KeyError(f"Unknown effect {name}") from None
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._effects
+
+    def names(self) -> List[str]:
+        return list(self._effects)
+
+    def specs(self) -> List[EffectSpec]:
+        return list(self._effects.values())
+
+    def load_module(self, module_name: str) -> None:
+        """Import an effect plugin module.
+
+        Plugins either register with :func:`register_effect` at import time
+        or expose a ``register_effects(registry)`` function.
+        """
+        if module_name in self.modules:
+            return
+        module = importlib.import_module(module_name)
+        hook = getattr(module, "register_effects", None)
+        if callable(hook):
+            hook(self)
+        self.modules.append(module_name)
+
+
+registry = EffectRegistry()
+register_effect = registry.effect
+
+
+def load_effect_modules(module_names: Iterable[str]) -> None:
+    """Import each named plugin module into the default registry."""
+    for module_name in module_names:
+        registry.load_module(module_name)
+
+
+@register_effect(
+    "cycle",
+    params=(
+        EffectParam(
+            "colors", "colors", ((255, 0, 0), (0, 255, 0), (0, 0, 255)),
+            description="Colours to step through",
+        ),
+    ),
+    period=lambda p: len(p["colors"]) or 1,
+)
+def _cycle_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Fill all pixels with one colour, advancing through the list each step."""
+    colors = params["colors"]
+    out[...] = colors[step % len(colors)] if colors else 0
+
+
+@register_effect(
+    "wave",
+    params=(
+        EffectParam("color", "color", (255, 255, 255)),
+        EffectParam("wavelength", "int", 20, minimum=1, description="Pixels per cycle"),
+    ),
+    period=lambda p: p["wavelength"],
+)
+def _wave_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Sine brightness wave moving one pixel per step."""
+    phase = (np.arange(out.shape[0]) + step) / params["wavelength"]
+    factor = (np.sin(phase * math.tau) + 1) / 2
+    out[...] = (factor[:, None] * np.asarray(params["color"], dtype=np.float64)).astype(np.uint8)
+
+
+@register_effect(
+    "flicker",
+    params=(
+        EffectParam("color", "color", (255, 255, 255)),
+        EffectParam("intensity", "range", (0.2, 1.0), minimum=0.0),
+    ),
+    deterministic=False,
+)
+def _flicker_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Random brightness flicker of a single colour."""
+    low, high = params["intensity"]
+    scale = random.uniform(low, high)
+    out[...] = np.clip(np.asarray(params["color"]) * scale, 0, 255).astype(np.uint8)
+
+
+@register_effect(
+    "plasma",
+    params=(
+        EffectParam("speed", "float", 0.1, minimum=0.0),
+        EffectParam("scale", "float", 0.2, minimum=0.0, description="Spatial frequency"),
+    ),
+    dims=2,
+)
+def _plasma_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Classic sum-of-sines plasma over a 2D canvas."""
+    h, w = out.shape[:2]
+    t = step * params["speed"]
+    k = params["scale"]
+    y, x = np.ogrid[0:h, 0:w]
+    v = (
+        np.sin(x * k + t)
+        + np.sin(y * k * 0.5 + t * 1.3)
+        + np.sin((x + y) * k * 0.7 - t)
+        + np.sin(np.hypot(x - w / 2, y - h / 2) * k + t * 0.7)
+    )
+    phase = v[..., None] * (math.pi / 2) + np.array([0.0, 2.0, 4.0]) * (math.pi / 3)
+    out[...] = ((np.sin(phase) + 1) * 127.5).astype(np.uint8)
+
+
+# 3x5 pixel font, one octal digit per row with the leftmost column as bit 4.
+_FONT = {
+    "A": "25755", "B": "65656", "C": "34443", "D": "65556", "E": "74647",
+    "F": "74644", "G": "34553", "H": "55755", "I": "72227", "J": "11152",
+    "K": "55655", "L": "44447", "M": "57755", "N": "65555", "O": "25552",
+    "P": "65644", "Q": "25563", "R": "65655", "S": "34216", "T": "72222",
+    "U": "55557", "V": "55552", "W": "55775", "X": "55255", "Y": "55222",
+    "Z": "71247", "0": "75557", "1": "26227", "2": "61247", "3": "61216",
+    "4": "55711", "5": "74616", "6": "34757", "7": "71222", "8": "75757",
+    "9": "75716", " ": "00000", "!": "22202", "-": "00700", ".": "00002",
+    ":": "02020",
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _text_bitmap(text: str) -> np.ndarray:
+    """Return a ``(5, columns)`` boolean bitmap of ``text`` in the 3x5 font."""
+    columns: List[List[bool]] = []
+    for char in text.upper():
+        rows = [int(d, 8) for d in _FONT.get(char, _FONT[" "])]
+        for bit in (4, 2, 1):
+            columns.append([bool(r & bit) for r in rows])
+        columns.append([False] * 5)
+    bitmap = np.array(columns, dtype=bool).T if columns else np.zeros((5, 0), dtype=bool)
+    bitmap.flags.writeable = False
+    return bitmap
+
+
+@register_effect(
+    "text",
+    params=(
+        EffectParam("text", "str", "PICCOLO"),
+        EffectParam("color", "color", (255, 255, 255)),
+    ),
+    dims=2,
+)
+def _text_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Text scrolling right to left one column per step."""
+    h, w = out.shape[:2]
+    bitmap = _text_bitmap(params["text"])
+    total = bitmap.shape[1] + w
+    cols = (np.arange(w) + step) % total - w
+    visible = cols >= 0
+    top = max(0, (h - 5) // 2)
+    rows = min(5, h)
+    mask = np.zeros((rows, w), dtype=bool)
+    mask[:, visible] = bitmap[:rows, cols[visible]]
+    out[top : top + rows][mask] = params["color"]
+
+
+# Palette effects compute one index per pixel and colour the frame with a
+# single gather from the palette's lookup table.
+
+
+@register_effect(
+    "gradient",
+    params=(
+        EffectParam("palette", "palette", "rainbow"),
+        EffectParam(
+            "wavelength", "int", 60, minimum=1, description="Pixels per pass through the palette"
+        ),
+        EffectParam("speed", "int", 1, description="Pixels moved per step"),
+    ),
+    period=lambda p: p["wavelength"],
+)
+def _gradient_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Palette gradient scrolling along the strip."""
+    wavelength = params["wavelength"]
+    pos = (np.arange(out.shape[0]) + step * params["speed"]) % wavelength
+    np.take(palette_lut(params["palette"]), pos * LUT_SIZE // wavelength, axis=0, out=out)
+
+
+# lattice values of the noise effect, fixed so frames are reproducible
+_NOISE_TABLE = np.random.default_rng(0x5EED).integers(0, 256, 256)
+
+
+def _value_noise(x: np.ndarray, t: float) -> np.ndarray:
+    """Smooth value noise in ``[0, 255]`` sampled at positions ``x`` and time ``t``."""
+    xi = np.floor(x).astype(np.int64)
+    ti = math.floor(t)
+    u = x - xi
+    u = u * u * (3 - 2 * u)
+    v = t - ti
+    v = v * v * (3 - 2 * v)
+    rows = _NOISE_TABLE[xi & 255], _NOISE_TABLE[(xi + 1) & 255]
+    now = [_NOISE_TABLE[(r + ti) & 255] for r in rows]
+    later = [_NOISE_TABLE[(r + ti + 1) & 255] for r in rows]
+    a = now[0] + (now[1] - now[0]) * u
+    b = later[0] + (later[1] - later[0]) * u
+    return a + (b - a) * v
+
+
+@register_effect(
+    "noise",
+    params=(
+        EffectParam("palette", "palette", "ocean"),
+        EffectParam("scale", "float", 0.1, minimum=0.0, description="Noise cells per pixel"),
+        EffectParam("speed", "float", 0.05, minimum=0.0, description="Noise cells per step"),
+    ),
+)
+def _noise_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Slowly drifting value noise coloured through the palette."""
+    noise = _value_noise(np.arange(out.shape[0]) * params["scale"], step * params["speed"])
+    np.take(palette_lut(params["palette"]), noise.astype(np.uint8), axis=0, out=out)
+
+
+_fire_rng = np.random.default_rng()
+
+
+@register_effect(
+    "fire",
+    params=(
+        EffectParam("palette", "palette", "fire"),
+        EffectParam("cooling", "int", 55, minimum=0, maximum=255, description="Heat lost per step"),
+        EffectParam(
+            "sparking", "float", 0.5, minimum=0.0, maximum=1.0,
+            description="Chance of a new spark per step",
+        ),
+    ),
+    deterministic=False,
+    init_state=lambda n: np.zeros(n, dtype=np.int16),
+)
+def _fire_kernel(out: np.ndarray, step: int, params: Dict[str, Any], state: Any) -> None:
+    """Flames rising from pixel 0, simulated as heat mapped through the palette."""
+    heat = state
+    n = heat.shape[0]
+    if n == 0:
+        return
+    heat -= _fire_rng.integers(0, params["cooling"] * 10 // n + 3, n, dtype=np.int16)
+    np.maximum(heat, 0, out=heat)
+    # heat drifts up, each pixel averaging the two below it
+    heat[2:] = (heat[1:-1] + 2 * heat[:-2]) // 3
+    if _fire_rng.random() < params["sparking"]:
+        y = _fire_rng.integers(0, min(7, n))
+        heat[y] = min(255, heat[y] + _fire_rng.integers(160, 256))
+    np.take(palette_lut(params["palette"]), heat, axis=0, out=out)
+
+
 class EffectEngine:
     """Generate pixel frames for various lighting effects."""
 
-    def __init__(self, pixel_count: int) -> None:
+    cache_size = 256
+
+    def __init__(
+        self,
+        pixel_count: int,
+        effects: EffectRegistry | None = None,
+        layout: MatrixLayout | None = None,
+    ) -> None:
+        if layout is not None and layout.pixel_count > pixel_count:
+            raise ValueError("Layout covers more pixels than the device has")
         self.pixel_count = pixel_count
+        self.effects = effects or registry
+        self.layout = layout
+        self._state: Dict[str, Any] = {}
+        self._cache: Dict[Tuple[Any, ...], np.ndarray] = {}
+
+    def render(
+        self, effect: str, step: int, params: Mapping[str, Any] | None = None
+    ) -> np.ndarray:
+        """Render one frame of a registered effect as a ``(pixels, 3)`` array.
+
+        2D effects are drawn on the layout canvas and gathered into wire
+        order.  Raises ``KeyError`` for unknown effects and ``ValueError`` for
+        invalid parameters or 2D effects without a layout.  Frames of
+        deterministic periodic effects are cached by phase and returned
+        read-only.
+        """
+        spec = self.effects.get(effect)
+        values = spec.resolve(params)
+        if spec.dims == 2 and self.layout is None:
+            raise ValueError(f"Effect {effect} requires a 2D layout")
+        key = None
+        if spec.cacheable(values):
+            key = (effect, step % spec.period_for(values), tuple(sorted(values.items())))
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+        frame = np.zeros((self.pixel_count, 3), dtype=np.uint8)
+        state = None
+        if spec.init_state is not None:
+            if effect not in self._state:
+                size = self.layout.shape if spec.dims == 2 else self.pixel_count
+                self._state[effect] = spec.init_state(size)
+            state = self._state[effect]
+        with tracer.span("render", effect=effect, pixels=self.pixel_count):
+            if spec.dims == 2:
+                canvas = np.zeros(self.layout.shape + (3,), dtype=np.uint8)
+                spec.kernel(canvas, step, values, state)
+                index = self.layout.index_map
+                np.take(canvas.reshape(-1, 3), index, axis=0, out=frame[: index.shape[0]])
+            else:
+                spec.kernel(frame, step, values, state)
+        if key is not None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            frame.flags.writeable = False
+            self._cache[key] = frame
+        return frame
 
     def _repeat(self, color: Color) -> List[Color]:
         return [Color(color.r, color.g, color.b) for _ in range(self.pixel_count)]
@@ -66,9 +584,12 @@ class EffectEngine:
         return frame
 
     @staticmethod
-    def to_bytes(frame: List[Color]) -> bytes:
+    def to_bytes(frame: List[Color] | np.ndarray) -> bytes:
         """Convert a frame to DMX byte payload."""
-        payload = bytearray()
-        for c in frame:
-            payload.extend(c.as_bytes())
-        return bytes(payload)
+        with tracer.span("encode", pixels=len(frame)):
+            if isinstance(frame, np.ndarray):
+                return frame.astype(np.uint8, copy=False).tobytes()
+            payload = bytearray()
+            for c in frame:
+                payload.extend(c.as_bytes())
+            return bytes(payload)
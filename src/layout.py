@@ -0,0 +1,99 @@
+"""2D pixel layouts for LED matrices and panels."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class MatrixLayout:
+    """Mapping between a ``width`` x ``height`` canvas and wire order.
+
+    Without ``coords`` the panel is wired row by row in its native
+    orientation, reversing direction on every other row when ``serpentine``
+    is set, and then rotated clockwise by ``rotation`` degrees onto the
+    canvas.  ``coords`` instead lists the ``(x, y)`` canvas position of each
+    wired pixel explicitly.
+    """
+
+    width: int
+    height: int
+    serpentine: bool = False
+    rotation: int = 0
+    coords: List[Tuple[int, int]] | None = None
+
+    def __post_init__(self) -> None:
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError("Layout dimensions must be positive")
+        if self.rotation not in (0, 90, 180, 270):
+            raise ValueError("Rotation must be 0, 90, 180 or 270")
+        if self.coords is not None:
+            self.coords = [(int(x), int(y)) for x, y in self.coords]
+            for x, y in self.coords:
+                if not (0 <= x < self.width and 0 <= y < self.height):
+                    raise ValueError(f"Layout coordinate {(x, y)} outside the canvas")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Canvas shape as ``(height, width)``."""
+        return self.height, self.width
+
+    @property
+    def pixel_count(self) -> int:
+        """Number of wired pixels covered by the layout."""
+        if self.coords is not None:
+            return len(self.coords)
+        return self.width * self.height
+
+    @cached_property
+    def index_map(self) -> np.ndarray:
+        """Flat canvas index of every wired pixel, computed once.
+
+        ``canvas.reshape(-1, 3)[layout.index_map]`` reorders a rendered
+        ``(height, width, 3)`` canvas into wire order in a single gather.
+        """
+        w, h = self.width, self.height
+        if self.coords is not None:
+            xy = np.asarray(self.coords, dtype=np.intp).reshape(-1, 2)
+            x, y = xy[:, 0], xy[:, 1]
+        else:
+            native_w = h if self.rotation in (90, 270) else w
+            k = np.arange(w * h, dtype=np.intp)
+            ny, nx = np.divmod(k, native_w)
+            if self.serpentine:
+                nx = np.where(ny % 2 == 1, native_w - 1 - nx, nx)
+            if self.rotation == 0:
+                x, y = nx, ny
+            elif self.rotation == 90:
+                x, y = w - 1 - ny, nx
+            elif self.rotation == 180:
+                x, y = w - 1 - nx, h - 1 - ny
+            else:
+                x, y = ny, h - 1 - nx
+        index = y * w + x
+        index.flags.writeable = False
+        return index
+
+    def to_wire(self, canvas: np.ndarray) -> np.ndarray:
+        """Return a ``(pixel_count, 3)`` wire-order frame from a canvas."""
+        return canvas.reshape(-1, canvas.shape[-1])[self.index_map]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MatrixLayout":
+        coords = data.get("coords")
+        if coords is not None and "width" not in data:
+            width = max(int(x) for x, _ in coords) + 1
+            height = max(int(y) for _, y in coords) + 1
+        else:
+            width, height = data["width"], data["height"]
+        return cls(
+            width=int(width),
+            height=int(height),
+            serpentine=bool(data.get("serpentine", False)),
+            rotation=int(data.get("rotation", 0)),
+            coords=coords,
+        )
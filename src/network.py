@@ -1,8 +1,10 @@
-"""Network communication utilities for Art-Net devices."""
+"""Network communication utilities for Art-Net, DDP and sACN devices."""
 from __future__ import annotations
 
 import socket
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Type
 
 
 @dataclass
@@ -12,18 +14,57 @@ class ArtNetClient:
     target_ip: str
     port: int = 6454  # standard Art-Net port
 
+    _sock: socket.socket | None = field(default=None, init=False, repr=False, compare=False)
+    _sequences: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    #: RGB bytes per universe when a frame spans several universes (170 pixels)
+    universe_bytes = 510
+
     def send_dmx(self, universe: int, data: bytes) -> None:
         """Send a DMX payload to the configured Art-Net device."""
 
-        payload = self._build_packet(universe, data)
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-            sock.sendto(payload, (self.target_ip, self.port))
+        if len(data) > 512:
+            raise ValueError("DMX payloads may not exceed 512 bytes")
+        # sequence numbers run 1-255 per universe; 0 would disable reordering checks
+        sequence = self._sequences.get(universe, 0) % 255 + 1
+        self._sequences[universe] = sequence
+        header = self._build_header(universe, len(data), sequence)
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # scatter-gather send so the payload is never copied into the packet
+        self._sock.sendmsg([header, data], [], 0, (self.target_ip, self.port))
+
+    def close(self) -> None:
+        """Close the socket reused between sends."""
 
-    def _build_packet(self, universe: int, data: bytes) -> bytes:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def send_frame(self, universe: int, data: bytes) -> None:
+        """Send pixel data, spilling into consecutive universes if needed.
+
+        Payloads that fit a single DMX universe are sent unchanged; longer
+        frames are split into 170-pixel universes starting at ``universe``.
+        """
+
+        if len(data) <= 512:
+            self.send_dmx(universe, data)
+            return
+        view = memoryview(data)
+        step = self.universe_bytes
+        for offset in range(0, len(data), step):
+            self.send_dmx(universe + offset // step, view[offset : offset + step])
+
+    def _build_packet(self, universe: int, data: bytes, sequence: int = 0) -> bytes:
         """Return a full Art-Net DMX packet for the given universe."""
 
         if len(data) > 512:
             raise ValueError("DMX payloads may not exceed 512 bytes")
+        return self._build_header(universe, len(data), sequence) + bytes(data)
+
+    def _build_header(self, universe: int, length: int, sequence: int = 0) -> bytes:
+        """Return the 18 byte ArtDMX header preceding ``length`` data bytes."""
 
         # ID and OpCode for ArtDMX
         packet = bytearray(b"Art-Net\x00")
@@ -33,13 +74,207 @@ class ArtNetClient:
         packet.extend((0x00, 0x0E))
 
         # Sequence and physical
-        packet.extend((0x00, 0x00))
+        packet.extend((sequence, 0x00))
 
         # Universe (little endian)
         packet.extend(universe.to_bytes(2, "little"))
 
         # Length of DMX data (big endian)
-        packet.extend(len(data).to_bytes(2, "big"))
+        packet.extend(length.to_bytes(2, "big"))
+        return bytes(packet)
+
+
+@dataclass
+class DDPClient:
+    """Distributed Display Protocol client using UDP.
+
+    DDP addresses pixel data by byte offset rather than by universe and
+    carries up to 480 RGB pixels per packet.  The last packet of every frame
+    sets the push flag so receivers latch the whole frame at once.  For
+    compatibility with universe-based callers, universe ``n`` starts at byte
+    offset ``n * 510`` (pixel ``n * 170``).
+    """
+
+    target_ip: str
+    port: int = 4048  # standard DDP port
+
+    _sock: socket.socket | None = field(default=None, init=False, repr=False, compare=False)
+    _sequence: int = field(default=0, init=False, repr=False, compare=False)
+
+    #: maximum payload bytes per packet (480 RGB pixels)
+    max_data = 1440
+
+    FLAG_VERSION1 = 0x40
+    FLAG_PUSH = 0x01
+    TYPE_RGB8 = 0x0B
+    DEST_DEFAULT = 0x01
+
+    def send_frame(self, universe: int, data: bytes, offset: int = 0) -> None:
+        """Send pixel data starting ``offset`` bytes into ``universe``."""
+
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sequence = self._sequence % 15 + 1
+        start = universe * ArtNetClient.universe_bytes + offset
+        view = memoryview(data)
+        addr = (self.target_ip, self.port)
+        total = len(data)
+        for pos in range(0, max(total, 1), self.max_data):
+            chunk = view[pos : pos + self.max_data]
+            push = pos + self.max_data >= total
+            header = self._build_header(start + pos, len(chunk), push)
+            self._sock.sendmsg([header, chunk], [], 0, addr)
+
+    send_dmx = send_frame
+
+    def _build_header(self, offset: int, length: int, push: bool) -> bytes:
+        """Return the 10 byte DDP header for one packet."""
+
+        flags = self.FLAG_VERSION1 | (self.FLAG_PUSH if push else 0)
+        return (
+            bytes((flags, self._sequence, self.TYPE_RGB8, self.DEST_DEFAULT))
+            + offset.to_bytes(4, "big")
+            + length.to_bytes(2, "big")
+        )
+
+    def _build_packet(self, offset: int, data: bytes, push: bool = True) -> bytes:
+        """Return a full DDP packet carrying ``data`` at ``offset``."""
+
+        if len(data) > self.max_data:
+            raise ValueError(f"DDP payloads may not exceed {self.max_data} bytes")
+        return self._build_header(offset, len(data), push) + bytes(data)
+
+    def close(self) -> None:
+        """Close the socket reused between sends."""
+
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
 
-        packet.extend(data)
+@dataclass
+class E131Client:
+    """Streaming ACN (E1.31) client.
+
+    By default every universe is sent once to its multicast group
+    ``239.255.<hi>.<lo>`` and any number of receivers may join it, so
+    ``target_ip`` only identifies the client; set ``multicast`` to ``False``
+    to unicast to ``target_ip`` instead.  Piccolo universe ``n`` maps to sACN
+    universe ``n + 1`` since sACN universes start at 1.  Each universe keeps
+    its own sequence number.
+    """
+
+    target_ip: str = ""
+    port: int = 5568  # standard sACN port
+    multicast: bool = True
+    priority: int = 100
+    source_name: str = "piccolo"
+    ttl: int = 1
+
+    cid: bytes = field(default_factory=lambda: uuid.uuid4().bytes, repr=False)
+    _sock: socket.socket | None = field(default=None, init=False, repr=False, compare=False)
+    _sequences: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    #: RGB bytes per universe when a frame spans several universes (170 pixels)
+    universe_bytes = 510
+
+    @staticmethod
+    def multicast_group(universe: int) -> str:
+        """Return the multicast address carrying sACN ``universe``."""
+
+        return f"239.255.{(universe >> 8) & 0xFF}.{universe & 0xFF}"
+
+    def send_dmx(self, universe: int, data: bytes) -> None:
+        """Send one universe of DMX data."""
+
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        sacn_universe = universe + 1
+        header = self._build_header(sacn_universe, len(data))
+        target = self.multicast_group(sacn_universe) if self.multicast else self.target_ip
+        self._sock.sendmsg([header, data], [], 0, (target, self.port))
+
+    def send_frame(self, universe: int, data: bytes) -> None:
+        """Send pixel data, spilling into consecutive universes if needed."""
+
+        if len(data) <= 512:
+            self.send_dmx(universe, data)
+            return
+        view = memoryview(data)
+        step = self.universe_bytes
+        for offset in range(0, len(data), step):
+            self.send_dmx(universe + offset // step, view[offset : offset + step])
+
+    def _build_header(self, universe: int, length: int) -> bytes:
+        """Return the root, framing and DMP layer headers for one packet."""
+
+        if length > 512:
+            raise ValueError("DMX payloads may not exceed 512 bytes")
+        sequence = (self._sequences.get(universe, -1) + 1) & 0xFF
+        self._sequences[universe] = sequence
+        total = 126 + length
+        packet = bytearray(126)
+        packet[0:2] = (0x0010).to_bytes(2, "big")  # preamble size
+        packet[4:16] = b"ASC-E1.17\x00\x00\x00"
+        packet[16:18] = (0x7000 | (total - 16)).to_bytes(2, "big")
+        packet[18:22] = (0x00000004).to_bytes(4, "big")  # VECTOR_ROOT_E131_DATA
+        packet[22:38] = self.cid
+        packet[38:40] = (0x7000 | (total - 38)).to_bytes(2, "big")
+        packet[40:44] = (0x00000002).to_bytes(4, "big")  # VECTOR_E131_DATA_PACKET
+        packet[44:108] = self.source_name.encode()[:63].ljust(64, b"\x00")
+        packet[108] = max(0, min(200, self.priority))
+        packet[111] = sequence
+        packet[113:115] = universe.to_bytes(2, "big")
+        packet[115:117] = (0x7000 | (total - 115)).to_bytes(2, "big")
+        packet[117] = 0x02  # VECTOR_DMP_SET_PROPERTY
+        packet[118] = 0xA1  # address and data type
+        packet[121:123] = (0x0001).to_bytes(2, "big")  # address increment
+        packet[123:125] = (length + 1).to_bytes(2, "big")  # start code + slots
         return bytes(packet)
+
+    def _build_packet(self, universe: int, data: bytes) -> bytes:
+        """Return a full E1.31 data packet for piccolo ``universe``."""
+
+        return self._build_header(universe + 1, len(data)) + bytes(data)
+
+    def close(self) -> None:
+        """Close the socket reused between sends."""
+
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+OutputClient = ArtNetClient | DDPClient | E131Client
+
+PROTOCOLS: Dict[str, Type[OutputClient]] = {
+    "artnet": ArtNetClient,
+    "ddp": DDPClient,
+    "sacn": E131Client,
+}
+
+#: protocols whose packets reach every receiver of a universe in one send
+MULTICAST_PROTOCOLS = {"sacn"}
+
+#: protocols addressing bytes rather than whole universes
+BYTE_ADDRESSED_PROTOCOLS = {"ddp"}
+
+#: protocols carrying a per-source priority (0-200)
+PRIORITY_PROTOCOLS = {"sacn"}
+
+
+def create_client(protocol: str, target_ip: str, priority: int | None = None) -> OutputClient:
+    """Return an output client for ``protocol`` sending to ``target_ip``.
+
+    ``priority`` is applied by protocols in :data:`PRIORITY_PROTOCOLS` and
+    ignored by the others.
+    """
+
+    try:
+        cls = PROTOCOLS[protocol]
+    except KeyError:
+        raise ValueError(f"Unknown protocol {protocol}") from None
+    if priority is not None and protocol in PRIORITY_PROTOCOLS:
+        return cls(target_ip, priority=priority)  # type: ignore[call-arg]
+    return cls(target_ip)
@@ -0,0 +1,521 @@
+"""Single output engine shared by several API worker processes.
+
+With ``python -m piccolo --workers N`` the main process runs an
+:class:`OutputEngine` owning the device state, sockets, render loop,
+recorder, player and favourites, while uvicorn serves HTTP from ``N``
+worker processes.  Workers render frames themselves and hand them over through
+:class:`FrameBuffers`, a shared memory block holding one ring of frame slots
+per worker.  The payloads of one request, e.g. every device of a group, are
+written back to back into a single slot and only a small command tuple
+naming the slot and each device's range travels over the command channel
+(a ``multiprocessing.connection`` Unix socket), so frame bytes are never
+pickled or piped.  The engine acknowledges every batch with the number of
+frames it dropped, so workers wait for their slot to be consumed and
+report drops as errors.
+
+Each slot carries a sequence number that is odd while its worker is writing
+and even once the frame is complete (a seqlock).  The engine copies a slot
+out and checks the sequence number again and drops a slot that was reused.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+
+from .effects import load_effect_modules, registry
+from .palettes import Stops, custom_palettes
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from .devices import LEDDevice, LightGroup
+    from .rest_api import RestAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"PICF"
+HEADER = struct.Struct("<4sIIIQ")  # magic, workers, slots, slot size, state version
+SLOT_DTYPE = np.dtype([("seq", "<u4"), ("length", "<u4")])
+
+ENV_ADDRESS = "PICCOLO_ENGINE_ADDRESS"
+ENV_AUTHKEY = "PICCOLO_ENGINE_AUTHKEY"
+ENV_MODULES = "PICCOLO_EFFECT_MODULES"
+
+#: RestAPI methods workers may run in the engine
+ENGINE_CALLS = frozenset(
+    {
+        "add_device",
+        "add_group",
+        "add_palette",
+        "remove_palette",
+        "list_favorites",
+        "add_favorite",
+        "remove_favorite",
+        "favorite_colors",
+        "register_nodes",
+        "discovery_nodes",
+        "poll_discovery",
+        "start_running",
+        "stop_running",
+        "loop_status",
+        "set_fps",
+        "start_audio",
+        "audio_status",
+        "stop_audio",
+        "start_recording",
+        "stop_recording",
+        "start_playback",
+        "playback_status",
+        "pause_playback",
+        "resume_playback",
+        "seek_playback",
+        "set_playback_speed",
+        "stop_playback",
+        "load_cues",
+        "cue_status",
+        "start_cues",
+        "pause_cues",
+        "seek_cues",
+        "stop_cues",
+        "start_timecode",
+        "stop_timecode",
+        "start_trace",
+        "stop_trace",
+        "trace",
+        "clear_trace",
+        "merge_trace",
+        "play_effect",
+        "trigger",
+    }
+)
+#: calls that wait on the network and take the API lock only where needed
+UNLOCKED_CALLS = frozenset({"poll_discovery"})
+
+#: device, universe, offset, protocol, priority, start and length of one frame
+#: in a batch
+FrameEntry = Tuple[str, int, int, "str | None", "int | None", int, int]
+
+#: calls after which workers must refresh their devices, groups, palettes
+#: and tracing
+STATE_CALLS = frozenset(
+    {
+        "add_device",
+        "add_group",
+        "add_palette",
+        "remove_palette",
+        "register_nodes",
+        "poll_discovery",
+        "start_trace",
+        "stop_trace",
+    }
+)
+
+#: engine version, devices, groups, custom palettes and tracing sample rate
+#: (``None`` while tracing is off)
+EngineState = Tuple[
+    int, Dict[str, "LEDDevice"], Dict[str, "LightGroup"], Dict[str, Stops], "float | None"
+]
+
+
+class FrameBuffers:
+    """Per-worker rings of frame slots in one shared memory block."""
+
+    def __init__(self, shm: SharedMemory, owner: bool = False) -> None:
+        magic, workers, slots, slot_size, _version = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a piccolo frame buffer")
+        self.shm = shm
+        self.owner = owner
+        self.workers = workers
+        self.slots = slots
+        self.slot_size = slot_size
+        self._version = np.ndarray((1,), dtype="<u8", buffer=shm.buf, offset=16)
+        headers = np.ndarray(
+            (workers, slots), dtype=SLOT_DTYPE, buffer=shm.buf, offset=HEADER.size
+        )
+        self._seq = headers["seq"]
+        self._length = headers["length"]
+        self._data = np.ndarray(
+            (workers, slots, slot_size),
+            dtype=np.uint8,
+            buffer=shm.buf,
+            offset=HEADER.size + headers.nbytes,
+        )
+        self._cursor = [0] * workers
+
+    @classmethod
+    def create(
+        cls, workers: int = 8, slots: int = 32, slot_size: int = 1 << 16
+    ) -> "FrameBuffers":
+        size = HEADER.size + workers * slots * (SLOT_DTYPE.itemsize + slot_size)
+        shm = SharedMemory(create=True, size=size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, workers, slots, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameBuffers":
+        # workers started by multiprocessing share the engine's resource
+        # tracker, which already holds the block and unlinks it only once
+        return cls(SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever devices or groups change."""
+        return int(self._version[0])
+
+    def bump(self) -> None:
+        self._version[0] += 1
+
+    def write(self, worker: int, *payloads: bytes | memoryview) -> Tuple[int, int] | None:
+        """Copy ``payloads`` back to back into the worker's next slot.
+
+        Returns ``(slot, seq)`` identifying the frame, or ``None`` if the
+        payloads do not fit a slot.
+        """
+        size = sum(len(payload) for payload in payloads)
+        if size > self.slot_size:
+            return None
+        slot = self._cursor[worker]
+        self._cursor[worker] = (slot + 1) % self.slots
+        seq = (int(self._seq[worker, slot]) + 1) & 0xFFFFFFFF
+        if seq & 1 == 0:  # a writer died mid-frame, skip to odd
+            seq += 1
+        self._seq[worker, slot] = seq
+        pos = 0
+        for payload in payloads:
+            end = pos + len(payload)
+            self._data[worker, slot, pos:end] = np.frombuffer(payload, dtype=np.uint8)
+            pos = end
+        self._length[worker, slot] = size
+        seq = (seq + 1) & 0xFFFFFFFF
+        self._seq[worker, slot] = seq
+        return slot, seq
+
+    def read(self, worker: int, slot: int, seq: int) -> bytes | None:
+        """Return a copy of the frame or ``None`` if the slot was reused."""
+        if self._seq[worker, slot] != seq:
+            return None
+        payload = self._data[worker, slot, : self._length[worker, slot]].tobytes()
+        if self._seq[worker, slot] != seq:
+            return None
+        return payload
+
+    def close(self) -> None:
+        # views into the block must go before it can be closed
+        del self._version, self._seq, self._length, self._data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class OutputEngine:
+    """Serve frames and output commands from API workers.
+
+    ``api`` is a :class:`RestAPI` without an engine of its own; it owns the
+    devices, sockets, render loop, recorder and player, and workers run the
+    methods listed in :data:`ENGINE_CALLS` on it remotely.  Connections are
+    served on one thread each, so calls and frames run under ``api.lock``,
+    which the render loop holds while it renders.
+    """
+
+    def __init__(
+        self, api: "RestAPI", buffers: FrameBuffers, address: str, authkey: bytes
+    ) -> None:
+        self.api = api
+        self.buffers = buffers
+        self.address = address
+        self.authkey = authkey
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._free = list(range(buffers.workers))
+        self._lock = threading.Lock()
+        self._listener: Listener | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self._thread = threading.Thread(target=self._serve, name="output-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.close()
+        self._listener = None
+        self._thread = None
+
+    def _serve(self) -> None:
+        listener = self._listener
+        while listener is not None:
+            try:
+                conn = listener.accept()
+            except OSError:
+                return
+            except Exception:  # failed handshake, keep accepting
+                _LOGGER.warning("Rejected output engine connection", exc_info=True)
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: Connection) -> None:
+        worker = None
+        try:
+            _hello, wants_ring = conn.recv()
+            if wants_ring:
+                with self._lock:
+                    worker = self._free.pop(0) if self._free else None
+            conn.send((worker, self.buffers.name))
+            while True:
+                msg = conn.recv()
+                kind = msg[0]
+                if kind == "frames":
+                    _, entries, data = msg
+                    if isinstance(data, tuple):  # (slot, seq) in the worker's ring
+                        data = self.buffers.read(worker, *data) if worker is not None else None
+                    with self.api.lock:
+                        dropped = self._frames(entries, data)
+                    conn.send(dropped)
+                elif kind == "call":
+                    conn.send(self._call(msg[1], msg[2]))
+                elif kind == "state":
+                    conn.send(self.state())
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            if worker is not None:
+                with self._lock:
+                    self._free.append(worker)
+
+    def _frames(self, entries: List[FrameEntry], data: bytes | None) -> int:
+        """Send a batch of frames sliced from ``data``; return how many were dropped."""
+        view = memoryview(data) if data is not None else None
+        dropped = 0
+        for name, universe, offset, protocol, priority, start, length in entries:
+            payload = view[start : start + length] if view is not None else None
+            if not self._frame(name, universe, offset, protocol, priority, payload):
+                dropped += 1
+        return dropped
+
+    def _frame(
+        self,
+        name: str,
+        universe: int,
+        offset: int,
+        protocol: str | None,
+        priority: int | None,
+        payload: memoryview | None,
+    ) -> bool:
+        device = self.api.devices.get(name)
+        if payload is None or device is None:
+            self.frames_dropped += 1
+            return False
+        try:
+            self.api._send(device, universe, payload, protocol, offset, priority)
+        except OSError:
+            _LOGGER.warning("Sending to %s failed", name, exc_info=True)
+            self.frames_dropped += 1
+            return False
+        self.frames_sent += 1
+        return True
+
+    def _call(self, method: str, args: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        if method not in ENGINE_CALLS:
+            return ("error", 400, f"Unknown engine call {method}")
+        try:
+            if method in UNLOCKED_CALLS:
+                result = getattr(self.api, method)(*args)
+            else:
+                with self.api.lock:
+                    result = getattr(self.api, method)(*args)
+        except HTTPException as exc:
+            return ("error", exc.status_code, exc.detail)
+        except Exception as exc:
+            _LOGGER.exception("Engine call %s failed", method)
+            return ("error", 500, str(exc))
+        if method in STATE_CALLS:
+            self.buffers.bump()
+        return ("ok", result)
+
+    def state(self) -> EngineState:
+        # read the version first so a concurrent change triggers a refetch
+        version = self.buffers.version
+        sample_rate = tracer.sample_rate if tracer.enabled else None
+        with self.api.lock:
+            return (
+                version,
+                dict(self.api.devices),
+                dict(self.api.groups),
+                custom_palettes(),
+                sample_rate,
+            )
+
+
+class EngineClient:
+    """An API worker's connection to the :class:`OutputEngine`.
+
+    Frames go over one connection and calls and state requests over a
+    second one, so a slow call never delays frames.  Each batch of frames
+    waits for the engine's acknowledgement, which keeps a worker from
+    overrunning its ring and lets dropped frames be reported.
+    Connections are opened on first use, after uvicorn has started the
+    worker process.
+    """
+
+    def __init__(self, address: str, authkey: bytes) -> None:
+        self.address = address
+        self.authkey = authkey
+        self.worker: int | None = None
+        self.buffers: FrameBuffers | None = None
+        self._frames: Connection | None = None
+        self._calls: Connection | None = None
+        self._frame_lock = threading.Lock()
+        self._call_lock = threading.Lock()
+
+    def _connect(self, wants_ring: bool) -> Tuple[Connection, int | None, str]:
+        conn = Client(self.address, authkey=self.authkey)
+        conn.send(("hello", wants_ring))
+        worker, name = conn.recv()
+        return conn, worker, name
+
+    def _frame_conn(self) -> Connection:
+        if self._frames is None:
+            conn, self.worker, name = self._connect(True)
+            if self.buffers is None:
+                self.buffers = FrameBuffers.attach(name)
+            self._frames = conn
+        return self._frames
+
+    def _call_conn(self) -> Connection:
+        if self._calls is None:
+            conn, _, name = self._connect(False)
+            if self.buffers is None:
+                self.buffers = FrameBuffers.attach(name)
+            self._calls = conn
+        return self._calls
+
+    def send(
+        self,
+        device: str,
+        universe: int,
+        payload: bytes | memoryview,
+        protocol: str | None = None,
+        offset: int = 0,
+        priority: int | None = None,
+    ) -> None:
+        """Have the output engine send ``payload`` to ``device``."""
+        self.send_many([(device, universe, payload, protocol, offset, priority)])
+
+    def send_many(
+        self,
+        frames: Sequence[Tuple[str, int, bytes | memoryview, str | None, int, int | None]],
+    ) -> None:
+        """Send ``(device, universe, payload, protocol, offset, priority)`` frames as one batch.
+
+        All payloads share one ring slot.  Raises ``HTTPException`` (503) if
+        the engine dropped any of them.
+        """
+        entries: List[FrameEntry] = []
+        start = 0
+        for device, universe, payload, protocol, offset, priority in frames:
+            entries.append((device, universe, offset, protocol, priority, start, len(payload)))
+            start += len(payload)
+        payloads = [frame[2] for frame in frames]
+        with self._frame_lock:
+            conn = self._frame_conn()
+            ref = None
+            if self.worker is not None and self.buffers is not None:
+                ref = self.buffers.write(self.worker, *payloads)
+            if ref is None:  # no ring for this worker or oversized batch
+                conn.send(("frames", entries, b"".join(payloads)))
+            else:
+                conn.send(("frames", entries, ref))
+            dropped = conn.recv()
+        if dropped:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Output engine dropped {dropped} of {len(entries)} frames",
+            )
+
+    def _request(self, msg: Tuple[Any, ...]) -> Any:
+        with self._call_lock:
+            conn = self._call_conn()
+            conn.send(msg)
+            return conn.recv()
+
+    def call(self, method: str, *args: Any) -> Any:
+        """Run a RestAPI method in the engine, re-raising its HTTP errors."""
+        reply = self._request(("call", method, args))
+        if reply[0] == "error":
+            raise HTTPException(status_code=reply[1], detail=reply[2])
+        return reply[1]
+
+    def state(self) -> EngineState:
+        return self._request(("state",))
+
+    @property
+    def version(self) -> int:
+        if self.buffers is None:
+            with self._call_lock:
+                self._call_conn()
+        return self.buffers.version  # type: ignore[union-attr]
+
+    def close(self) -> None:
+        for conn in (self._frames, self._calls):
+            if conn is not None:
+                conn.close()
+        self._frames = self._calls = None
+        if self.buffers is not None:
+            self.buffers.close()
+            self.buffers = None
+
+
+def create_worker_app() -> FastAPI:
+    """uvicorn factory building a worker app from the environment."""
+    from .rest_api import RestAPI
+
+    modules = os.environ.get(ENV_MODULES, "")
+    load_effect_modules(m for m in modules.split(",") if m)
+    engine = EngineClient(os.environ[ENV_ADDRESS], bytes.fromhex(os.environ[ENV_AUTHKEY]))
+    return RestAPI(engine=engine).app
+
+
+def serve_workers(api: "RestAPI", host: str, port: int, workers: int) -> None:
+    """Run ``api`` as the output engine behind ``workers`` uvicorn workers."""
+    import uvicorn
+
+    buffers = FrameBuffers.create(workers)
+    tmpdir = tempfile.mkdtemp(prefix="piccolo-")
+    authkey = os.urandom(16)
+    engine = OutputEngine(api, buffers, os.path.join(tmpdir, "engine.sock"), authkey)
+    engine.start()
+    os.environ[ENV_ADDRESS] = engine.address
+    os.environ[ENV_AUTHKEY] = authkey.hex()
+    os.environ[ENV_MODULES] = ",".join(registry.modules)
+    try:
+        uvicorn.run(
+            "src.output_engine:create_worker_app",
+            factory=True,
+            host=host,
+            port=port,
+            workers=workers,
+        )
+    finally:
+        engine.stop()
+        buffers.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,131 @@
+"""Colour palettes precomputed into lookup tables.
+
+A palette is a tuple of gradient stops ``(position, (r, g, b))`` with
+positions between 0 and 1.  :func:`palette_lut` interpolates the stops once
+into a ``(size, 3)`` uint8 table, so palette-mapped effects only compute a
+scalar index per pixel and colour the whole frame with a single gather.
+Palettes are referred to by name through a small module level registry
+that starts with a few built-in gradients.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+RGB = Tuple[int, int, int]
+Stops = Tuple[Tuple[float, RGB], ...]
+
+LUT_SIZE = 256
+
+BUILTIN_PALETTES: Dict[str, Stops] = {
+    "rainbow": (
+        (0.0, (255, 0, 0)),
+        (1 / 6, (255, 255, 0)),
+        (2 / 6, (0, 255, 0)),
+        (3 / 6, (0, 255, 255)),
+        (4 / 6, (0, 0, 255)),
+        (5 / 6, (255, 0, 255)),
+        (1.0, (255, 0, 0)),
+    ),
+    "fire": (
+        (0.0, (0, 0, 0)),
+        (0.35, (160, 0, 0)),
+        (0.6, (255, 90, 0)),
+        (0.85, (255, 200, 20)),
+        (1.0, (255, 255, 200)),
+    ),
+    "ocean": (
+        (0.0, (0, 0, 40)),
+        (0.4, (0, 60, 160)),
+        (0.7, (0, 160, 200)),
+        (1.0, (180, 255, 255)),
+    ),
+    "forest": (
+        (0.0, (0, 30, 0)),
+        (0.5, (30, 120, 20)),
+        (1.0, (170, 220, 60)),
+    ),
+    "lava": (
+        (0.0, (0, 0, 0)),
+        (0.3, (120, 0, 0)),
+        (0.6, (255, 30, 0)),
+        (0.8, (255, 120, 0)),
+        (1.0, (255, 255, 255)),
+    ),
+}
+
+_palettes: Dict[str, Stops] = dict(BUILTIN_PALETTES)
+
+
+def make_stops(stops: Iterable[Tuple[float, RGB]]) -> Stops:
+    """Validate stops and return them sorted in canonical form.
+
+    Stops sharing a position keep their input order, so they form a hard
+    edge between the two colours.
+    """
+    result = tuple(
+        sorted(((float(pos), tuple(color)) for pos, color in stops), key=lambda s: s[0])
+    )
+    if not result:
+        raise ValueError("A palette needs at least one colour")
+    if result[0][0] < 0.0 or result[-1][0] > 1.0:
+        raise ValueError("Palette stop positions must be between 0 and 1")
+    return result  # type: ignore[return-value]
+
+
+def even_stops(colors: Iterable[RGB]) -> Stops:
+    """Return stops spacing ``colors`` evenly across the palette."""
+    colors = list(colors)
+    last = max(1, len(colors) - 1)
+    return make_stops((i / last, color) for i, color in enumerate(colors))
+
+
+def get_palette(name: str) -> Stops:
+    try:
+        return _palettes[name]
+    except KeyError:
+        raise ValueError(f"Unknown palette {name!r}") from None
+
+
+def register_palette(name: str, stops: Stops) -> None:
+    if name in BUILTIN_PALETTES:
+        raise ValueError(f"Palette {name} is built in")
+    _palettes[name] = stops
+
+
+def remove_palette(name: str) -> None:
+    if name in BUILTIN_PALETTES:
+        raise ValueError(f"Palette {name} is built in")
+    if _palettes.pop(name, None) is None:
+        raise KeyError(name)
+
+
+def palettes() -> Dict[str, Stops]:
+    return dict(_palettes)
+
+
+def custom_palettes() -> Dict[str, Stops]:
+    return {name: stops for name, stops in _palettes.items() if name not in BUILTIN_PALETTES}
+
+
+def set_custom_palettes(custom: Dict[str, Stops]) -> None:
+    """Replace all non built-in palettes, e.g. with another process's."""
+    _palettes.clear()
+    _palettes.update(BUILTIN_PALETTES)
+    _palettes.update(custom)
+
+
+@functools.lru_cache(maxsize=64)
+def palette_lut(stops: Stops, size: int = LUT_SIZE) -> np.ndarray:
+    """Return the read-only ``(size, 3)`` uint8 colour table for ``stops``."""
+    positions = np.array([pos for pos, _ in stops])
+    colors = np.array([color for _, color in stops], dtype=np.float64)
+    x = np.linspace(0.0, 1.0, size)
+    lut = np.empty((size, 3), dtype=np.uint8)
+    for channel in range(3):
+        lut[:, channel] = np.rint(np.interp(x, positions, colors[:, channel]))
+    lut.flags.writeable = False
+    return lut
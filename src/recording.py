@@ -0,0 +1,289 @@
+"""Recording and playback of device frame streams.
+
+A recording is a single binary file laid out as::
+
+    header | payload bytes ... | index | JSON metadata
+
+The header (``HEADER``) holds the record count and the offsets of the index
+and metadata.  The index is a packed array of ``INDEX_DTYPE`` entries giving
+the timestamp, payload offset and length, device id and start universe of
+every frame; payloads are stored back to back without framing.  Players
+memory-map the file and view the index in place, so opening a recording
+costs the same regardless of its size and sending a frame is a slice of the
+mapping.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from .tracing import tracer
+
+MAGIC = b"PICREC\x00\x01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")  # magic, version, flags, count, index, meta
+INDEX_DTYPE = np.dtype(
+    [
+        ("time", "<u8"),  # nanoseconds since the start of the recording
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("device", "<u2"),
+        ("universe", "<u2"),
+    ]
+)
+
+SendCallback = Callable[[Dict[str, Any], int, memoryview], None]
+
+
+class FrameRecorder:
+    """Append timestamped device frames to a recording file.
+
+    Frames are timestamped from the first call to :meth:`record` unless an
+    explicit ``timestamp`` in seconds is passed, which allows pre-rendering
+    a show offline at a fixed frame rate.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._fh = open(self.path, "wb")
+        self._fh.write(b"\x00" * HEADER.size)
+        self._offset = HEADER.size
+        self._entries: List[Tuple[int, int, int, int, int]] = []
+        self._devices: Dict[str, int] = {}
+        self._device_info: List[Dict[str, Any]] = []
+        self._start: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        device: str,
+        universe: int,
+        payload: bytes,
+        timestamp: float | None = None,
+        ip: str = "",
+        protocol: str = "artnet",
+    ) -> None:
+        """Store ``payload`` as sent to ``device`` starting at ``universe``."""
+        with self._lock:
+            if self._fh.closed:
+                raise ValueError("Recorder is closed")
+            if timestamp is None:
+                now = time.perf_counter_ns()
+                if self._start is None:
+                    self._start = now
+                ts = now - self._start
+            else:
+                ts = int(timestamp * 1e9)
+            device_id = self._devices.get(device)
+            if device_id is None:
+                device_id = self._devices[device] = len(self._device_info)
+                self._device_info.append({"name": device, "ip": ip, "protocol": protocol})
+            self._fh.write(payload)
+            self._entries.append((ts, self._offset, len(payload), device_id, universe))
+            self._offset += len(payload)
+
+    def close(self) -> None:
+        """Write the index and metadata and finalise the header."""
+        with self._lock:
+            if self._fh.closed:
+                return
+            index = np.array(self._entries, dtype=INDEX_DTYPE)
+            # keep the index sorted so players can binary search it
+            index = index[np.argsort(index["time"], kind="stable")]
+            index_offset = self._offset
+            self._fh.write(index.tobytes())
+            meta_offset = index_offset + index.nbytes
+            self._fh.write(json.dumps({"devices": self._device_info}).encode())
+            self._fh.seek(0)
+            self._fh.write(
+                HEADER.pack(MAGIC, VERSION, 0, len(index), index_offset, meta_offset)
+            )
+            self._fh.close()
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class FramePlayer:
+    """Play a recording back through ``send`` at its recorded timing.
+
+    ``send(device, universe, payload)`` receives the recorded device info
+    dict, the absolute start universe and a memoryview into the mapped file.
+    Playback runs on a background thread; :meth:`seek`, :meth:`set_speed`,
+    :meth:`pause` and :meth:`resume` may be called at any time.
+    """
+
+    def __init__(self, path: str | Path, send: SendCallback, loop: bool = False) -> None:
+        self.path = Path(path)
+        self._send = send
+        self._fh = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fh.close()
+            raise ValueError("Recording is empty") from None
+        try:
+            magic, version, _flags, count, index_offset, meta_offset = HEADER.unpack_from(
+                self._mm, 0
+            )
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a piccolo recording")
+        self.index = np.frombuffer(
+            self._mm, dtype=INDEX_DTYPE, count=count, offset=index_offset
+        )
+        self.devices: List[Dict[str, Any]] = json.loads(self._mm[meta_offset:])["devices"]
+        self._times = self.index["time"]
+        self.loop = loop
+        self.speed = 1.0
+        self.frames_sent = 0
+        self._position = 0
+        self._anchor_wall = 0
+        self._anchor_time = 0
+        self._playing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def duration(self) -> float:
+        return float(self._times[-1]) / 1e9 if len(self._times) else 0.0
+
+    @property
+    def playing(self) -> bool:
+        return self._playing
+
+    @property
+    def position(self) -> float:
+        """Current position in seconds from the start of the recording."""
+        with self._cond:
+            if self._playing:
+                elapsed = (time.perf_counter_ns() - self._anchor_wall) * self.speed
+                return min(self.duration, (self._anchor_time + elapsed) / 1e9)
+            return self._anchor_time / 1e9
+
+    def _reanchor(self, rec_time: int) -> None:
+        self._anchor_wall = time.perf_counter_ns()
+        self._anchor_time = rec_time
+
+    def play(self) -> None:
+        self.resume()
+
+    def resume(self) -> None:
+        with self._cond:
+            if not self._playing:
+                self._reanchor(self._anchor_time)
+                self._playing = True
+                self._cond.notify()
+
+    def pause(self) -> None:
+        with self._cond:
+            if self._playing:
+                elapsed = (time.perf_counter_ns() - self._anchor_wall) * self.speed
+                self._anchor_time = int(min(self._anchor_time + elapsed, self.duration * 1e9))
+                self._playing = False
+                self._cond.notify()
+
+    def seek(self, seconds: float) -> None:
+        """Jump to ``seconds`` into the recording."""
+        target = int(max(0.0, min(seconds, self.duration)) * 1e9)
+        with self._cond:
+            self._position = int(np.searchsorted(self._times, target, side="left"))
+            self._reanchor(target)
+            self._cond.notify()
+
+    def set_speed(self, speed: float) -> None:
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+        with self._cond:
+            if self._playing:
+                elapsed = (time.perf_counter_ns() - self._anchor_wall) * self.speed
+                self._reanchor(int(self._anchor_time + elapsed))
+            self.speed = speed
+            self._cond.notify()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "playing": self._playing,
+            "position": self.position,
+            "duration": self.duration,
+            "speed": self.speed,
+            "loop": self.loop,
+            "frames": len(self.index),
+            "frames_sent": self.frames_sent,
+        }
+
+    def _due_batch(self) -> List[Tuple[int, int, int, int, int]] | None:
+        """Wait for the next due frames and return them, ``None`` when closed."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                count = len(self._times)
+                if not self._playing or count == 0:
+                    self._cond.wait()
+                    continue
+                if self._position >= count:
+                    if self.loop:
+                        self._position = 0
+                        self._reanchor(int(self._times[0]))
+                    else:
+                        self._playing = False
+                        self._anchor_time = int(self._times[-1])
+                    continue
+                elapsed = (time.perf_counter_ns() - self._anchor_wall) * self.speed
+                now = self._anchor_time + elapsed
+                due = int(np.searchsorted(self._times, now, side="right"))
+                if due > self._position:
+                    batch = self.index[self._position : due].tolist()
+                    self._position = due
+                    return batch
+                wait = (int(self._times[self._position]) - now) / self.speed / 1e9
+                self._cond.wait(wait)
+
+    def _run(self) -> None:
+        view = memoryview(self._mm)
+        try:
+            while True:
+                batch = self._due_batch()
+                if batch is None:
+                    return
+                with tracer.frame("playback", records=len(batch)):
+                    for _time, offset, length, device, universe in batch:
+                        self._send(self.devices[device], universe, view[offset : offset + length])
+                self.frames_sent += len(batch)
+        finally:
+            view.release()
+
+    def close(self) -> None:
+        """Stop playback and unmap the file."""
+        thread = getattr(self, "_thread", None)
+        if thread is not None:
+            with self._cond:
+                self._closed = True
+                self._cond.notify()
+            if thread is not threading.current_thread():
+                thread.join()
+        self.index = np.empty(0, dtype=INDEX_DTYPE)
+        self._times = self.index["time"]
+        self._mm.close()
+        self._fh.close()
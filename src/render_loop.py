@@ -0,0 +1,98 @@
+"""Fixed frame rate render loop."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Dict
+
+from .tracing import tracer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RenderLoop:
+    """Call ``tick(step)`` at ``fps`` frames per second on a background thread.
+
+    Frames are scheduled against absolute deadlines so timing errors do not
+    accumulate; when a tick overruns its frame period the loop counts it as
+    late and restarts its schedule rather than bursting to catch up.
+    """
+
+    def __init__(self, tick: Callable[[int], None], fps: float = 40.0) -> None:
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        self.tick = tick
+        self.fps = fps
+        self.frames = 0
+        self.late_frames = 0
+        self._tick_total = 0.0
+        self._tick_max = 0.0
+        self._started = 0.0
+        self._run_frames = 0  # frames since the last start, for actual_fps
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.step = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # a fresh event per run so a stopping thread cannot be revived
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._run_frames = 0
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name="render-loop", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+    def _run(self, stop: threading.Event) -> None:
+        period = 1.0 / self.fps
+        deadline = time.perf_counter()
+        while not stop.is_set():
+            start = time.perf_counter()
+            step = self.step
+            try:
+                with tracer.frame("loop", step=step):
+                    self.tick(step)
+            except Exception:  # keep rendering other targets
+                _LOGGER.exception("Render loop tick failed")
+            elapsed = time.perf_counter() - start
+            self.frames += 1
+            self._run_frames += 1
+            self._tick_total += elapsed
+            self._tick_max = max(self._tick_max, elapsed)
+            self.step = step + 1
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay < 0:
+                self.late_frames += 1
+                deadline = time.perf_counter()
+                continue
+            stop.wait(delay)
+
+    def stats(self) -> Dict[str, object]:
+        uptime = time.perf_counter() - self._started if self.running else 0.0
+        return {
+            "running": self.running,
+            "fps": self.fps,
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "actual_fps": self._run_frames / uptime if uptime else 0.0,
+            "tick_ms_mean": 1000 * self._tick_total / self.frames if self.frames else 0.0,
+            "tick_ms_max": 1000 * self._tick_max,
+        }
@@ -2,23 +2,74 @@
 
 from __future__ import annotations
 
-from dataclasses import asdict
+import asyncio
+import logging
+import os
+import struct
+import threading
+import wave
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import Body, FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 
+from .audio import AudioInput, audio_feed, open_source
 from .config import Config, load_config
+from .cues import CueAction, CuePlayer, TimecodeListener, parse_cue_list
 from .devices import LEDDevice, LEDSegment, LightGroup
-from .effects import Color, EffectEngine
+from .discovery import ArtNetDiscovery, ArtNode
+from .effects import Color, EffectEngine, load_effect_modules, parse_palette, registry
 from .favorites import FavoritesManager
-from .network import ArtNetClient
+from .layout import MatrixLayout
+from .network import (
+    BYTE_ADDRESSED_PROTOCOLS,
+    MULTICAST_PROTOCOLS,
+    PRIORITY_PROTOCOLS,
+    PROTOCOLS,
+    ArtNetClient,
+    OutputClient,
+    create_client,
+)
+from .output_engine import EngineClient, serve_workers
+from .palettes import (
+    BUILTIN_PALETTES,
+    Stops,
+    palettes,
+    register_palette,
+    remove_palette as unregister_palette,
+    set_custom_palettes,
+)
+from .recording import FramePlayer, FrameRecorder
+from .render_loop import RenderLoop
+from .tracing import tracer
 
 if TYPE_CHECKING:
     from .mqtt import MQTTClient
 
+_LOGGER = logging.getLogger(__name__)
+
+
+class LayoutModel(BaseModel):
+    """Model describing a 2D matrix layout."""
+
+    width: Optional[int] = None
+    height: Optional[int] = None
+    serpentine: bool = False
+    rotation: int = 0
+    coords: Optional[List[List[int]]] = None
+
+    def to_layout(self) -> MatrixLayout:
+        try:
+            return MatrixLayout.from_dict(self.model_dump(exclude_none=True))
+        except (KeyError, ValueError) as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid layout: {exc}") from None
+
 
 class DeviceModel(BaseModel):
     """Pydantic model for device registration."""
@@ -27,6 +78,9 @@ class DeviceModel(BaseModel):
     ip: str
     pixel_count: int
     universe: int = 0
+    layout: Optional[LayoutModel] = None
+    protocol: str = "artnet"
+    priority: int = Field(100, ge=0, le=200)  # sACN source priority
 
 
 class SegmentModel(BaseModel):
@@ -42,15 +96,40 @@ class GroupModel(BaseModel):
 
     name: str
     segments: List[SegmentModel]
+    layout: Optional[LayoutModel] = None
+    protocol: Optional[str] = None
+    priority: Optional[int] = Field(None, ge=0, le=200)
 
 
 class LightCommand(BaseModel):
     """Model describing a light command payload."""
 
     universe: int = 0
+    offset: int = 0  # bytes from the start of ``universe``
     data: str  # hex encoded bytes
 
 
+BINARY_TYPE = "application/octet-stream"
+#: record header of multi-universe command bodies: universe, length
+MULTI_RECORD = struct.Struct(">HH")
+
+COMMAND_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": LightCommand.model_json_schema()},
+            BINARY_TYPE: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+MULTI_COMMAND_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {BINARY_TYPE: {"schema": {"type": "string", "format": "binary"}}},
+    }
+}
+
+
 class FavoriteModel(BaseModel):
     """Model describing a color favorite."""
 
@@ -60,6 +139,49 @@ class FavoriteModel(BaseModel):
     b: int
 
 
+class PaletteModel(BaseModel):
+    """Model describing a palette from gradient stops, colours or favourites.
+
+    ``stops`` holds either ``[position, colour]`` pairs or plain colours
+    spaced evenly; ``favorites`` names stored colour favourites instead.
+    """
+
+    name: str
+    stops: Optional[List[Any]] = None
+    favorites: Optional[List[str]] = None
+
+
+class RecordingModel(BaseModel):
+    """Model describing a recording file to capture into."""
+
+    path: str
+
+
+class PlaybackModel(BaseModel):
+    """Model describing a recording to play back."""
+
+    path: str
+    loop: bool = False
+    speed: float = 1.0
+
+
+class DiscoveryRegisterModel(BaseModel):
+    """Model selecting discovered nodes to register as devices."""
+
+    ips: Optional[List[str]] = None
+    pixel_count: Optional[int] = None
+
+
+class AudioModel(BaseModel):
+    """Model describing an audio input source."""
+
+    source: str
+    sample_rate: int = Field(44100, gt=0)
+    channels: int = Field(1, gt=0)
+    block_size: int = Field(1024, gt=0)
+    bands: int = Field(16, gt=0)
+
+
 class ColorPayload(BaseModel):
     """Payload for setting a uniform color."""
 
@@ -68,23 +190,59 @@ class ColorPayload(BaseModel):
     b: int
 
 
+@dataclass
+class RunningEffect:
+    """An effect rendered continuously by the render loop."""
+
+    kind: str  # "device" or "group"
+    name: str
+    effect: str
+    universe: int
+    params: Dict[str, Any] | None
+    offset: int  # loop step at which the effect started
+    fade_from: RunningEffect | None = None  # crossfaded from over ``fade_steps`` frames
+    fade_steps: int = 0
+
+
 class RestAPI:
     """Simple REST API server providing device management."""
 
-    def __init__(self, config: Config | str | Path | None = None) -> None:
+    def __init__(
+        self,
+        config: Config | str | Path | None = None,
+        engine: EngineClient | None = None,
+    ) -> None:
         self.app = FastAPI(title="Piccolo Control Panel")
+        self.engine = engine
+        self._engine_version = -1
         self.devices: Dict[str, LEDDevice] = {}
         self.groups: Dict[str, LightGroup] = {}
         self.favorites = FavoritesManager()
         self.event_hooks: Dict[str, Callable[[dict | None], None]] = {}
         self.effect_engines: Dict[str, EffectEngine] = {}
+        #: engines of group renders, keyed by group and segment index or "layout"
+        self.group_engines: Dict[Tuple[str, int | str], EffectEngine] = {}
+        self.clients: Dict[Tuple[str, str, int], OutputClient] = {}
+        self.recorder: FrameRecorder | None = None
+        self.player: FramePlayer | None = None
+        self.discovery = ArtNetDiscovery(on_poll=self._apply_discovery)
+        self.running: Dict[str, RunningEffect] = {}
+        #: held by the render loop and by output engine calls and frames
+        self.lock = threading.RLock()
+        self.loop = RenderLoop(self._loop_tick)
+        self.audio: AudioInput | None = None
+        self.cues: CuePlayer | None = None
+        self.timecode: TimecodeListener | None = None
         if config:
             self.load_config(config)
+        if engine is not None:
+            self.app.middleware("http")(self._sync_engine_state)
         self._setup_routes()
 
     def load_config(self, config: Config | str | Path) -> None:
         """Populate devices and groups from a configuration."""
         cfg = load_config(config) if isinstance(config, (str, Path)) else config
+        load_effect_modules(cfg.effect_modules)
         for dev in cfg.devices:
             self.devices[dev.name] = dev
             if dev.group:
@@ -96,10 +254,756 @@ class RestAPI:
 
     def _get_engine(self, name: str) -> EffectEngine:
         if name not in self.effect_engines:
-            pixel_count = self.devices[name].pixel_count
-            self.effect_engines[name] = EffectEngine(pixel_count)
+            device = self.devices[name]
+            try:
+                engine = EffectEngine(device.pixel_count, layout=device.layout)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from None
+            self.effect_engines[name] = engine
         return self.effect_engines[name]
 
+    def _render(
+        self, engine: EffectEngine, effect: str, step: int, params: Dict[str, Any] | None
+    ) -> np.ndarray:
+        try:
+            return engine.render(effect, step, params)
+        except KeyError:
+            raise HTTPException(status_code=400, detail="Unknown effect") from None
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+
+    def _render_segments(
+        self,
+        name: str,
+        group: LightGroup,
+        effect: str,
+        step: int,
+        params: Dict[str, Any] | None,
+    ) -> List[np.ndarray]:
+        """Render one frame per group segment.
+
+        Groups with a layout are rendered as a single canvas spanning all
+        segments in order; otherwise each segment renders independently.
+        """
+        if group.layout is not None:
+            lengths = [seg.length for seg in group.segments]
+            key = (name, "layout")
+            if key not in self.group_engines:
+                self.group_engines[key] = EffectEngine(sum(lengths), layout=group.layout)
+            engine = self.group_engines[key]
+            frame = self._render(engine, effect, step, params)
+            bounds = np.cumsum([0] + lengths)
+            return [frame[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+        frames = []
+        for index, seg in enumerate(group.segments):
+            engine = self.group_engines.get((name, index))
+            if engine is None:
+                engine = self.group_engines[(name, index)] = EffectEngine(seg.length)
+            frames.append(self._render(engine, effect, step, params))
+        return frames
+
+    def _segments_by_device(self, group: LightGroup) -> Dict[str, List[LEDSegment]]:
+        by_device: Dict[str, List[LEDSegment]] = {}
+        for seg in group.segments:
+            by_device.setdefault(seg.device, []).append(seg)
+        return by_device
+
+    def _client(self, ip: str, protocol: str = "artnet", priority: int = 100) -> OutputClient:
+        # multicast clients address universes, not hosts, so one is shared
+        # per priority
+        if protocol not in PRIORITY_PROTOCOLS:
+            priority = 100
+        key = (protocol, "" if protocol in MULTICAST_PROTOCOLS else ip, priority)
+        client = self.clients.get(key)
+        if client is None:
+            client = self.clients[key] = create_client(protocol, ip, priority)
+        return client
+
+    def _send(
+        self,
+        device: LEDDevice,
+        universe: int,
+        payload: bytes | memoryview,
+        protocol: str | None = None,
+        offset: int = 0,
+        priority: int | None = None,
+    ) -> None:
+        """Send ``payload`` to ``device`` offset from its base universe.
+
+        ``offset`` counts bytes from the start of ``universe``; whole
+        universes move the start universe and any remainder is only valid
+        for byte-addressed protocols (see :meth:`_check_offset`).
+        ``protocol`` and ``priority`` override the device's own.
+        """
+        if not device.online:
+            return
+        if self.engine is not None:
+            self.engine.send(device.name, universe, payload, protocol, offset, priority)
+            return
+        skip, offset = divmod(offset, ArtNetClient.universe_bytes)
+        universe += device.universe + skip
+        protocol = protocol or device.protocol
+        priority = device.priority if priority is None else priority
+        if self.recorder is not None:
+            if offset:
+                _LOGGER.warning("Not recording %s: recordings start on universes", device.name)
+            else:
+                self.recorder.record(
+                    device.name, universe, payload, ip=device.ip, protocol=protocol
+                )
+        with tracer.span("send", device=device.name, protocol=protocol, size=len(payload)):
+            client = self._client(device.ip, protocol, priority)
+            if offset:
+                client.send_frame(universe, payload, offset)  # type: ignore[call-arg]
+            else:
+                client.send_frame(universe, payload)
+
+    def _send_group(
+        self,
+        group: LightGroup,
+        payloads: Dict[str, bytes | memoryview],
+        universe: int,
+        offset: int = 0,
+    ) -> None:
+        """Send per-device payloads for a group.
+
+        Devices reached by multicast that share a universe and payload are
+        sent to once, however many of them mirror the content.
+        """
+        sent = set()
+        batch = []
+        for dev_name, payload in payloads.items():
+            device = self.devices[dev_name]
+            if not device.online:
+                continue
+            protocol = group.protocol or device.protocol
+            priority = device.priority if group.priority is None else group.priority
+            if protocol in MULTICAST_PROTOCOLS:
+                key = (protocol, device.universe + universe, offset, priority, payload)
+                if key in sent:
+                    continue
+                sent.add(key)
+            if self.engine is not None:
+                batch.append((dev_name, universe, payload, protocol, offset, priority))
+            else:
+                self._send(device, universe, payload, protocol, offset, priority)
+        if batch:
+            # one slot and one round trip for the whole group
+            self.engine.send_many(batch)
+
+    def _check_offset(self, devices: List[Tuple[LEDDevice, str]], offset: int) -> None:
+        """Reject offsets inside a universe for devices that address universes."""
+        if offset % ArtNetClient.universe_bytes == 0:
+            return
+        for device, protocol in devices:
+            if protocol not in BYTE_ADDRESSED_PROTOCOLS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{device.name} ({protocol}) needs offsets in whole universes "
+                    f"of {ArtNetClient.universe_bytes} bytes",
+                )
+
+    async def _read_command(
+        self, request: Request, universe: int | None, offset: int | None
+    ) -> Tuple[int, int, bytes]:
+        """Return ``(universe, offset, payload)`` from a command request.
+
+        Binary bodies are the payload itself, with universe and offset taken
+        from the query string or ``X-Universe`` / ``X-Offset`` headers.  JSON
+        bodies carry hex data as before; query parameters override their
+        universe and offset.
+        """
+        body = await request.body()
+        if request.headers.get("content-type", "").startswith(BINARY_TYPE):
+            payload = body
+        else:
+            try:
+                cmd = LightCommand.model_validate_json(body)
+            except ValidationError as exc:
+                raise RequestValidationError(exc.errors()) from None
+            try:
+                payload = bytes.fromhex(cmd.data)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid hex data") from None
+            universe = cmd.universe if universe is None else universe
+            offset = cmd.offset if offset is None else offset
+        universe, offset = universe or 0, offset or 0
+        if universe < 0 or offset < 0:
+            raise HTTPException(status_code=400, detail="Universe and offset must be >= 0")
+        return universe, offset, payload
+
+    @staticmethod
+    async def _read_records(request: Request) -> List[Tuple[int, memoryview]]:
+        """Split a multi-universe body into ``(universe, payload)`` views.
+
+        The body is a sequence of records, each a big endian 16-bit universe
+        and length followed by that many payload bytes.
+        """
+        if not request.headers.get("content-type", "").startswith(BINARY_TYPE):
+            raise HTTPException(status_code=415, detail=f"Expected {BINARY_TYPE}")
+        view = memoryview(await request.body())
+        records = []
+        pos = 0
+        while pos < len(view):
+            if pos + MULTI_RECORD.size > len(view):
+                raise HTTPException(status_code=400, detail="Truncated record header")
+            universe, length = MULTI_RECORD.unpack_from(view, pos)
+            pos += MULTI_RECORD.size
+            if pos + length > len(view):
+                raise HTTPException(status_code=400, detail="Truncated record")
+            records.append((universe, view[pos : pos + length]))
+            pos += length
+        return records
+
+    def _send_recorded(self, info: Dict[str, Any], universe: int, payload: memoryview) -> None:
+        """Playback callback sending to the device's current address."""
+        device = self.devices.get(info["name"])
+        if device is not None and not device.online:
+            return
+        ip = device.ip if device else info["ip"]
+        protocol = device.protocol if device else info.get("protocol", "artnet")
+        priority = device.priority if device else 100
+        if ip:
+            with tracer.span("send", device=info["name"], protocol=protocol, size=len(payload)):
+                self._client(ip, protocol, priority).send_frame(universe, payload)
+
+    def _apply_discovery(self, discovery: ArtNetDiscovery) -> None:
+        """Mark devices offline when their node stops answering ArtPoll.
+
+        Devices whose node never replied are left alone since not every
+        receiver implements ArtPoll.
+        """
+        with self.lock:
+            for device in list(self.devices.values()):
+                online = discovery.is_online(device.ip)
+                if online is not None:
+                    device.online = online
+
+    def _register_node(self, node: ArtNode, pixel_count: int | None) -> str:
+        name = node.short_name or "node"
+        if name in self.devices:
+            name = f"{name}-{node.ip.replace('.', '-')}"
+        self.devices[name] = LEDDevice(
+            name=name,
+            ip=node.ip,
+            pixel_count=pixel_count or 170 * max(1, len(node.universes)),
+            universe=min(node.universes, default=0),
+        )
+        return name
+
+    def start_discovery(self, interval: float = 10.0) -> None:
+        """Poll for Art-Net nodes in the background every ``interval`` seconds."""
+        self.discovery.start(interval)
+
+    def play_effect(
+        self,
+        kind: str,
+        name: str,
+        effect: str,
+        step: int,
+        universe: int,
+        params: Dict[str, Any] | None,
+    ) -> None:
+        """Render and send one frame of ``effect`` on a device or group."""
+        if kind == "device":
+            self._play_device_effect(name, effect, step, universe, params)
+        else:
+            self._play_group_effect(name, effect, step, universe, params)
+
+    def _renders_in_engine(self, effect: str) -> bool:
+        """Whether one-shot frames of ``effect`` must be rendered by the output engine.
+
+        Non-deterministic and stateful effects, such as the audio effects fed
+        by the engine's audio input, depend on state that only the engine
+        holds.
+        """
+        if self.engine is None or effect not in registry:
+            return False
+        spec = registry.get(effect)
+        return not spec.deterministic or spec.stateful
+
+    def _play_device_effect(
+        self,
+        name: str,
+        effect: str,
+        step: int,
+        universe: int,
+        params: Dict[str, Any] | None,
+    ) -> None:
+        frames = self._device_frames(name, effect, step, params)
+        self._send_frames("device", name, frames, universe)
+
+    def _play_group_effect(
+        self,
+        name: str,
+        effect: str,
+        step: int,
+        universe: int,
+        params: Dict[str, Any] | None,
+    ) -> None:
+        frames = self._group_frames(name, effect, step, params)
+        self._send_frames("group", name, frames, universe)
+
+    def _device_frames(
+        self, name: str, effect: str, step: int, params: Dict[str, Any] | None
+    ) -> Dict[str, np.ndarray]:
+        return {name: self._render(self._get_engine(name), effect, step, params)}
+
+    def _group_frames(
+        self, name: str, effect: str, step: int, params: Dict[str, Any] | None
+    ) -> Dict[str, np.ndarray]:
+        """Render a group effect and compose it into one frame per device."""
+        group = self.groups[name]
+        frames = self._render_segments(name, group, effect, step, params)
+        base_frames: Dict[str, np.ndarray] = {}
+        with tracer.span("compose", segments=len(group.segments)):
+            for seg, frame in zip(group.segments, frames):
+                device = self.devices[seg.device]
+                if seg.device not in base_frames:
+                    base_frames[seg.device] = np.zeros((device.pixel_count, 3), dtype=np.uint8)
+                stop = min(seg.start + seg.length, device.pixel_count)
+                base_frames[seg.device][seg.start : stop] = frame[: stop - seg.start]
+        return base_frames
+
+    def _send_frames(
+        self, kind: str, name: str, frames: Dict[str, np.ndarray], universe: int
+    ) -> None:
+        payloads = {dev_name: EffectEngine.to_bytes(frame) for dev_name, frame in frames.items()}
+        if kind == "device":
+            self._send(self.devices[name], universe, payloads[name])
+        else:
+            self._send_group(self.groups[name], payloads, universe)
+
+    def _play_running(self, run: RunningEffect, step: int) -> None:
+        """Send one frame of ``run``, crossfading while its fade lasts."""
+        elapsed = step - run.offset
+        if elapsed >= run.fade_steps:
+            run.fade_from = None
+            play = self._play_device_effect if run.kind == "device" else self._play_group_effect
+            play(run.name, run.effect, elapsed, run.universe, run.params)
+            return
+        frames_for = self._device_frames if run.kind == "device" else self._group_frames
+        frames = frames_for(run.name, run.effect, elapsed, run.params)
+        old = run.fade_from
+        if old is not None:
+            old_frames = frames_for(old.name, old.effect, step - old.offset, old.params)
+        else:
+            old_frames = {}
+        mix = elapsed / run.fade_steps
+        for dev_name, frame in frames.items():
+            start = old_frames.get(dev_name, np.zeros_like(frame)).astype(np.float32)
+            frames[dev_name] = (start + (frame - start) * mix).astype(np.uint8)
+        self._send_frames(run.kind, run.name, frames, run.universe)
+
+    def _loop_tick(self, step: int) -> None:
+        """Fire due cues, then render and send one frame of every running effect."""
+        # give up the frame rather than block a caller that holds the lock
+        # while stopping this loop
+        if not self.lock.acquire(timeout=1.0 / self.loop.fps):
+            return
+        try:
+            self._render_running(step)
+        finally:
+            self.lock.release()
+
+    def _render_running(self, step: int) -> None:
+        if self.cues is not None:
+            self.cues.tick(1.0 / self.loop.fps)
+        for key, run in list(self.running.items()):
+            try:
+                self._play_running(run, step)
+            except Exception:
+                _LOGGER.exception("Stopping effect %s on %s", run.effect, key)
+                self.running.pop(key, None)
+        audio_feed.mark_output()
+
+    def _fire_cue(self, actions: Sequence[CueAction], fade: float) -> None:
+        """Replace the running effect of every target in ``actions``."""
+        fade_steps = round(fade * self.loop.fps)
+        for action in actions:
+            previous = self.running.get(action.key)
+            self.running[action.key] = RunningEffect(
+                action.kind,
+                action.name,
+                action.effect,
+                action.universe,
+                action.params,
+                self.loop.step,
+                previous if fade_steps else None,
+                fade_steps,
+            )
+
+    def _require_player(self) -> FramePlayer:
+        if self.player is None:
+            raise HTTPException(status_code=404, detail="No recording loaded")
+        return self.player
+
+    def _output(self, method: str, *args: Any) -> Any:
+        """Run an output-side method here or in the output engine process."""
+        if self.engine is None:
+            return getattr(self, method)(*args)
+        return self.engine.call(method, *args)
+
+    async def _dispatch(self, send: Callable[[], None]) -> None:
+        """Run ``send`` for an async endpoint without blocking the event loop.
+
+        Local sends are non-blocking UDP writes and run inline; sends through
+        the output engine wait for its acknowledgement and use a thread.
+        """
+        if self.engine is None:
+            send()
+        else:
+            await run_in_threadpool(send)
+
+    async def _sync_engine_state(self, request: Request, call_next: Callable) -> Response:
+        """Middleware refreshing devices and groups when the engine's change."""
+        if self.engine.version != self._engine_version:
+            version, self.devices, self.groups, custom, sample_rate = await run_in_threadpool(
+                self.engine.state
+            )
+            set_custom_palettes(custom)
+            self.effect_engines.clear()
+            self.group_engines.clear()
+            if sample_rate is None:
+                tracer.stop()
+            else:
+                tracer.start(sample_rate)
+            self._engine_version = version
+        response = await call_next(request)
+        if len(tracer):
+            # the engine serves the trace, so hand it this worker's spans
+            events = tracer.drain()
+            await run_in_threadpool(self.engine.call, "merge_trace", os.getpid(), events)
+        return response
+
+    def add_device(self, device: LEDDevice) -> None:
+        if device.name in self.devices:
+            raise HTTPException(status_code=400, detail="Device already exists")
+        self.devices[device.name] = device
+
+    def add_group(self, group: LightGroup) -> None:
+        if group.name in self.groups:
+            raise HTTPException(status_code=400, detail="Group already exists")
+        for seg in group.segments:
+            if seg.device not in self.devices:
+                raise HTTPException(status_code=404, detail=f"Device {seg.device} not found")
+            device = self.devices[seg.device]
+            if seg.start < 0 or seg.start + seg.length > device.pixel_count:
+                raise HTTPException(status_code=400, detail="Segment out of range")
+        self.groups[group.name] = group
+
+    def list_favorites(self) -> List[Dict[str, Any]]:
+        return [asdict(f) for f in self.favorites.list()]
+
+    def add_favorite(self, name: str, r: int, g: int, b: int) -> None:
+        self.favorites.add(name, r, g, b)
+
+    def remove_favorite(self, name: str) -> None:
+        self.favorites.remove(name)
+
+    def favorite_colors(self, names: List[str]) -> List[Tuple[int, int, int]]:
+        favorites = [self.favorites.get(name) for name in names]
+        if None in favorites:
+            raise HTTPException(status_code=404, detail="Favorite not found")
+        return [fav.as_tuple() for fav in favorites]  # type: ignore[union-attr]
+
+    def add_palette(self, name: str, stops: Stops) -> None:
+        try:
+            register_palette(name, stops)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+
+    def remove_palette(self, name: str) -> None:
+        try:
+            unregister_palette(name)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Palette not found") from None
+
+    def start_running(
+        self, kind: str, name: str, effect: str, universe: int, params: Dict[str, Any] | None
+    ) -> Dict[str, str]:
+        if kind == "device" and name not in self.devices:
+            raise HTTPException(status_code=404, detail="Device not found")
+        if kind == "group" and name not in self.groups:
+            raise HTTPException(status_code=404, detail="Group not found")
+        # render one frame up front so bad parameters fail the request
+        play = self._play_device_effect if kind == "device" else self._play_group_effect
+        play(name, effect, 0, universe, params)
+        self.running[f"{kind}:{name}"] = RunningEffect(
+            kind, name, effect, universe, params, self.loop.step
+        )
+        self.loop.start()
+        return {"status": "running"}
+
+    def stop_running(self, kind: str, name: str) -> Dict[str, str]:
+        if self.running.pop(f"{kind}:{name}", None) is None:
+            raise HTTPException(status_code=404, detail="No running effect")
+        if not self.running and self.cues is None:
+            self.loop.stop()
+        return {"status": "stopped"}
+
+    def loop_status(self) -> Dict[str, object]:
+        return {
+            **self.loop.stats(),
+            "effects": [asdict(run) for run in self.running.values()],
+        }
+
+    def set_fps(self, fps: float) -> Dict[str, object]:
+        if fps <= 0:
+            raise HTTPException(status_code=400, detail="fps must be positive")
+        running = self.loop.running
+        self.loop.stop()
+        self.loop.fps = fps
+        if running:
+            self.loop.start()
+        return self.loop.stats()
+
+    def start_audio(self, req: AudioModel) -> Dict[str, object]:
+        try:
+            source = open_source(req.source, req.sample_rate, req.channels)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Audio source not found") from None
+        except (OSError, ValueError, ArithmeticError, wave.Error) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        try:
+            audio = AudioInput(source, req.block_size, req.bands)
+        except (ValueError, ArithmeticError) as exc:
+            source.close()
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        if self.audio is not None:
+            self.audio.stop()
+        self.audio = audio
+        audio.start()
+        return audio.stats()
+
+    def audio_status(self) -> Dict[str, object]:
+        if self.audio is None:
+            raise HTTPException(status_code=404, detail="No audio input")
+        return self.audio.stats()
+
+    def stop_audio(self) -> Dict[str, object]:
+        if self.audio is None:
+            raise HTTPException(status_code=404, detail="No audio input")
+        audio, self.audio = self.audio, None
+        audio.stop()
+        return audio.stats()
+
+    def discovery_nodes(self) -> List[Dict[str, object]]:
+        return [
+            {**asdict(node), "online": self.discovery.is_online(ip)}
+            for ip, node in self.discovery.snapshot().items()
+        ]
+
+    async def _poll(self, timeout: float | None = None) -> None:
+        try:
+            await self.discovery.poll(timeout)
+        except OSError as exc:
+            raise HTTPException(status_code=503, detail=f"ArtPoll failed: {exc}") from None
+
+    def poll_discovery(self, timeout: float | None = None) -> List[Dict[str, object]]:
+        """Blocking poll for callers without a running event loop."""
+        asyncio.run(self._poll(timeout))
+        with self.lock:
+            return self.discovery_nodes()
+
+    def register_nodes(
+        self, ips: List[str] | None = None, pixel_count: int | None = None
+    ) -> Dict[str, List[str]]:
+        known = {d.ip for d in self.devices.values()}
+        registered = []
+        for ip, node in self.discovery.snapshot().items():
+            if ip in known or (ips is not None and ip not in ips):
+                continue
+            if not self.discovery.is_online(ip):
+                continue
+            registered.append(self._register_node(node, pixel_count))
+        return {"registered": registered}
+
+    def start_recording(self, path: str) -> Dict[str, str]:
+        if self.recorder is not None:
+            raise HTTPException(status_code=400, detail="Already recording")
+        try:
+            self.recorder = FrameRecorder(path)
+        except OSError as exc:
+            raise HTTPException(
+                status_code=400, detail=f"Cannot write recording: {exc.strerror}"
+            ) from None
+        return {"status": "recording"}
+
+    def stop_recording(self) -> Dict[str, object]:
+        if self.recorder is None:
+            raise HTTPException(status_code=404, detail="Not recording")
+        recorder, self.recorder = self.recorder, None
+        recorder.close()
+        return {"status": "stopped", "frames": recorder.count}
+
+    def start_playback(self, req: PlaybackModel) -> Dict[str, object]:
+        if req.speed <= 0:
+            raise HTTPException(status_code=400, detail="Speed must be positive")
+        try:
+            player = FramePlayer(req.path, self._send_recorded, loop=req.loop)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Recording not found") from None
+        except OSError as exc:
+            raise HTTPException(
+                status_code=400, detail=f"Cannot read recording: {exc.strerror}"
+            ) from None
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        if self.player is not None:
+            self.player.close()
+        self.player = player
+        player.set_speed(req.speed)
+        player.play()
+        return player.status()
+
+    def playback_status(self) -> Dict[str, object]:
+        return self._require_player().status()
+
+    def pause_playback(self) -> Dict[str, object]:
+        player = self._require_player()
+        player.pause()
+        return player.status()
+
+    def resume_playback(self) -> Dict[str, object]:
+        player = self._require_player()
+        player.resume()
+        return player.status()
+
+    def seek_playback(self, position: float) -> Dict[str, object]:
+        player = self._require_player()
+        player.seek(position)
+        return player.status()
+
+    def set_playback_speed(self, speed: float, loop: bool | None = None) -> Dict[str, object]:
+        player = self._require_player()
+        if speed <= 0:
+            raise HTTPException(status_code=400, detail="Speed must be positive")
+        player.set_speed(speed)
+        if loop is not None:
+            player.loop = loop
+        return player.status()
+
+    def stop_playback(self) -> Dict[str, str]:
+        player = self._require_player()
+        self.player = None
+        player.close()
+        return {"status": "stopped"}
+
+    def _require_cues(self) -> CuePlayer:
+        if self.cues is None:
+            raise HTTPException(status_code=404, detail="No cue list loaded")
+        return self.cues
+
+    def load_cues(self, data: Dict[str, Any]) -> Dict[str, object]:
+        try:
+            cues = parse_cue_list(data)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        for cue in cues:
+            for action in cue.actions:
+                targets = self.devices if action.kind == "device" else self.groups
+                if action.name not in targets:
+                    raise HTTPException(
+                        status_code=404, detail=f"{action.kind.title()} {action.name} not found"
+                    )
+                try:
+                    registry.get(action.effect).resolve(action.params)
+                except KeyError:
+                    raise HTTPException(status_code=400, detail="Unknown effect") from None
+                except ValueError as exc:
+                    raise HTTPException(status_code=400, detail=str(exc)) from None
+        if self.cues is not None:
+            self.cues.pause()
+        self.cues = CuePlayer(cues, self._fire_cue)
+        # the render loop fires cues, so it runs while a cue list is loaded
+        self.loop.start()
+        return self.cue_status()
+
+    def cue_status(self) -> Dict[str, object]:
+        return {
+            **self._require_cues().stats(1.0 / self.loop.fps),
+            "late_frames": self.loop.late_frames,
+            "timecode_port": self.timecode.address[1] if self.timecode else None,
+        }
+
+    def start_cues(self) -> Dict[str, object]:
+        self._require_cues().start()
+        return self.cue_status()
+
+    def pause_cues(self) -> Dict[str, object]:
+        self._require_cues().pause()
+        return self.cue_status()
+
+    def seek_cues(self, position: float) -> Dict[str, object]:
+        self._require_cues().seek(position)
+        return self.cue_status()
+
+    def stop_cues(self) -> Dict[str, object]:
+        status = self.cue_status()
+        self.cues = None
+        if not self.running:
+            self.loop.stop()
+        return status
+
+    def _on_timecode(self, seconds: float) -> None:
+        # skip a packet rather than block a caller stopping the listener
+        if not self.lock.acquire(timeout=0.1):
+            return
+        try:
+            if self.cues is not None:
+                self.cues.sync(seconds)
+        finally:
+            self.lock.release()
+
+    def start_timecode(self, port: int = 6454) -> Dict[str, object]:
+        if self.timecode is not None:
+            self.timecode.stop()
+            self.timecode = None
+        try:
+            self.timecode = TimecodeListener(self._on_timecode, port=port)
+        except OSError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        self.timecode.start()
+        return {"status": "syncing", "port": self.timecode.address[1]}
+
+    def stop_timecode(self) -> Dict[str, object]:
+        if self.timecode is None:
+            raise HTTPException(status_code=404, detail="Timecode sync not enabled")
+        timecode, self.timecode = self.timecode, None
+        timecode.stop()
+        return {"status": "stopped", "packets": timecode.packets}
+
+    def start_trace(self, sample_rate: float = 1.0) -> Dict[str, object]:
+        try:
+            tracer.start(sample_rate)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        return {"status": "tracing", "sample_rate": tracer.sample_rate}
+
+    def stop_trace(self) -> Dict[str, object]:
+        tracer.stop()
+        return {"status": "stopped", "events": len(tracer)}
+
+    def trace(self) -> Dict[str, Any]:
+        return tracer.chrome_trace()
+
+    def clear_trace(self) -> Dict[str, str]:
+        tracer.clear()
+        return {"status": "cleared"}
+
+    def merge_trace(self, pid: int, events: List[Any]) -> None:
+        tracer.merge(pid, events)
+
+    def trigger(self, event: str, payload: dict | None = None) -> Dict[str, str]:
+        handler = self.event_hooks.get(event)
+        if not handler:
+            raise HTTPException(status_code=404, detail="Event not registered")
+        handler(payload)
+        return {"status": "triggered"}
+
     def attach_mqtt(self, topic: str, mqtt_client: MQTTClient, event: str) -> None:
         """Bind an MQTT topic to a named event."""
 
@@ -128,7 +1032,14 @@ class RestAPI:
         def register_device(device: DeviceModel) -> Dict[str, str]:
             if device.name in self.devices:
                 raise HTTPException(status_code=400, detail="Device already exists")
-            self.devices[device.name] = LEDDevice(**device.model_dump())
+            if device.protocol not in PROTOCOLS:
+                raise HTTPException(status_code=400, detail="Unknown protocol")
+            layout = device.layout.to_layout() if device.layout else None
+            if layout and layout.pixel_count > device.pixel_count:
+                raise HTTPException(status_code=400, detail="Layout exceeds pixel count")
+            self._output(
+                "add_device", LEDDevice(**device.model_dump(exclude={"layout"}), layout=layout)
+            )
             return {"status": "registered"}
 
         @self.app.get("/groups")
@@ -140,158 +1051,375 @@ class RestAPI:
 
         @self.app.post("/groups")
         def create_group(group: GroupModel) -> Dict[str, str]:
-            if group.name in self.groups:
-                raise HTTPException(status_code=400, detail="Group already exists")
-            segments: List[LEDSegment] = []
-            for seg in group.segments:
-                if seg.device not in self.devices:
-                    raise HTTPException(
-                        status_code=404, detail=f"Device {seg.device} not found"
-                    )
-                device = self.devices[seg.device]
-                if seg.start < 0 or seg.start + seg.length > device.pixel_count:
-                    raise HTTPException(status_code=400, detail="Segment out of range")
-                segments.append(LEDSegment(seg.device, seg.start, seg.length))
-            self.groups[group.name] = LightGroup(group.name, segments)
+            segments = [LEDSegment(seg.device, seg.start, seg.length) for seg in group.segments]
+            layout = group.layout.to_layout() if group.layout else None
+            if layout and layout.pixel_count > sum(seg.length for seg in segments):
+                raise HTTPException(status_code=400, detail="Layout exceeds group size")
+            if group.protocol is not None and group.protocol not in PROTOCOLS:
+                raise HTTPException(status_code=400, detail="Unknown protocol")
+            self._output(
+                "add_group",
+                LightGroup(group.name, segments, layout, group.protocol, group.priority),
+            )
             return {"status": "group created"}
 
         @self.app.get("/favorites")
-        def list_favorites() -> List[Dict[str, int]]:
-            return [asdict(f) for f in self.favorites.list()]
+        def list_favorites() -> List[Dict[str, Any]]:
+            return self._output("list_favorites")
 
         @self.app.post("/favorites")
         def add_favorite(fav: FavoriteModel) -> Dict[str, str]:
-            self.favorites.add(fav.name, fav.r, fav.g, fav.b)
+            self._output("add_favorite", fav.name, fav.r, fav.g, fav.b)
             return {"status": "added"}
 
         @self.app.delete("/favorites/{name}")
         def delete_favorite(name: str) -> Dict[str, str]:
-            self.favorites.remove(name)
+            self._output("remove_favorite", name)
+            return {"status": "removed"}
+
+        @self.app.get("/palettes")
+        def list_palettes() -> List[Dict[str, Any]]:
+            return [
+                {"name": name, "stops": stops, "builtin": name in BUILTIN_PALETTES}
+                for name, stops in palettes().items()
+            ]
+
+        @self.app.post("/palettes")
+        def add_palette(palette: PaletteModel) -> Dict[str, str]:
+            if (palette.stops is None) == (palette.favorites is None):
+                raise HTTPException(status_code=400, detail="Give either stops or favorites")
+            if palette.favorites is not None:
+                source = self._output("favorite_colors", palette.favorites)
+            else:
+                source = palette.stops
+            try:
+                stops = parse_palette(source)
+            except (TypeError, ValueError) as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from None
+            self._output("add_palette", palette.name, stops)
+            return {"status": "palette added"}
+
+        @self.app.delete("/palettes/{name}")
+        def delete_palette(name: str) -> Dict[str, str]:
+            self._output("remove_palette", name)
             return {"status": "removed"}
 
-        @self.app.post("/devices/{name}/command")
-        def send_command(name: str, cmd: LightCommand) -> Dict[str, str]:
+        @self.app.post("/devices/{name}/command", openapi_extra=COMMAND_BODY)
+        async def send_command(
+            name: str,
+            request: Request,
+            universe: Optional[int] = None,
+            offset: Optional[int] = None,
+            x_universe: Optional[int] = Header(None),
+            x_offset: Optional[int] = Header(None),
+        ) -> Dict[str, str]:
             if name not in self.devices:
                 raise HTTPException(status_code=404, detail="Device not found")
-            payload = bytes.fromhex(cmd.data)
-            client = ArtNetClient(self.devices[name].ip)
-            base = self.devices[name].universe
-            client.send_dmx(base + cmd.universe, payload)
+            universe, offset, payload = await self._read_command(
+                request,
+                x_universe if universe is None else universe,
+                x_offset if offset is None else offset,
+            )
+            device = self.devices[name]
+            self._check_offset([(device, device.protocol)], offset)
+
+            def send() -> None:
+                with tracer.frame("device_command", target=name, size=len(payload)):
+                    self._send(device, universe, payload, offset=offset)
+
+            await self._dispatch(send)
             return {"status": "sent"}
 
-        @self.app.post("/groups/{name}/command")
-        def send_group_command(name: str, cmd: LightCommand) -> Dict[str, str]:
+        @self.app.post("/groups/{name}/command", openapi_extra=COMMAND_BODY)
+        async def send_group_command(
+            name: str,
+            request: Request,
+            universe: Optional[int] = None,
+            offset: Optional[int] = None,
+            x_universe: Optional[int] = Header(None),
+            x_offset: Optional[int] = Header(None),
+        ) -> Dict[str, str]:
             if name not in self.groups:
                 raise HTTPException(status_code=404, detail="Group not found")
+            universe, offset, payload = await self._read_command(
+                request,
+                x_universe if universe is None else universe,
+                x_offset if offset is None else offset,
+            )
             group = self.groups[name]
-            sent_to = set()
-            for seg in group.segments:
-                if seg.device in sent_to:
-                    continue
-                payload = bytes.fromhex(cmd.data)
-                client = ArtNetClient(self.devices[seg.device].ip)
-                base = self.devices[seg.device].universe
-                client.send_dmx(base + cmd.universe, payload)
-                sent_to.add(seg.device)
+            self._check_offset(
+                [
+                    (self.devices[seg.device], group.protocol or self.devices[seg.device].protocol)
+                    for seg in group.segments
+                ],
+                offset,
+            )
+
+            def send() -> None:
+                with tracer.frame("group_command", target=name, size=len(payload)):
+                    # every device gets the same buffer, decoded once
+                    payloads = {seg.device: payload for seg in group.segments}
+                    self._send_group(group, payloads, universe, offset)
+
+            await self._dispatch(send)
             return {"status": "sent"}
 
+        @self.app.post("/devices/{name}/command/multi", openapi_extra=MULTI_COMMAND_BODY)
+        async def send_multi_command(name: str, request: Request) -> Dict[str, object]:
+            if name not in self.devices:
+                raise HTTPException(status_code=404, detail="Device not found")
+            records = await self._read_records(request)
+            device = self.devices[name]
+
+            def send() -> None:
+                with tracer.frame("device_command", target=name, universes=len(records)):
+                    for universe, payload in records:
+                        self._send(device, universe, payload)
+
+            await self._dispatch(send)
+            return {"status": "sent", "universes": len(records)}
+
+        @self.app.post("/groups/{name}/command/multi", openapi_extra=MULTI_COMMAND_BODY)
+        async def send_group_multi_command(name: str, request: Request) -> Dict[str, object]:
+            if name not in self.groups:
+                raise HTTPException(status_code=404, detail="Group not found")
+            records = await self._read_records(request)
+            group = self.groups[name]
+
+            def send() -> None:
+                with tracer.frame("group_command", target=name, universes=len(records)):
+                    for universe, payload in records:
+                        payloads = {seg.device: payload for seg in group.segments}
+                        self._send_group(group, payloads, universe)
+
+            await self._dispatch(send)
+            return {"status": "sent", "universes": len(records)}
+
         @self.app.post("/devices/{name}/color")
         def set_device_color(name: str, color: ColorPayload, universe: int = 0) -> Dict[str, str]:
             if name not in self.devices:
                 raise HTTPException(status_code=404, detail="Device not found")
-            device = self.devices[name]
-            frame = [Color(color.r, color.g, color.b) for _ in range(device.pixel_count)]
-            payload = EffectEngine.to_bytes(frame)
-            base = device.universe
-            ArtNetClient(device.ip).send_dmx(base + universe, payload)
+            with tracer.frame("device_color", target=name):
+                device = self.devices[name]
+                frame = [Color(color.r, color.g, color.b) for _ in range(device.pixel_count)]
+                payload = EffectEngine.to_bytes(frame)
+                self._send(device, universe, payload)
             return {"status": "sent"}
 
         @self.app.post("/groups/{name}/color")
         def set_group_color(name: str, color: ColorPayload, universe: int = 0) -> Dict[str, str]:
             if name not in self.groups:
                 raise HTTPException(status_code=404, detail="Group not found")
-            group = self.groups[name]
-            by_device: Dict[str, List[LEDSegment]] = {}
-            for seg in group.segments:
-                by_device.setdefault(seg.device, []).append(seg)
-            for dev_name, segs in by_device.items():
-                device = self.devices[dev_name]
-                frame = [Color(0, 0, 0) for _ in range(device.pixel_count)]
-                for seg in segs:
-                    for i in range(seg.start, seg.start + seg.length):
-                        if 0 <= i < device.pixel_count:
-                            frame[i] = Color(color.r, color.g, color.b)
-                payload = EffectEngine.to_bytes(frame)
-                base = device.universe
-                ArtNetClient(device.ip).send_dmx(base + universe, payload)
+            with tracer.frame("group_color", target=name):
+                group = self.groups[name]
+                payloads: Dict[str, bytes] = {}
+                for dev_name, segs in self._segments_by_device(group).items():
+                    device = self.devices[dev_name]
+                    frame = [Color(0, 0, 0) for _ in range(device.pixel_count)]
+                    for seg in segs:
+                        for i in range(seg.start, seg.start + seg.length):
+                            if 0 <= i < device.pixel_count:
+                                frame[i] = Color(color.r, color.g, color.b)
+                    payloads[dev_name] = EffectEngine.to_bytes(frame)
+                self._send_group(group, payloads, universe)
             return {"status": "sent"}
 
+        @self.app.get("/effects")
+        def list_effects() -> List[Dict[str, Any]]:
+            return [spec.describe() for spec in registry.specs()]
+
         @self.app.post("/groups/{name}/effect")
-        def run_group_effect(name: str, effect: str, step: int = 0, universe: int = 0) -> Dict[str, str]:
+        def run_group_effect(
+            name: str,
+            effect: str,
+            step: int = 0,
+            universe: int = 0,
+            params: Optional[Dict[str, Any]] = Body(None),
+        ) -> Dict[str, str]:
             if name not in self.groups:
                 raise HTTPException(status_code=404, detail="Group not found")
-            group = self.groups[name]
-            by_device: Dict[str, List[LEDSegment]] = {}
-            for seg in group.segments:
-                by_device.setdefault(seg.device, []).append(seg)
-            for dev_name, segs in by_device.items():
-                device = self.devices[dev_name]
-                base_frame = [Color(0, 0, 0) for _ in range(device.pixel_count)]
-                for seg in segs:
-                    engine = EffectEngine(seg.length)
-                    if effect == "cycle":
-                        colors = [Color(255, 0, 0), Color(0, 255, 0), Color(0, 0, 255)]
-                        frame = engine.color_cycle(colors, step)
-                    elif effect == "wave":
-                        frame = engine.wave(Color(255, 255, 255), 20, step)
-                    elif effect == "flicker":
-                        frame = engine.flicker(Color(255, 255, 255), (0.2, 1.0), step)
-                    else:
-                        raise HTTPException(status_code=400, detail="Unknown effect")
-                    for i, col in enumerate(frame, start=seg.start):
-                        if 0 <= i < device.pixel_count:
-                            base_frame[i] = col
-                payload = EffectEngine.to_bytes(base_frame)
-                base = device.universe
-                ArtNetClient(device.ip).send_dmx(base + universe, payload)
+            with tracer.frame("group_effect", target=name, effect=effect):
+                if self._renders_in_engine(effect):
+                    self._output("play_effect", "group", name, effect, step, universe, params)
+                else:
+                    self._play_group_effect(name, effect, step, universe, params)
             return {"status": "sent"}
 
         @self.app.post("/devices/{name}/effect")
-        def run_device_effect(name: str, effect: str, step: int = 0, universe: int = 0) -> Dict[str, str]:
+        def run_device_effect(
+            name: str,
+            effect: str,
+            step: int = 0,
+            universe: int = 0,
+            params: Optional[Dict[str, Any]] = Body(None),
+        ) -> Dict[str, str]:
             if name not in self.devices:
                 raise HTTPException(status_code=404, detail="Device not found")
-            engine = self._get_engine(name)
-            if effect == "cycle":
-                colors = [
-                    Color(r, g, b)
-                    for r, g, b in [
-                        (255, 0, 0),
-                        (0, 255, 0),
-                        (0, 0, 255),
-                    ]
-                ]
-                frame = engine.color_cycle(colors, step)
-            elif effect == "wave":
-                frame = engine.wave(Color(255, 255, 255), 20, step)
-            elif effect == "flicker":
-                frame = engine.flicker(Color(255, 255, 255), (0.2, 1.0), step)
-            else:
-                raise HTTPException(status_code=400, detail="Unknown effect")
-            payload = EffectEngine.to_bytes(frame)
-            base = self.devices[name].universe
-            ArtNetClient(self.devices[name].ip).send_dmx(base + universe, payload)
+            with tracer.frame("device_effect", target=name, effect=effect):
+                if self._renders_in_engine(effect):
+                    self._output("play_effect", "device", name, effect, step, universe, params)
+                else:
+                    self._play_device_effect(name, effect, step, universe, params)
             return {"status": "sent"}
 
+        @self.app.post("/devices/{name}/effect/run")
+        def start_device_effect(
+            name: str,
+            effect: str,
+            universe: int = 0,
+            params: Optional[Dict[str, Any]] = Body(None),
+        ) -> Dict[str, str]:
+            return self._output("start_running", "device", name, effect, universe, params)
+
+        @self.app.delete("/devices/{name}/effect/run")
+        def stop_device_effect(name: str) -> Dict[str, str]:
+            return self._output("stop_running", "device", name)
+
+        @self.app.post("/groups/{name}/effect/run")
+        def start_group_effect(
+            name: str,
+            effect: str,
+            universe: int = 0,
+            params: Optional[Dict[str, Any]] = Body(None),
+        ) -> Dict[str, str]:
+            return self._output("start_running", "group", name, effect, universe, params)
+
+        @self.app.delete("/groups/{name}/effect/run")
+        def stop_group_effect(name: str) -> Dict[str, str]:
+            return self._output("stop_running", "group", name)
+
+        @self.app.get("/loop")
+        def loop_status() -> Dict[str, object]:
+            return self._output("loop_status")
+
+        @self.app.post("/loop")
+        def configure_loop(fps: float) -> Dict[str, object]:
+            return self._output("set_fps", fps)
+
+        @self.app.post("/audio")
+        def start_audio(req: AudioModel) -> Dict[str, object]:
+            return self._output("start_audio", req)
+
+        @self.app.get("/audio")
+        def audio_status() -> Dict[str, object]:
+            return self._output("audio_status")
+
+        @self.app.delete("/audio")
+        def stop_audio() -> Dict[str, object]:
+            return self._output("stop_audio")
+
+        @self.app.get("/discovery")
+        def list_nodes() -> List[Dict[str, object]]:
+            return self._output("discovery_nodes")
+
+        @self.app.post("/discovery/poll")
+        async def poll_nodes(timeout: Optional[float] = None) -> List[Dict[str, object]]:
+            if self.engine is None:
+                await self._poll(timeout)
+                return self.discovery_nodes()
+            return await run_in_threadpool(self.engine.call, "poll_discovery", timeout)
+
+        @self.app.post("/discovery/register")
+        def register_nodes(req: DiscoveryRegisterModel) -> Dict[str, List[str]]:
+            return self._output("register_nodes", req.ips, req.pixel_count)
+
+        @self.app.post("/recording")
+        def start_recording(rec: RecordingModel) -> Dict[str, str]:
+            return self._output("start_recording", rec.path)
+
+        @self.app.delete("/recording")
+        def stop_recording() -> Dict[str, object]:
+            return self._output("stop_recording")
+
+        @self.app.post("/playback")
+        def start_playback(req: PlaybackModel) -> Dict[str, object]:
+            return self._output("start_playback", req)
+
+        @self.app.get("/playback")
+        def playback_status() -> Dict[str, object]:
+            return self._output("playback_status")
+
+        @self.app.post("/playback/pause")
+        def pause_playback() -> Dict[str, object]:
+            return self._output("pause_playback")
+
+        @self.app.post("/playback/resume")
+        def resume_playback() -> Dict[str, object]:
+            return self._output("resume_playback")
+
+        @self.app.post("/playback/seek")
+        def seek_playback(position: float) -> Dict[str, object]:
+            return self._output("seek_playback", position)
+
+        @self.app.post("/playback/speed")
+        def playback_speed(speed: float, loop: Optional[bool] = None) -> Dict[str, object]:
+            return self._output("set_playback_speed", speed, loop)
+
+        @self.app.delete("/playback")
+        def stop_playback() -> Dict[str, str]:
+            return self._output("stop_playback")
+
+        @self.app.post("/cues")
+        def load_cues(data: Dict[str, Any] = Body(...)) -> Dict[str, object]:
+            return self._output("load_cues", data)
+
+        @self.app.get("/cues")
+        def cue_status() -> Dict[str, object]:
+            return self._output("cue_status")
+
+        @self.app.post("/cues/start")
+        def start_cues() -> Dict[str, object]:
+            return self._output("start_cues")
+
+        @self.app.post("/cues/pause")
+        def pause_cues() -> Dict[str, object]:
+            return self._output("pause_cues")
+
+        @self.app.post("/cues/seek")
+        def seek_cues(position: float) -> Dict[str, object]:
+            return self._output("seek_cues", position)
+
+        @self.app.delete("/cues")
+        def stop_cues() -> Dict[str, object]:
+            return self._output("stop_cues")
+
+        @self.app.post("/cues/timecode")
+        def start_timecode(port: int = 6454) -> Dict[str, object]:
+            return self._output("start_timecode", port)
+
+        @self.app.delete("/cues/timecode")
+        def stop_timecode() -> Dict[str, object]:
+            return self._output("stop_timecode")
+
+        @self.app.post("/trace/start")
+        def start_trace(sample_rate: float = 1.0) -> Dict[str, object]:
+            return self._output("start_trace", sample_rate)
+
+        @self.app.post("/trace/stop")
+        def stop_trace() -> Dict[str, object]:
+            return self._output("stop_trace")
+
+        @self.app.get("/trace")
+        def get_trace() -> Dict[str, Any]:
+            return self._output("trace")
+
+        @self.app.delete("/trace")
+        def clear_trace() -> Dict[str, str]:
+            return self._output("clear_trace")
+
         @self.app.post("/triggers/{event}")
         def trigger_event(event: str, payload: Optional[dict] = None) -> Dict[str, str]:
-            handler = self.event_hooks.get(event)
-            if not handler:
-                raise HTTPException(status_code=404, detail="Event not registered")
-            handler(payload)
-            return {"status": "triggered"}
+            return self._output("trigger", event, payload)
+
+    def start(self, host: str = "0.0.0.0", port: int = 8000, workers: int = 1) -> None:
+        """Start the REST API server using uvicorn.
 
-    def start(self, host: str = "0.0.0.0", port: int = 8000) -> None:
-        """Start the REST API server using uvicorn."""
+        With several ``workers`` this instance becomes the output engine and
+        HTTP requests are served by separate worker processes.
+        """
+        if workers > 1:
+            serve_workers(self, host, port, workers)
+            return
         import uvicorn
 
         uvicorn.run(self.app, host=host, port=port)
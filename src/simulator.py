@@ -0,0 +1,347 @@
+"""Virtual Art-Net node farm for controller scaling tests.
+
+A :class:`NodeFarm` runs many virtual receivers in one asyncio process, each
+bound to its own loopback address (``127.0.1.1``, ``127.0.1.2``, ...) on the
+standard Art-Net port, so the controller reaches them exactly like real
+nodes.  Packets are decoded with the Raspberry Pi service's own
+``_parse_artdmx`` and every node records frame arrival times, incomplete
+frames and gaps in the ArtDMX sequence numbers.
+
+:func:`drive` registers the farm with a running controller as one group and
+sends frames through the REST API at a fixed rate.  Each frame is tagged by
+encoding its number in the pixel colour, which lets arrivals be matched to
+requests for end-to-end latency.  Run a sweep from the command line::
+
+    python -m piccolo &
+    python -m src.simulator --nodes 10,100,300 --pixels 170,510 --fps 20,40,80
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import ipaddress
+import json
+import math
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+ARTNET_PORT = 6454
+PIXELS_PER_UNIVERSE = 170
+
+SERVICE_PATH = (
+    Path(__file__).resolve().parents[1] / "firmware" / "rpi_artnet_service" / "artnet_service.py"
+)
+
+
+def _load_service() -> ModuleType:
+    """Import the Pi service module to reuse its packet parsing."""
+    spec = importlib.util.spec_from_file_location("artnet_service", SERVICE_PATH)
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+_service = _load_service()
+
+
+@dataclass
+class NodeStats:
+    """Counters recorded by one virtual node."""
+
+    packets: int = 0
+    frames: int = 0
+    incomplete: int = 0
+    sequence_gaps: int = 0
+    out_of_order: int = 0
+    arrivals: List[float] = field(default_factory=list)
+    tags: Dict[int, float] = field(default_factory=dict)
+
+
+class VirtualNode(asyncio.DatagramProtocol):
+    """An Art-Net receiver driving ``pixel_count`` virtual pixels.
+
+    A frame ends when the node's last universe arrives; it is complete when
+    every universe of the node was received since the previous frame.
+    """
+
+    def __init__(self, name: str, ip: str, pixel_count: int, port: int = ARTNET_PORT) -> None:
+        self.name = name
+        self.ip = ip
+        self.port = port
+        self.pixel_count = pixel_count
+        self.universes = max(1, math.ceil(pixel_count / PIXELS_PER_UNIVERSE))
+        self.stats = NodeStats()
+        self.transport: asyncio.DatagramTransport | None = None
+        self._seen: Set[int] = set()
+        self._sequences: Dict[int, int] = {}
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+        self.port = transport.get_extra_info("sockname")[1]  # resolve port 0
+
+    def reset(self) -> None:
+        self.stats = NodeStats()
+        self._seen.clear()
+        self._sequences.clear()
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        now = time.perf_counter()
+        if _service._is_artpoll(data):
+            for reply in _service._build_artpollreplies(self.ip, self.universes, self.name):
+                self.transport.sendto(reply, addr)  # type: ignore[union-attr]
+            return
+        parsed = _service._parse_artdmx(data)
+        if parsed is None:
+            return
+        universe, dmx = parsed
+        self.stats.packets += 1
+        self._check_sequence(universe, data[12])
+        self._seen.add(universe)
+        if universe == self.universes - 1:
+            self._end_frame(now, dmx)
+
+    def _check_sequence(self, universe: int, sequence: int) -> None:
+        if sequence == 0:  # sender does not number packets
+            return
+        last = self._sequences.get(universe)
+        if last is not None:
+            # sequence numbers cycle through 1-255
+            delta = (sequence - last) % 255
+            if delta == 0 or delta > 127:
+                self.stats.out_of_order += 1
+                return
+            self.stats.sequence_gaps += delta - 1
+        self._sequences[universe] = sequence
+
+    def _end_frame(self, now: float, dmx: bytes) -> None:
+        stats = self.stats
+        if len(self._seen) == self.universes:
+            stats.frames += 1
+        else:
+            stats.incomplete += 1
+        self._seen.clear()
+        stats.arrivals.append(now)
+        if len(dmx) >= 3:
+            stats.tags.setdefault(int.from_bytes(dmx[:3], "big"), now)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class NodeFarm:
+    """Many :class:`VirtualNode` instances on consecutive loopback addresses."""
+
+    def __init__(
+        self,
+        count: int,
+        pixel_count: int,
+        base_ip: str = "127.0.1.1",
+        port: int = ARTNET_PORT,
+        prefix: str = "sim",
+    ) -> None:
+        base = ipaddress.IPv4Address(base_ip)
+        self.prefix = prefix
+        self.pixel_count = pixel_count
+        self.nodes = [
+            VirtualNode(f"{prefix}{i}", str(base + i), pixel_count, port) for i in range(count)
+        ]
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for node in self.nodes:
+            await loop.create_datagram_endpoint(
+                lambda node=node: node, local_addr=(node.ip, node.port)
+            )
+
+    async def close(self) -> None:
+        for node in self.nodes:
+            if node.transport is not None:
+                node.transport.close()
+        # transports release their sockets on the next loop iteration
+        await asyncio.sleep(0)
+
+    def reset(self) -> None:
+        for node in self.nodes:
+            node.reset()
+
+    def summary(self, sent: Dict[int, float] | None = None) -> Dict[str, Any]:
+        """Aggregate node counters, with latency when send times are given.
+
+        ``sent`` maps frame tags to the time each frame was requested.
+        """
+        stats = [node.stats for node in self.nodes]
+        rates, jitter = [], []
+        for s in stats:
+            if len(s.arrivals) > 2:
+                intervals = [b - a for a, b in zip(s.arrivals, s.arrivals[1:])]
+                rates.append(len(intervals) / (s.arrivals[-1] - s.arrivals[0]))
+                jitter.append(statistics.pstdev(intervals) * 1000)
+        result: Dict[str, Any] = {
+            "nodes": len(self.nodes),
+            "pixels": self.pixel_count,
+            "packets": sum(s.packets for s in stats),
+            "frames": sum(s.frames for s in stats),
+            "incomplete": sum(s.incomplete for s in stats),
+            "sequence_gaps": sum(s.sequence_gaps for s in stats),
+            "out_of_order": sum(s.out_of_order for s in stats),
+            "fps_min": min(rates, default=0.0),
+            "fps_mean": statistics.fmean(rates) if rates else 0.0,
+            "jitter_ms_mean": statistics.fmean(jitter) if jitter else 0.0,
+        }
+        if sent:
+            latencies = [
+                (s.tags[tag] - start) * 1000
+                for s in stats
+                for tag, start in sent.items()
+                if tag in s.tags
+            ]
+            result["delivered"] = len(latencies) / (len(sent) * len(stats)) if stats else 0.0
+            if latencies:
+                result.update(
+                    latency_ms_p50=_percentile(latencies, 0.5),
+                    latency_ms_p95=_percentile(latencies, 0.95),
+                    latency_ms_p99=_percentile(latencies, 0.99),
+                    latency_ms_max=max(latencies),
+                )
+        return result
+
+
+async def register(http: Any, farm: NodeFarm) -> str:
+    """Register the farm's nodes as devices and one group; return its name."""
+    for node in farm.nodes:
+        resp = await http.post(
+            "/devices", json={"name": node.name, "ip": node.ip, "pixel_count": node.pixel_count}
+        )
+        if resp.status_code not in (200, 400):  # 400: left over from an earlier run
+            resp.raise_for_status()
+    group = f"{farm.prefix}farm"
+    segments = [
+        {"device": node.name, "start": 0, "length": node.pixel_count} for node in farm.nodes
+    ]
+    resp = await http.post("/groups", json={"name": group, "segments": segments})
+    if resp.status_code not in (200, 400):
+        resp.raise_for_status()
+    return group
+
+
+async def drive(
+    http: Any, farm: NodeFarm, group: str, fps: float, duration: float, first_tag: int = 1
+) -> Dict[str, Any]:
+    """Send tagged frames to ``group`` at ``fps`` and summarise what arrived."""
+    farm.reset()
+    sent: Dict[int, float] = {}
+    period = 1.0 / fps
+    frames = max(1, int(duration * fps))
+    late = 0
+    start = deadline = time.perf_counter()
+    for i in range(frames):
+        tag = (first_tag + i) & 0xFFFFFF
+        sent[tag] = time.perf_counter()
+        data = tag.to_bytes(3, "big").hex() * farm.pixel_count
+        resp = await http.post(f"/groups/{group}/command", json={"data": data})
+        resp.raise_for_status()
+        deadline += period
+        delay = deadline - time.perf_counter()
+        if delay < 0:
+            late += 1
+            deadline = time.perf_counter()
+        else:
+            await asyncio.sleep(delay)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.2)  # let the last frames land
+    return {
+        "target_fps": fps,
+        "sent_fps": frames / elapsed,
+        "late_requests": late,
+        **farm.summary(sent),
+    }
+
+
+def sustainable(result: Dict[str, Any]) -> bool:
+    """A rate is sustained when it was met and nearly every frame arrived whole."""
+    return (
+        result["sent_fps"] >= 0.95 * result["target_fps"]
+        and result.get("delivered", 0.0) >= 0.99
+        and result["incomplete"] <= 0.01 * max(1, result["frames"])
+    )
+
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(",")]
+
+
+def _floats(text: str) -> List[float]:
+    return [float(v) for v in text.split(",")]
+
+
+async def run_sweep(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import httpx
+
+    results = []
+    tag = 1
+    async with httpx.AsyncClient(base_url=args.url, timeout=10.0) as http:
+        for count in args.nodes:
+            for pixels in args.pixels:
+                farm = NodeFarm(count, pixels, args.base_ip, prefix=f"sim{count}x{pixels}-")
+                await farm.start()
+                try:
+                    group = await register(http, farm)
+                    best: Optional[float] = None
+                    for fps in args.fps:
+                        result = await drive(http, farm, group, fps, args.duration, tag)
+                        tag += int(args.duration * fps) + 1
+                        results.append(result)
+                        print(_format(result), flush=True)
+                        if sustainable(result):
+                            best = fps
+                    print(f"nodes={count} pixels={pixels} max sustainable fps: {best}", flush=True)
+                finally:
+                    await farm.close()
+    return results
+
+
+def _format(result: Dict[str, Any]) -> str:
+    return (
+        "nodes={nodes} pixels={pixels} fps={target_fps:g} sent={sent_fps:.1f} "
+        "delivered={delivered:.1%} incomplete={incomplete} gaps={sequence_gaps} "
+        "p50={p50:.1f}ms p99={p99:.1f}ms jitter={jitter_ms_mean:.2f}ms".format(
+            **{"delivered": 0.0, **result},
+            p50=result.get("latency_ms_p50", float("nan")),
+            p99=result.get("latency_ms_p99", float("nan")),
+        )
+    )
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Virtual Art-Net node farm benchmark")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Controller REST API")
+    parser.add_argument("--nodes", type=_ints, default=[10], help="Node counts, comma separated")
+    parser.add_argument(
+        "--pixels", type=_ints, default=[170], help="Pixels per node, comma separated"
+    )
+    parser.add_argument(
+        "--fps", type=_floats, default=[20.0, 40.0], help="Frame rates to try, comma separated"
+    )
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per frame rate")
+    parser.add_argument("--base-ip", default="127.0.1.1", help="Address of the first node")
+    parser.add_argument("--json", type=Path, help="Also write all results to this file")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = build_arg_parser().parse_args(argv)
+    results = asyncio.run(run_sweep(args))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Lightweight per-stage tracing of the output pipeline.
+
+Stages are wrapped in :meth:`Tracer.span` blocks and whole frames in
+:meth:`Tracer.frame`.  While tracing is disabled both return a shared no-op
+context manager, so instrumented code pays for one attribute check.  When
+enabled, ``sample_rate`` selects the fraction of frames whose spans are
+kept, and the collected events can be exported in the Chrome trace event
+format understood by ``chrome://tracing`` and Perfetto.  Events drained
+from other processes, such as API workers, can be merged in and are shown
+under their own process id.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Tuple
+
+Event = Tuple[str, int, int, int, Dict[str, Any]]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc: object) -> None:
+        end = time.perf_counter_ns()
+        self.tracer._events.append(
+            (self.name, self.start, end - self.start, threading.get_ident(), self.args)
+        )
+
+
+class _FrameSpan(_Span):
+    __slots__ = ("sampled", "previous")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any], sampled: bool) -> None:
+        super().__init__(tracer, name, args)
+        self.sampled = sampled
+
+    def __enter__(self) -> None:
+        local = self.tracer._local
+        self.previous = getattr(local, "sampled", True)
+        local.sampled = self.sampled
+        if self.sampled:
+            super().__enter__()
+
+    def __exit__(self, *exc: object) -> None:
+        if self.sampled:
+            super().__exit__(*exc)
+        self.tracer._local.sampled = self.previous
+
+
+class Tracer:
+    """Collect timed spans into a bounded in-memory buffer."""
+
+    def __init__(self, sample_rate: float = 1.0, max_events: int = 200_000) -> None:
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self._events: Deque[Event] = deque(maxlen=max_events)
+        self._merged: Deque[Tuple[int, Event]] = deque(maxlen=max_events)
+        self._local = threading.local()
+        self._frames = 0
+        self._lock = threading.Lock()
+
+    def start(self, sample_rate: float | None = None) -> None:
+        """Enable tracing, keeping roughly ``sample_rate`` of all frames."""
+        if sample_rate is not None:
+            if not 0.0 < sample_rate <= 1.0:
+                raise ValueError("sample_rate must be in (0, 1]")
+            self.sample_rate = sample_rate
+        self.enabled = True
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._merged.clear()
+
+    def __len__(self) -> int:
+        return len(self._events) + len(self._merged)
+
+    def drain(self) -> List[Event]:
+        """Remove and return this process's collected events."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.popleft())
+            except IndexError:
+                return events
+
+    def merge(self, pid: int, events: List[Event]) -> None:
+        """Add events drained from process ``pid``."""
+        self._merged.extend((pid, event) for event in events)
+
+    def _sample(self) -> bool:
+        # deterministic sampling: keep a frame whenever the running total of
+        # sample_rate crosses an integer
+        with self._lock:
+            n = self._frames
+            self._frames += 1
+        return int((n + 1) * self.sample_rate) > int(n * self.sample_rate)
+
+    def frame(self, name: str, **args: Any) -> _NullSpan | _FrameSpan:
+        """Return a context manager timing one frame and deciding sampling.
+
+        Spans nested in an unsampled frame on the same thread are dropped.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _FrameSpan(self, name, args, self._sample())
+
+    def span(self, name: str, **args: Any) -> _NullSpan | _Span:
+        """Return a context manager timing one pipeline stage."""
+        if not self.enabled or not getattr(self._local, "sampled", True):
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the collected events in Chrome trace event format."""
+        own = os.getpid()
+        events: List[Dict[str, Any]] = []
+        threads = set()
+        collected = [(own, event) for event in list(self._events)] + list(self._merged)
+        for pid, (name, start, duration, tid, args) in collected:
+            threads.add((pid, tid))
+            events.append(
+                {
+                    "name": name,
+                    "cat": "piccolo",
+                    "ph": "X",
+                    "ts": start / 1000,
+                    "dur": duration / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for pid, tid in threads:
+            name = names.get(tid, str(tid)) if pid == own else f"worker {pid}"
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str | Path) -> int:
+        """Write the Chrome trace to ``path`` and return the event count."""
+        trace = self.chrome_trace()
+        Path(path).write_text(json.dumps(trace))
+        return len(self)
+
+
+tracer = Tracer()
@@ -1,6 +1,11 @@
+import time
+
 import pytest
 from fastapi.testclient import TestClient
 
+from src.devices import LEDDevice
+from src.favorites import FavoritesManager
+from src.layout import MatrixLayout
 from src.rest_api import RestAPI
 
 
@@ -97,3 +102,312 @@ def test_group_effect(monkeypatch, client):
     assert resp.status_code == 200
     assert resp.json() == {"status": "sent"}
     assert len(calls) == 2
+
+
+def test_effect_params(monkeypatch, client):
+    calls = []
+
+    def dummy_send(self, universe, data):
+        calls.append((self.target_ip, universe, data))
+
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", dummy_send)
+
+    client.post("/devices", json={"name": "dev1", "ip": "1.2.3.4", "pixel_count": 2})
+    resp = client.post(
+        "/devices/dev1/effect",
+        params={"effect": "cycle", "step": 0},
+        json={"colors": [[1, 2, 3]]},
+    )
+    assert resp.status_code == 200
+    assert calls[-1][2] == b"\x01\x02\x03\x01\x02\x03"
+    resp = client.post(
+        "/devices/dev1/effect", params={"effect": "wave"}, json={"bogus": 1}
+    )
+    assert resp.status_code == 400
+    names = [e["name"] for e in client.get("/effects").json()]
+    assert {"cycle", "wave", "flicker"} <= set(names)
+
+
+def test_device_layout_effect(monkeypatch, client):
+    calls = []
+
+    def dummy_send(self, universe, data):
+        calls.append((self.target_ip, universe, data))
+
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", dummy_send)
+
+    resp = client.post(
+        "/devices",
+        json={
+            "name": "wall",
+            "ip": "1.2.3.4",
+            "pixel_count": 16,
+            "layout": {"width": 4, "height": 4, "serpentine": True},
+        },
+    )
+    assert resp.status_code == 200
+    assert client.get("/devices").json()[0]["layout"]["width"] == 4
+    resp = client.post("/devices/wall/effect", params={"effect": "plasma", "step": 2})
+    assert resp.status_code == 200
+    assert len(calls[-1][2]) == 48
+    bad = {"name": "bad", "ip": "1.2.3.5", "pixel_count": 4, "layout": {"width": 4, "height": 4}}
+    assert client.post("/devices", json=bad).status_code == 400
+    # devices added without the endpoint's checks fail with 400, not 500
+    api = RestAPI()
+    api.devices["bad"] = LEDDevice("bad", "1.2.3.5", 4, layout=MatrixLayout(4, 4))
+    resp = TestClient(api.app).post("/devices/bad/effect", params={"effect": "plasma"})
+    assert resp.status_code == 400
+
+
+def test_record_and_playback(monkeypatch, client, tmp_path):
+    calls = []
+
+    def dummy_send(self, universe, data):
+        calls.append((self.target_ip, universe, bytes(data)))
+
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", dummy_send)
+
+    client.post("/devices", json={"name": "dev1", "ip": "1.2.3.4", "pixel_count": 2, "universe": 3})
+    path = str(tmp_path / "show.rec")
+    assert client.post("/recording", json={"path": path}).status_code == 200
+    client.post("/devices/dev1/color", json={"r": 1, "g": 2, "b": 3})
+    assert client.delete("/recording").json()["frames"] == 1
+    recorded = list(calls)
+    calls.clear()
+
+    resp = client.post("/playback", json={"path": path})
+    assert resp.status_code == 200
+    deadline = time.monotonic() + 2
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert calls == recorded
+    assert client.post("/playback/seek", params={"position": 0}).status_code == 200
+    assert client.delete("/playback").json() == {"status": "stopped"}
+    assert client.get("/playback").status_code == 404
+    bad = client.post("/recording", json={"path": str(tmp_path / "missing" / "x.rec")})
+    assert bad.status_code == 400
+    assert client.post("/playback", json={"path": str(tmp_path)}).status_code == 400
+    assert client.post("/playback", json={"path": str(tmp_path / "nope.rec")}).status_code == 404
+
+
+def test_ddp_device(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.DDPClient.send_frame",
+        lambda self, universe, data: calls.append((self.target_ip, universe, data)),
+    )
+    resp = client.post(
+        "/devices",
+        json={"name": "long", "ip": "1.2.3.4", "pixel_count": 1000, "protocol": "ddp"},
+    )
+    assert resp.status_code == 200
+    client.post("/devices/long/color", json={"r": 1, "g": 2, "b": 3})
+    assert calls == [("1.2.3.4", 0, b"\x01\x02\x03" * 1000)]
+    resp = client.post(
+        "/devices", json={"name": "x", "ip": "1.2.3.5", "pixel_count": 1, "protocol": "osc"}
+    )
+    assert resp.status_code == 400
+
+
+def test_sacn_group_sends_once_per_universe(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.E131Client.send_frame",
+        lambda self, universe, data: calls.append((universe, data)),
+    )
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", lambda *args: None)
+    for i in range(3):
+        client.post(
+            "/devices",
+            json={"name": f"d{i}", "ip": f"1.2.3.{i}", "pixel_count": 2, "universe": 4},
+        )
+    segments = [{"device": f"d{i}", "start": 0, "length": 2} for i in range(3)]
+    resp = client.post("/groups", json={"name": "g", "segments": segments, "protocol": "sacn"})
+    assert resp.status_code == 200
+    client.post("/groups/g/color", json={"r": 9, "g": 9, "b": 9})
+    assert calls == [(4, b"\x09" * 6)]
+    client.post("/groups/g/command", json={"universe": 1, "data": "ff"})
+    assert calls[-1] == (5, b"\xff") and len(calls) == 2
+
+
+def test_sacn_priority_per_device_and_group(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.E131Client.send_frame",
+        lambda self, universe, data: calls.append((self.priority, universe)),
+    )
+    for i, priority in enumerate((150, 100)):
+        resp = client.post(
+            "/devices",
+            json={
+                "name": f"d{i}",
+                "ip": f"1.2.3.{i}",
+                "pixel_count": 1,
+                "universe": i,
+                "protocol": "sacn",
+                "priority": priority,
+            },
+        )
+        assert resp.status_code == 200
+    client.post("/devices/d0/color", json={"r": 1, "g": 1, "b": 1})
+    client.post("/devices/d1/color", json={"r": 1, "g": 1, "b": 1})
+    assert calls == [(150, 0), (100, 1)]
+    segments = [{"device": f"d{i}", "start": 0, "length": 1} for i in range(2)]
+    client.post("/groups", json={"name": "g", "segments": segments, "priority": 190})
+    client.post("/groups/g/color", json={"r": 2, "g": 2, "b": 2})
+    assert calls[2:] == [(190, 0), (190, 1)]
+    bad = client.post("/groups", json={"name": "h", "segments": segments, "priority": 300})
+    assert bad.status_code == 422
+
+
+def test_running_effect_loop(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append(data),
+    )
+    client.post("/devices", json={"name": "d", "ip": "1.2.3.4", "pixel_count": 4})
+    resp = client.post("/devices/d/effect/run", params={"effect": "nope"})
+    assert resp.status_code == 400
+    resp = client.post("/devices/d/effect/run", params={"effect": "cycle"})
+    assert resp.json() == {"status": "running"}
+    deadline = time.monotonic() + 2
+    while len(calls) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    status = client.get("/loop").json()
+    assert status["running"] and status["frames"] >= 4
+    assert status["effects"][0]["effect"] == "cycle"
+    assert client.delete("/devices/d/effect/run").json() == {"status": "stopped"}
+    assert not client.get("/loop").json()["running"]
+    assert client.delete("/devices/d/effect/run").status_code == 404
+    assert client.get("/audio").status_code == 404
+
+
+def test_binary_command(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append((self.target_ip, universe, bytes(data))),
+    )
+    client.post("/devices", json={"name": "a", "ip": "1.1.1.1", "pixel_count": 200, "universe": 2})
+    client.post("/devices", json={"name": "b", "ip": "1.1.1.2", "pixel_count": 200})
+    segments = [{"device": d, "start": 0, "length": 200} for d in "ab"]
+    client.post("/groups", json={"name": "g", "segments": segments})
+    binary = {"Content-Type": "application/octet-stream"}
+
+    resp = client.post("/devices/a/command?universe=1", content=b"\x01\x02\x03", headers=binary)
+    assert resp.json() == {"status": "sent"}
+    client.post("/devices/a/command", content=b"\x04", headers={**binary, "X-Universe": "3"})
+    assert calls == [("1.1.1.1", 3, b"\x01\x02\x03"), ("1.1.1.1", 5, b"\x04")]
+
+    calls.clear()
+    frame = bytes(range(256)) * 3  # spills into a second universe
+    client.post("/groups/g/command", content=frame, headers={**binary, "X-Offset": "510"})
+    assert calls == [
+        ("1.1.1.1", 3, frame[:510]),
+        ("1.1.1.1", 4, frame[510:]),
+        ("1.1.1.2", 1, frame[:510]),
+        ("1.1.1.2", 2, frame[510:]),
+    ]
+
+    resp = client.post("/devices/a/command?offset=3", content=b"\x00", headers=binary)
+    assert resp.status_code == 400
+    resp = client.post("/devices/a/command", json={"data": "zz"})
+    assert resp.status_code == 400
+    assert client.post("/devices/a/command", json={"universe": 1}).status_code == 422
+
+
+def test_multi_universe_command(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append((universe, bytes(data))),
+    )
+    client.post("/devices", json={"name": "a", "ip": "1.1.1.1", "pixel_count": 10, "universe": 1})
+    body = b"\x00\x00\x00\x02ab" + b"\x00\x04\x00\x01c"
+    resp = client.post(
+        "/devices/a/command/multi",
+        content=body,
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert resp.json() == {"status": "sent", "universes": 2}
+    assert calls == [(1, b"ab"), (5, b"c")]
+    resp = client.post(
+        "/devices/a/command/multi",
+        content=body[:-1],
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert resp.status_code == 400
+    assert client.post("/devices/a/command/multi", json={}).status_code == 415
+
+
+def test_ddp_byte_offset(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.DDPClient.send_frame",
+        lambda self, universe, data, offset=0: calls.append((universe, offset, bytes(data))),
+    )
+    client.post(
+        "/devices", json={"name": "d", "ip": "1.1.1.1", "pixel_count": 400, "protocol": "ddp"}
+    )
+    client.post(
+        "/devices/d/command?offset=513",
+        content=b"\x07\x08\x09",
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert calls == [(1, 3, b"\x07\x08\x09")]
+
+
+def test_palettes_from_favorites(monkeypatch, tmp_path):
+    calls = []
+
+    def dummy_send(self, universe, data):
+        calls.append(bytes(data))
+
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", dummy_send)
+    api = RestAPI()
+    api.favorites = FavoritesManager(tmp_path / "favorites.json")
+    client = TestClient(api.app)
+    client.post("/favorites", json={"name": "red", "r": 255, "g": 0, "b": 0})
+    client.post("/favorites", json={"name": "blue", "r": 0, "g": 0, "b": 255})
+    client.post("/devices", json={"name": "dev1", "ip": "1.2.3.4", "pixel_count": 2})
+
+    resp = client.post("/palettes", json={"name": "mine", "favorites": ["red", "blue"]})
+    assert resp.status_code == 200
+    names = {p["name"]: p for p in client.get("/palettes").json()}
+    assert names["mine"]["stops"] == [[0.0, [255, 0, 0]], [1.0, [0, 0, 255]]]
+    assert names["fire"]["builtin"]
+    resp = client.post(
+        "/devices/dev1/effect",
+        params={"effect": "gradient"},
+        json={"palette": "mine", "wavelength": 2},
+    )
+    assert resp.status_code == 200
+    assert calls[-1] == bytes([255, 0, 0, 127, 0, 128])
+
+    assert client.post("/palettes", json={"name": "x", "favorites": ["nope"]}).status_code == 404
+    assert client.post("/palettes", json={"name": "x"}).status_code == 400
+    assert client.post("/palettes", json={"name": "fire", "stops": ["#000000"]}).status_code == 400
+    assert client.delete("/palettes/fire").status_code == 400
+    assert client.delete("/palettes/mine").status_code == 200
+    assert client.delete("/palettes/mine").status_code == 404
+
+
+def test_group_segments_same_start_different_lengths(monkeypatch, client):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append(bytes(data)),
+    )
+    client.post("/devices", json={"name": "dev1", "ip": "1.2.3.4", "pixel_count": 10})
+    client.post("/devices", json={"name": "g1", "ip": "1.2.3.5", "pixel_count": 2})
+    for name, length in (("short", 5), ("long", 10)):
+        segments = [{"device": "dev1", "start": 0, "length": length}]
+        client.post("/groups", json={"name": name, "segments": segments})
+        resp = client.post(f"/groups/{name}/effect", params={"effect": "wave"})
+        assert resp.status_code == 200
+    assert len(calls) == 2 and len(calls[1]) == 30
+    # group engines do not collide with devices named like a group
+    assert client.post("/devices/g1/effect", params={"effect": "wave"}).status_code == 200
+    bad = {"name": "m", "ip": "1.2.3.6", "pixel_count": 2, "layout": {"coords": [[0, 0], [-1, 0]]}}
+    assert client.post("/devices", json=bad).status_code == 400
@@ -0,0 +1,125 @@
+import time
+import wave
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.audio import AudioFeed, AudioInput, BandAnalyzer, audio_feed, open_source
+from src.effects import EffectEngine
+from src.render_loop import RenderLoop
+from src.rest_api import RestAPI
+
+
+def _tone(freq, seconds=0.5, rate=44100, amplitude=0.5):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _write_wav(path, samples, rate=44100):
+    with wave.open(str(path), "wb") as fh:
+        fh.setnchannels(1)
+        fh.setsampwidth(2)
+        fh.setframerate(rate)
+        fh.writeframes((samples * 32767).astype("<i2").tobytes())
+
+
+def test_analyzer_finds_tone_band():
+    analyzer = BandAnalyzer(44100, block_size=1024, bands=16)
+    low = analyzer.process(_tone(60)[:1024])
+    high = analyzer.process(_tone(8000)[:1024])
+    assert int(np.argmax(low.bands)) < 3
+    assert int(np.argmax(high.bands)) > 12
+    assert high.level == pytest.approx(0.5, abs=0.05)
+
+
+def test_analyzer_detects_beat():
+    analyzer = BandAnalyzer(44100, block_size=1024, bands=16)
+    silence = np.zeros(1024, dtype=np.float32)
+    kick = _tone(60)[:1024]
+    assert not analyzer.process(kick * 0.01).beat
+    for _ in range(3):
+        analyzer.process(silence + 1e-3)
+    assert analyzer.process(kick).beat
+
+
+def test_wav_input_drives_effects(tmp_path):
+    path = tmp_path / "tone.wav"
+    _write_wav(path, _tone(440, seconds=0.2))
+    source = open_source(str(path))
+    feed_done = []
+    audio = AudioInput(source, block_size=512, on_end=lambda: feed_done.append(True))
+    audio.start()
+    deadline = time.monotonic() + 2
+    while not feed_done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    try:
+        assert audio.stats()["blocks"] == 17
+        engine = EffectEngine(20)
+        vu = engine.render("vu", 0, {})
+        assert vu[:5].any() and not vu[-1].any()
+        spectrum = engine.render("spectrum", 0, {})
+        assert spectrum.any()
+        assert engine.render("beat", 0, {}).shape == (20, 3)
+    finally:
+        audio.stop()
+    assert audio_feed.latest() is None
+
+
+def test_feed_latency():
+    feed = AudioFeed()
+    feed.mark_output()
+    assert feed.stats()["blocks_output"] == 0
+    analyzer = BandAnalyzer(44100)
+    feed.publish(analyzer.process(_tone(440)[:1024]))
+    assert feed.latest() is not None
+    feed.mark_output()
+    feed.mark_output()
+    assert feed.stats()["blocks_output"] == 1
+
+
+def test_feed_latency_once_per_block():
+    engine = EffectEngine(10)
+    audio_feed.reset_stats()
+    audio_feed.publish(BandAnalyzer(44100).process(_tone(440)[:1024]))
+    try:
+        for step in range(5):
+            # every frame renders from the one published block
+            engine.render("vu", step, {})
+            audio_feed.mark_output()
+            time.sleep(0.01)
+        stats = audio_feed.stats()
+        assert stats["blocks_output"] == 1
+        assert stats["latency_ms_max"] == stats["latency_ms_last"] < 30
+        audio_feed.publish(BandAnalyzer(44100).process(_tone(440)[:1024]))
+        engine.render("vu", 5, {})
+        audio_feed.mark_output()
+        assert audio_feed.stats()["blocks_output"] == 2
+    finally:
+        audio_feed.clear()
+        audio_feed.reset_stats()
+
+
+def test_render_loop_ticks():
+    steps = []
+    loop = RenderLoop(steps.append, fps=200)
+    loop.start()
+    time.sleep(0.1)
+    loop.stop()
+    assert steps[:3] == [0, 1, 2]
+    stats = loop.stats()
+    assert stats["frames"] == len(steps) and not stats["running"]
+    # a restarted loop reports the rate of the current run only
+    time.sleep(0.1)
+    loop.start()
+    time.sleep(0.05)
+    stats = loop.stats()
+    loop.stop()
+    assert stats["actual_fps"] < 300
+
+
+def test_audio_endpoint_validates_format():
+    client = TestClient(RestAPI().app)
+    for field in ("sample_rate", "channels", "block_size", "bands"):
+        resp = client.post("/audio", json={"source": "-", field: 0})
+        assert resp.status_code == 422
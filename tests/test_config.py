@@ -1,6 +1,8 @@
 import builtins
 from pathlib import Path
 
+import pytest
+
 from src.config import load_config
 from src.devices import LEDDevice
 
@@ -19,3 +21,22 @@ def test_load_config(tmp_path):
     assert first.ip == "192.168.1.50"
     assert first.pixel_count == 150
     assert first.universe == 0
+
+
+def test_load_config_validates_devices(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        "devices:\n  - {name: a, ip: 1.2.3.4, pixel_count: 1, protocol: sacn, priority: 150}\n"
+    )
+    assert load_config(path).devices[0].priority == 150
+    path.write_text("devices:\n  - {name: a, ip: 1.2.3.4, pixel_count: 1, protocol: artnt}\n")
+    with pytest.raises(ValueError, match="artnt"):
+        load_config(path)
+    path.write_text("devices:\n  - {name: a, ip: 1.2.3.4, pixel_count: 1, priority: 201}\n")
+    with pytest.raises(ValueError):
+        load_config(path)
+    path.write_text(
+        "devices:\n  - {name: a, ip: 1.2.3.4, pixel_count: 4, layout: {width: 4, height: 4}}\n"
+    )
+    with pytest.raises(ValueError, match="pixel count"):
+        load_config(path)
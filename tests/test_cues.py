@@ -0,0 +1,137 @@
+import socket
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.cues import CuePlayer, build_timecode, parse_cue_list, parse_timecode
+from src.rest_api import RestAPI
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+SHOW = {
+    "scenes": {"intro": [{"device": "a", "color": "#ff0000"}, {"group": "g", "effect": "wave"}]},
+    "cues": [
+        {"time": 2.0, "device": "a", "color": [0, 0, 255], "fade": 0.2},
+        {"time": 0.0, "scene": "intro"},
+        {"time": 1.0, "device": "a", "color": [0, 255, 0]},
+    ],
+}
+
+
+def test_parse_cue_list():
+    cues = parse_cue_list(SHOW)
+    assert [c.time for c in cues] == [0.0, 1.0, 2.0]
+    assert [a.key for a in cues[0].actions] == ["device:a", "group:g"]
+    assert cues[1].actions[0].params == {"colors": [[0, 255, 0]]}
+    with pytest.raises(ValueError):
+        parse_cue_list({"cues": [{"time": 0, "scene": "missing"}]})
+    with pytest.raises(ValueError):
+        parse_cue_list({"cues": [{"time": 0, "device": "a"}]})
+
+
+def test_player_fires_on_nearest_frame_and_seeks():
+    clock = FakeClock()
+    fired = []
+
+    def fire(actions, fade):
+        fired.append(([a.params for a in actions], fade))
+
+    player = CuePlayer(parse_cue_list(SHOW), fire, clock=clock)
+    player.start()
+    assert player.tick(0.1) == 1
+    clock.now += 0.96  # within half a frame of the cue at 1.0
+    assert player.tick(0.1) == 1
+    assert player.tick(0.1) == 0
+    player.pause()
+    clock.now += 5
+    assert player.position() == pytest.approx(0.96)
+    assert player.stats(0.1)["jitter_ms_max"] == pytest.approx(40)
+    fired.clear()
+    player.seek(1.5)
+    # state up to 1.5 is restored without fades
+    assert fired == [([{"colors": [[0, 255, 0]]}, None], 0.0)]
+    player.start()
+    clock.now += 0.5
+    assert player.tick(0.1) == 1 and fired[-1][1] == 0.2
+
+
+def test_player_chases_timecode():
+    clock = FakeClock()
+    player = CuePlayer(parse_cue_list(SHOW), lambda actions, fade: None, clock=clock)
+    player.sync(1.5)
+    assert player.playing and player.position() == pytest.approx(1.5)
+    clock.now += 0.5
+    player.sync(2.02)  # small drift keeps the local clock
+    assert player.position() == pytest.approx(2.0)
+    player.sync(0.5)  # jumping back re-arms earlier cues
+    assert player.tick(0.0) == 0 and player.stats()["next_cue"] == 1.0
+    clock.now += 2
+    player.tick(0.0)
+    assert not player.playing
+
+
+def test_timecode_packets():
+    assert parse_timecode(build_timecode(3723.4, kind=1)) == pytest.approx(3723.4)
+    assert parse_timecode(build_timecode(10.5, kind=3)) == pytest.approx(10.5)
+    assert parse_timecode(b"Art-Net\x00\x00\x50" + bytes(9)) is None
+    # 00:10:00;00 drop-frame is 17982 frames at 29.97 fps
+    packet = build_timecode(0, kind=3)[:14] + bytes((0, 0, 10, 0, 2))
+    assert parse_timecode(packet) == pytest.approx(17982 * 1001 / 30000)
+
+
+def test_cue_endpoints(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append((self.target_ip, bytes(data))),
+    )
+    api = RestAPI()
+    client = TestClient(api.app)
+    client.post("/devices", json={"name": "a", "ip": "1.2.3.4", "pixel_count": 2})
+    client.post("/devices", json={"name": "b", "ip": "1.2.3.5", "pixel_count": 2})
+    client.post(
+        "/groups",
+        json={"name": "g", "segments": [{"device": "b", "start": 0, "length": 2}]},
+    )
+    assert client.get("/cues").status_code == 404
+    bad = {"cues": [{"time": 0, "device": "nope", "color": "#ffffff"}]}
+    assert client.post("/cues", json=bad).status_code == 404
+    assert client.post("/cues", json={"cues": [{"time": 0}]}).status_code == 400
+    try:
+        assert client.post("/cues", json=SHOW).json()["cues"] == 3
+        client.post("/cues/seek", params={"position": 1.9})
+        client.post("/cues/start")
+        time.sleep(0.6)
+        status = client.get("/cues").json()
+        assert status["fired"] == 1
+        assert status["jitter_ms_max"] <= status["frame_period_ms"]
+        sent = [data for ip, data in calls if ip == "1.2.3.4"]
+        assert sent[0] == b"\x00\xff\x00" * 2
+        # fading from green to blue passes through a mix of both
+        assert any(d[1] and d[2] for d in sent)
+        assert sent[-1] == b"\x00\x00\xff" * 2
+
+        resp = client.post("/cues/timecode", params={"port": 0})
+        port = resp.json()["port"]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(build_timecode(0.4), ("127.0.0.1", port))
+        deadline = time.monotonic() + 1
+        while client.get("/cues").json()["position"] > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.get("/cues").json()["position"] < 1
+        assert client.delete("/cues/timecode").json()["packets"] == 1
+    finally:
+        client.delete("/cues")
+    # the look of the last cues keeps running until stopped
+    assert api.loop.running
+    client.delete("/devices/a/effect/run")
+    client.delete("/groups/g/effect/run")
+    assert not api.loop.running
@@ -0,0 +1,130 @@
+import asyncio
+import importlib.util
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.discovery import (
+    ArtNetDiscovery,
+    build_artpoll,
+    build_artpollreply,
+    parse_artpollreply,
+)
+from src.rest_api import RestAPI
+
+
+class LoopbackNode:
+    """Stand-in Art-Net node answering ArtPoll on a loopback port."""
+
+    def __init__(self, name="node1", universes=(0, 1)):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.05)
+        self.port = self.sock.getsockname()[1]
+        self.reply = build_artpollreply("127.0.0.1", list(universes), name)
+        self.answer = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data, addr = self.sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            if self.answer and data == build_artpoll():
+                self.sock.sendto(self.reply, addr)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+
+@pytest.fixture
+def node():
+    n = LoopbackNode()
+    yield n
+    n.close()
+
+
+def _discovery(node, **kwargs):
+    return ArtNetDiscovery(
+        targets=["127.0.0.1"], port=node.port, listen_port=0, timeout=0.2, **kwargs
+    )
+
+
+def test_reply_roundtrip():
+    parsed = parse_artpollreply(build_artpollreply("10.0.0.7", [17, 18], "pi"))
+    assert parsed.ip == "10.0.0.7"
+    assert parsed.short_name == "pi"
+    assert parsed.universes == [17, 18]
+
+
+def test_pi_service_reply_parses():
+    path = Path("firmware/rpi_artnet_service/artnet_service.py")
+    spec = importlib.util.spec_from_file_location("artnet_service", path)
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    assert service._is_artpoll(build_artpoll())
+    replies = service._build_artpollreplies("10.0.0.9", 6, "pi")
+    nodes = [parse_artpollreply(r) for r in replies]
+    assert [n.universes for n in nodes] == [[0, 1, 2, 3], [4, 5]]
+
+
+def test_poll_marks_offline(node):
+    discovery = _discovery(node, miss_limit=1)
+    replies = asyncio.run(discovery.poll())
+    assert replies["127.0.0.1"].universes == [0, 1]
+    assert discovery.is_online("127.0.0.1")
+    node.answer = False
+    asyncio.run(discovery.poll())
+    assert discovery.is_online("127.0.0.1") is False
+    assert discovery.is_online("10.9.9.9") is None
+
+
+def test_api_poll_and_register(node, monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx", lambda self, u, d: sent.append(self.target_ip)
+    )
+    api = RestAPI()
+    api.discovery = _discovery(node, miss_limit=1, on_poll=api._apply_discovery)
+    client = TestClient(api.app)
+    nodes = client.post("/discovery/poll").json()
+    assert nodes[0]["short_name"] == "node1" and nodes[0]["online"]
+    assert client.post("/discovery/register", json={}).json() == {"registered": ["node1"]}
+    assert api.devices["node1"].pixel_count == 340
+
+    node.answer = False
+    client.post("/discovery/poll")
+    assert client.get("/devices").json()[0]["online"] is False
+    client.post("/devices/node1/color", json={"r": 1, "g": 1, "b": 1})
+    assert sent == []
+
+
+def test_poll_falls_back_when_port_taken(node, monkeypatch):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as taken:
+        taken.bind(("", 0))
+        discovery = _discovery(node)
+        discovery.listen_port = taken.getsockname()[1]
+        assert "127.0.0.1" in asyncio.run(discovery.poll())
+
+    def fail():
+        raise OSError("Network is unreachable")
+
+    monkeypatch.setattr(discovery, "_socket", fail)
+    discovery.start(interval=0.01)
+    time.sleep(0.05)
+    # failed polls are logged and the thread keeps polling
+    assert discovery._thread.is_alive()
+    discovery.stop()
+    api = RestAPI()
+    api.discovery = discovery
+    resp = TestClient(api.app).post("/discovery/poll")
+    assert resp.status_code == 503 and "unreachable" in resp.json()["detail"]
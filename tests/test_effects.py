@@ -1,4 +1,8 @@
-from src.effects import EffectEngine, Color
+import numpy as np
+import pytest
+
+from src.effects import Color, EffectEngine, EffectParam, EffectRegistry
+from src.palettes import make_stops, palette_lut
 
 
 def test_color_cycle():
@@ -14,3 +18,66 @@ def test_to_bytes():
     frame = [Color(1, 2, 3), Color(4, 5, 6)]
     data = EffectEngine.to_bytes(frame)
     assert data == b"\x01\x02\x03\x04\x05\x06"
+
+
+def test_render_matches_legacy_wave():
+    eng = EffectEngine(5)
+    frame = eng.render("wave", 1)
+    legacy = EffectEngine.to_bytes(eng.wave(Color(255, 255, 255), 20, 1))
+    assert EffectEngine.to_bytes(frame) == legacy
+
+
+def test_render_params_and_cache():
+    eng = EffectEngine(4)
+    first = eng.render("cycle", 1, {"colors": ["#ff0000", [0, 0, 9]]})
+    assert first[0].tolist() == [0, 0, 9]
+    again = eng.render("cycle", 3, {"colors": ["#ff0000", [0, 0, 9]]})
+    assert again is first
+
+
+def test_register_custom_effect():
+    reg = EffectRegistry()
+
+    @reg.effect("ramp", params=(EffectParam("scale", "int", 1, minimum=1),))
+    def _ramp(out, step, params, state):
+        out[:, 0] = np.arange(out.shape[0]) * params["scale"]
+
+    eng = EffectEngine(3, effects=reg)
+    assert eng.render("ramp", 0, {"scale": 2})[:, 0].tolist() == [0, 2, 4]
+    with pytest.raises(ValueError):
+        eng.render("ramp", 0, {"scale": 0})
+    with pytest.raises(KeyError):
+        eng.render("wave", 0)
+
+
+def test_palette_lut_and_gradient():
+    stops = ((0.0, (0, 0, 0)), (1.0, (255, 0, 255)))
+    lut = palette_lut(stops)
+    assert lut.shape == (256, 3)
+    assert lut[0].tolist() == [0, 0, 0] and lut[-1].tolist() == [255, 0, 255]
+    assert not lut.flags.writeable
+    eng = EffectEngine(4)
+    frame = eng.render("gradient", 1, {"palette": [[0, "#000000"], [1, "#ff00ff"]], "wavelength": 4})
+    assert frame.tolist() == lut[[64, 128, 192, 0]].tolist()
+    # evenly spaced colours and named palettes resolve to stops too
+    assert eng.render("gradient", 0, {"palette": ["#ff0000", "#0000ff"]})[0].tolist() == [255, 0, 0]
+    with pytest.raises(ValueError):
+        eng.render("gradient", 0, {"palette": "missing"})
+
+
+def test_noise_and_fire():
+    eng = EffectEngine(30)
+    assert np.array_equal(eng.render("noise", 5), eng.render("noise", 5))
+    for step in range(20):
+        frame = eng.render("fire", step, {"sparking": 1.0})
+    assert frame.shape == (30, 3)
+    assert frame[:7].any()
+
+
+def test_hard_edge_palette_keeps_stop_order():
+    white, black = (255, 255, 255), (0, 0, 0)
+    stops = make_stops([(1, black), (0, white), (0.5, white), (0.5, black)])
+    assert stops == ((0.0, white), (0.5, white), (0.5, black), (1.0, black))
+    lut = palette_lut(stops)
+    assert lut[:128].tolist() == [list(white)] * 128
+    assert lut[128:].tolist() == [list(black)] * 128
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from src.effects import EffectEngine
+from src.layout import MatrixLayout
+
+
+def test_serpentine_index_map():
+    layout = MatrixLayout(3, 2, serpentine=True)
+    assert layout.index_map.tolist() == [0, 1, 2, 5, 4, 3]
+
+
+def test_rotation_index_map():
+    layout = MatrixLayout(3, 2, rotation=180)
+    assert layout.index_map.tolist() == [5, 4, 3, 2, 1, 0]
+    layout = MatrixLayout(3, 2, rotation=90)
+    # native panel is 2 wide and 3 tall, first row maps down the right edge
+    assert layout.index_map.tolist()[:2] == [2, 5]
+
+
+def test_coords_layout_gather():
+    layout = MatrixLayout.from_dict({"coords": [[1, 1], [0, 0]]})
+    assert (layout.width, layout.height) == (2, 2)
+    canvas = np.arange(12, dtype=np.uint8).reshape(2, 2, 3)
+    assert layout.to_wire(canvas).tolist() == [[9, 10, 11], [0, 1, 2]]
+    with pytest.raises(ValueError):
+        MatrixLayout(2, 2, rotation=45)
+    with pytest.raises(ValueError):
+        MatrixLayout(2, 2, coords=[(0, 0), (2, 1)])
+
+
+def test_2d_effect_requires_layout():
+    with pytest.raises(ValueError):
+        EffectEngine(4).render("plasma", 0)
+    engine = EffectEngine(5, layout=MatrixLayout(2, 2, serpentine=True))
+    frame = engine.render("plasma", 0)
+    assert frame.shape == (5, 3)
+    assert frame[4].tolist() == [0, 0, 0]
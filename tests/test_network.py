@@ -1,4 +1,9 @@
-from src.network import ArtNetClient
+import importlib.util
+import json
+import socket
+from pathlib import Path
+
+from src.network import ArtNetClient, DDPClient, E131Client
 
 
 def test_build_packet():
@@ -17,3 +22,99 @@ def test_build_packet():
     # Payload length big endian
     assert packet[16:18] == b"\x00\x03"
     assert packet[18:] == data
+
+
+def test_send_frame_splits_universes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ArtNetClient, "send_dmx", lambda self, u, d: calls.append((u, len(d))))
+    ArtNetClient("127.0.0.1").send_frame(2, b"\x00" * 1200)
+    assert calls == [(2, 510), (3, 510), (4, 180)]
+
+
+def test_ddp_packet():
+    client = DDPClient("127.0.0.1")
+    packet = client._build_packet(1440, b"\x01\x02\x03", push=True)
+    # version 1 with push flag, RGB 8-bit data type, default destination
+    assert packet[0] == 0x41
+    assert packet[2:4] == b"\x0b\x01"
+    assert packet[4:8] == (1440).to_bytes(4, "big")
+    assert packet[8:10] == b"\x00\x03"
+    assert packet[10:] == b"\x01\x02\x03"
+
+
+def test_ddp_send_frame_offsets():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1)
+    client = DDPClient("127.0.0.1", port=receiver.getsockname()[1])
+    try:
+        client.send_frame(0, bytes(range(256)) * 12)  # 1024 pixels
+        packets = [receiver.recv(2048) for _ in range(3)]
+    finally:
+        client.close()
+        receiver.close()
+    offsets = [int.from_bytes(p[4:8], "big") for p in packets]
+    assert offsets == [0, 1440, 2880]
+    assert [p[0] & 0x01 for p in packets] == [0, 0, 1]
+    assert len(packets[2]) == 10 + 3072 - 2880
+
+
+def test_e131_packet_and_sequence():
+    client = E131Client(source_name="test", priority=150)
+    first = client._build_packet(0, b"\x01\x02\x03")
+    assert first[4:16] == b"ASC-E1.17\x00\x00\x00"
+    assert first[44:48] == b"test"
+    assert first[108] == 150
+    # piccolo universe 0 is sACN universe 1
+    assert first[113:115] == b"\x00\x01"
+    assert first[123:125] == b"\x00\x04"
+    assert first[125:] == b"\x00\x01\x02\x03"
+    second = client._build_packet(0, b"")
+    other = client._build_packet(5, b"")
+    assert (first[111], second[111], other[111]) == (0, 1, 0)
+    assert E131Client.multicast_group(300) == "239.255.1.44"
+
+
+def test_pi_service_parses_e131():
+    path = Path("firmware/rpi_artnet_service/artnet_service.py")
+    spec = importlib.util.spec_from_file_location("artnet_service", path)
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    packet = E131Client()._build_packet(2, b"\x07\x08\x09")
+    assert service._parse_e131(packet) == (3, 0, b"\x07\x08\x09")
+    assert not service._e131_in_order(10, 9)
+    assert service._e131_in_order(255, 0)
+
+
+def test_pi_service_parses_ddp():
+    path = Path("firmware/rpi_artnet_service/artnet_service.py")
+    spec = importlib.util.spec_from_file_location("artnet_service", path)
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    client = DDPClient("127.0.0.1")
+    packet = client._build_packet(1530, b"\x01\x02\x03", push=True)
+    assert packet[0] == 0x41
+    assert service._parse_ddp(packet) == (1530, True, b"\x01\x02\x03")
+    assert service._parse_ddp(client._build_packet(0, b"\x04", push=False)) == (0, False, b"\x04")
+    # the timecode flag adds four header bytes before the data
+    timed = bytes((0x50,)) + packet[1:10] + b"\x00" * 4 + packet[10:]
+    assert service._parse_ddp(timed) == (1530, False, b"\x01\x02\x03")
+    # truncated headers or data, queries and other versions are rejected
+    assert service._parse_ddp(packet[:9]) is None
+    assert service._parse_ddp(packet[:-1]) is None
+    assert service._parse_ddp(bytes((0x42,)) + packet[1:]) is None
+    assert service._parse_ddp(bytes((0x81,)) + packet[1:]) is None
+
+
+def test_pi_service_tracer_is_bounded(tmp_path):
+    path = Path("firmware/rpi_artnet_service/artnet_service.py")
+    spec = importlib.util.spec_from_file_location("artnet_service", path)
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    tracer = service._Tracer(max_events=3)
+    for name in "abcde":
+        with tracer.span(name):
+            pass
+    assert [e["name"] for e in tracer.events] == ["c", "d", "e"]
+    tracer.export(str(tmp_path / "trace.json"))
+    assert len(json.loads((tmp_path / "trace.json").read_text())["traceEvents"]) == 3
@@ -0,0 +1,176 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.favorites import FavoritesManager
+from src.output_engine import EngineClient, FrameBuffers, OutputEngine
+from src.rest_api import RestAPI
+from src.tracing import tracer
+
+
+@pytest.fixture
+def engine(tmp_path):
+    buffers = FrameBuffers.create(workers=2, slots=4, slot_size=64)
+    engine = OutputEngine(RestAPI(), buffers, str(tmp_path / "engine.sock"), b"secret")
+    engine.start()
+    yield engine
+    engine.stop()
+    buffers.close()
+
+
+def _worker(engine):
+    client = EngineClient(engine.address, engine.authkey)
+    return client, TestClient(RestAPI(engine=client).app)
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_frame_buffers_detect_reused_slots():
+    buffers = FrameBuffers.create(workers=1, slots=2, slot_size=8)
+    try:
+        first = buffers.write(0, b"abc")
+        assert buffers.read(0, *first) == b"abc"
+        buffers.write(0, b"def")
+        buffers.write(0, b"ghi")  # wraps onto the first slot
+        assert buffers.read(0, *first) is None
+        assert buffers.write(0, b"x" * 9) is None
+        attached = FrameBuffers.attach(buffers.name)
+        assert attached.slots == 2 and attached.read(0, *buffers.write(0, b"zz")) == b"zz"
+        attached.close()
+    finally:
+        buffers.close()
+
+
+def test_workers_share_one_engine(monkeypatch, engine, tmp_path):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append((self.target_ip, universe, data)),
+    )
+    conn_a, worker_a = _worker(engine)
+    conn_b, worker_b = _worker(engine)
+    try:
+        resp = worker_a.post(
+            "/devices", json={"name": "d", "ip": "1.2.3.4", "pixel_count": 2, "universe": 3}
+        )
+        assert resp.status_code == 200
+        # the other worker sees the device on its next request
+        assert [d["name"] for d in worker_b.get("/devices").json()] == ["d"]
+        dup = worker_b.post("/devices", json={"name": "d", "ip": "1.2.3.5", "pixel_count": 2})
+        assert dup.status_code == 400
+        worker_b.post("/devices/d/color", json={"r": 1, "g": 2, "b": 3})
+        worker_a.post("/devices/d/command", json={"universe": 1, "data": "ff" * 600})
+        _wait(lambda: len(calls) == 3)
+        assert calls[0] == ("1.2.3.4", 3, b"\x01\x02\x03" * 2)
+        # payloads larger than a slot go over the channel instead
+        assert [c[1] for c in calls[1:]] == [4, 5]
+        assert engine.frames_sent == 2 and engine.frames_dropped == 0
+        assert worker_a.get("/playback").status_code == 404
+        assert worker_b.post("/recording", json={"path": str(tmp_path / "show.rec")}).status_code == 200
+        assert engine.api.recorder is not None
+        engine.api.recorder.close()
+        resp = worker_a.post("/palettes", json={"name": "shared", "stops": ["#000000", "#ffffff"]})
+        assert resp.status_code == 200
+        assert "shared" in engine.state()[3]
+        assert worker_b.delete("/palettes/shared").status_code == 200
+    finally:
+        conn_a.close()
+        conn_b.close()
+
+
+def test_large_group_through_worker(monkeypatch, engine):
+    calls = []
+    monkeypatch.setattr(
+        "src.network.ArtNetClient.send_dmx",
+        lambda self, universe, data: calls.append(self.target_ip),
+    )
+    conn, worker = _worker(engine)
+    try:
+        segments = []
+        for i in range(200):
+            name = f"d{i}"
+            worker.post("/devices", json={"name": name, "ip": f"10.0.0.{i}", "pixel_count": 2})
+            segments.append({"device": name, "start": 0, "length": 2})
+        assert worker.post("/groups", json={"name": "big", "segments": segments}).status_code == 200
+        for _ in range(3):
+            assert worker.post("/groups/big/color", json={"r": 1, "g": 2, "b": 3}).status_code == 200
+        # every batch is acknowledged, so nothing is in flight or dropped
+        assert len(calls) == 600 and engine.frames_dropped == 0
+        del engine.api.devices["d7"]
+        resp = worker.post("/groups/big/color", json={"r": 1, "g": 2, "b": 3})
+        assert resp.status_code == 503
+        assert resp.json()["detail"] == "Output engine dropped 1 of 200 frames"
+    finally:
+        conn.close()
+
+
+def test_workers_share_favorites(engine, tmp_path):
+    engine.api.favorites = FavoritesManager(tmp_path / "favorites.json")
+    conn_a, worker_a = _worker(engine)
+    conn_b, worker_b = _worker(engine)
+    try:
+        worker_a.post("/favorites", json={"name": "red", "r": 255, "g": 0, "b": 0})
+        worker_b.post("/favorites", json={"name": "blue", "r": 0, "g": 0, "b": 255})
+        assert [f["name"] for f in worker_b.get("/favorites").json()] == ["red", "blue"]
+        resp = worker_b.post("/palettes", json={"name": "rb", "favorites": ["red", "blue"]})
+        assert resp.status_code == 200
+        assert len(FavoritesManager(tmp_path / "favorites.json").list()) == 2
+        missing = worker_a.post("/palettes", json={"name": "x", "favorites": ["green"]})
+        assert missing.status_code == 404
+        worker_a.delete("/palettes/rb")
+    finally:
+        conn_a.close()
+        conn_b.close()
+
+
+def test_engine_calls_serialised_with_render_loop(monkeypatch, engine):
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", lambda self, universe, data: None)
+    conn, worker = _worker(engine)
+    try:
+        worker.post("/devices", json={"name": "d", "ip": "1.2.3.4", "pixel_count": 4})
+        for _ in range(5):
+            # stopping joins the render loop while the call holds the API lock
+            assert worker.post("/devices/d/effect/run", params={"effect": "wave"}).status_code == 200
+            time.sleep(0.03)
+            assert worker.delete("/devices/d/effect/run").status_code == 200
+        assert not engine.api.loop.running
+        headers = {"Content-Type": "application/octet-stream"}
+        resp = worker.post("/devices/d/command", content=b"\x01\x02\x03", headers=headers)
+        assert resp.status_code == 200
+    finally:
+        conn.close()
+
+
+def test_worker_tracing_audio_and_triggers(monkeypatch, engine):
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", lambda self, universe, data: None)
+    conn, worker = _worker(engine)
+    triggered = []
+    engine.api.add_event_hook("scene", triggered.append)
+    try:
+        worker.post("/devices", json={"name": "d", "ip": "1.2.3.4", "pixel_count": 4})
+        worker.post("/trace/start")
+        assert engine.state()[4] == 1.0
+        worker.post("/devices/d/effect", params={"effect": "wave"})
+        # spans recorded in the worker are handed to the engine's trace
+        assert {event[0] for _pid, event in tracer._merged} >= {"device_effect", "render", "encode"}
+        events = worker.get("/trace").json()["traceEvents"]
+        assert "device_effect" in {e["name"] for e in events}
+        worker.post("/trace/stop")
+        assert engine.state()[4] is None
+
+        # audio effects render in the engine, where the audio feed is
+        assert worker.post("/devices/d/effect", params={"effect": "vu"}).status_code == 200
+        assert "d" in engine.api.effect_engines
+
+        assert worker.post("/triggers/scene", json={"x": 1}).json() == {"status": "triggered"}
+        assert triggered == [{"x": 1}]
+        assert worker.post("/triggers/missing").status_code == 404
+    finally:
+        tracer.stop()
+        tracer.clear()
+        conn.close()
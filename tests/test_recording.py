@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from src.recording import FramePlayer, FrameRecorder
+
+
+def _record(path, frames=10, fps=100):
+    with FrameRecorder(path) as rec:
+        for i in range(frames):
+            rec.record("a", 0, bytes([i]) * 3, timestamp=i / fps, ip="10.0.0.1")
+            rec.record("b", 2, bytes([i]) * 6, timestamp=i / fps)
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_record_and_play(tmp_path):
+    path = tmp_path / "show.rec"
+    _record(path)
+    sent = []
+    player = FramePlayer(path, lambda dev, uni, data: sent.append((dev["name"], uni, bytes(data))))
+    try:
+        assert player.duration == pytest.approx(0.09)
+        assert [d["ip"] for d in player.devices] == ["10.0.0.1", ""]
+        player.set_speed(4)
+        player.play()
+        _wait(lambda: len(sent) == 20)
+        assert sent[0] == ("a", 0, b"\x00\x00\x00")
+        assert sent[-1] == ("b", 2, b"\x09" * 6)
+        assert not player.playing
+    finally:
+        player.close()
+
+
+def test_seek_skips_frames(tmp_path):
+    path = tmp_path / "show.rec"
+    _record(path)
+    sent = []
+    player = FramePlayer(path, lambda dev, uni, data: sent.append(bytes(data)[0]))
+    try:
+        player.seek(0.08)
+        player.play()
+        _wait(lambda: len(sent) == 4)
+        assert sent == [8, 8, 9, 9]
+    finally:
+        player.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"not a recording at all" * 4)
+    with pytest.raises(ValueError):
+        FramePlayer(path, lambda *args: None)
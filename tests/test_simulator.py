@@ -0,0 +1,46 @@
+import asyncio
+
+from src.network import ArtNetClient
+from src.simulator import NodeFarm, sustainable
+
+
+def test_farm_tracks_frames_and_gaps():
+    async def scenario():
+        farm = NodeFarm(2, 200, port=0)
+        await farm.start()
+        try:
+            clients = [ArtNetClient(node.ip, node.port) for node in farm.nodes]
+            for tag in (1, 2):
+                for client in clients:
+                    client.send_frame(0, tag.to_bytes(3, "big") * 200)
+            # node 0 loses universe 0 of frame 3
+            clients[0].send_dmx(1, (3).to_bytes(3, "big") * 30)
+            clients[1].send_frame(0, (3).to_bytes(3, "big") * 200)
+            await asyncio.sleep(0.1)
+            return farm.summary({1: 0.0, 2: 0.0, 3: 0.0})
+        finally:
+            await farm.close()
+            for client in clients:
+                client.close()
+
+    result = asyncio.run(scenario())
+    assert result["packets"] == 11
+    assert result["frames"] == 5 and result["incomplete"] == 1
+    assert result["sequence_gaps"] == 0
+    assert result["delivered"] == 1.0
+
+
+def test_sequence_gap_and_reorder():
+    farm = NodeFarm(1, 170)
+    node = farm.nodes[0]
+    for seq in (250, 251, 254, 253, 255, 1, 3):
+        node._check_sequence(0, seq)
+    assert node.stats.sequence_gaps == 3  # 252, 253 and 2 (after wrapping)
+    assert node.stats.out_of_order == 1
+
+
+def test_sustainable():
+    base = {"target_fps": 40, "sent_fps": 39.5, "delivered": 1.0, "frames": 100, "incomplete": 0}
+    assert sustainable(base)
+    assert not sustainable({**base, "sent_fps": 30})
+    assert not sustainable({**base, "delivered": 0.9})
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.rest_api import RestAPI
+from src.tracing import Tracer, tracer
+
+
+@pytest.fixture
+def global_tracer():
+    yield tracer
+    tracer.stop()
+    tracer.clear()
+
+
+def test_disabled_tracer_records_nothing():
+    t = Tracer()
+    with t.frame("frame"):
+        with t.span("render"):
+            pass
+    assert len(t) == 0
+
+
+def test_sampling_keeps_fraction_of_frames(tmp_path):
+    t = Tracer()
+    t.start(sample_rate=0.25)
+    for _ in range(8):
+        with t.frame("frame"):
+            with t.span("render"):
+                pass
+    names = [e["name"] for e in t.chrome_trace()["traceEvents"] if e["ph"] == "X"]
+    assert names.count("frame") == 2 and names.count("render") == 2
+    path = tmp_path / "trace.json"
+    assert t.export(path) == 4
+    assert json.loads(path.read_text())["traceEvents"]
+
+
+def test_api_trace_stages(monkeypatch, global_tracer):
+    monkeypatch.setattr("src.network.ArtNetClient.send_dmx", lambda *args: None)
+    client = TestClient(RestAPI().app)
+    client.post("/devices", json={"name": "dev1", "ip": "1.2.3.4", "pixel_count": 5})
+    assert client.post("/trace/start", params={"sample_rate": 2}).status_code == 400
+    client.post("/trace/start")
+    client.post("/devices/dev1/effect", params={"effect": "wave"})
+    assert client.post("/trace/stop").json()["events"] == 4
+    events = client.get("/trace").json()["traceEvents"]
+    names = {e["name"] for e in events if e["ph"] == "X"}
+    assert names == {"device_effect", "render", "encode", "send"}